@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+"""
+Stores the minimap of maps in the map files, so the map selection can show the preview
+without loading the map (see SavegameManager.get_minimap_data). Savegames get their
+minimap when they are saved.
+
+Run this again after a map has been changed.
+
+Usage (from uh root dir):
+  development/add_minimap_previews.py [map1.sqlite map2.sqlite ...]
+  (default: all maps of the map selection)
+"""
+
+import gettext
+import sqlite3
+import sys
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+from horizons import headless
+from horizons.entities import Entities
+from horizons.savegamemanager import SavegameManager
+from horizons.util import DbReader, SavegameAccessor, WorldObject
+from horizons.world import World
+
+import horizons.main
+
+
+def add_minimap_preview(map_file):
+	# like MapPreview._load_raw_world
+	WorldObject.reset()
+	world = World(session=None)
+	world.inited = True
+	world.load_raw_map(SavegameAccessor(map_file), preview=True)
+
+	db = DbReader(map_file)
+	db("CREATE TABLE IF NOT EXISTS metadata_blob (name TEXT NOT NULL, value BLOB)")
+	SavegameManager.write_minimap_data(db, world)
+	db.close()
+
+if __name__ == '__main__':
+	headless.init()
+	Entities.load_grounds(horizons.main.db, load_now=False)
+	map_files = sys.argv[1:] or SavegameManager.get_maps(include_displaynames=False)[0]
+	for map_file in map_files:
+		try:
+			add_minimap_preview(map_file)
+		except sqlite3.OperationalError as e: # outdated map that the game can't load either
+			print 'Skipped %s: %s' % (map_file, e)
+			continue
+		print 'Added the minimap preview to', map_file
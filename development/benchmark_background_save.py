@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""
+Measures how long saving blocks an AI game, with the savegame written in the game loop
+and in the background (see Session._do_save).
+
+For background saves, the game keeps ticking while the savegame is written. The time
+until the writer is done and the number of ticks executed meanwhile are reported too.
+
+Usage (from uh root dir):
+  development/benchmark_background_save.py [saves [ticks between saves [ai players [map seed]]]]
+"""
+
+import gettext
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+import mock
+
+from horizons import headless
+from horizons.util import random_map
+
+from tests.game import _dbreader_convert_dummy_objects
+
+START_TICKS = 20000 # let the ai players build up their settlements first
+
+
+def run(saves, ticks, ai_players, seed):
+	headless.init()
+	session = headless.create_session(random_map.generate_map_from_seed(seed), ai_players=ai_players)
+	session.timer.run(START_TICKS)
+
+	# saving needs a screenshot and headless instances don't have an action runtime
+	patcher = mock.patch('horizons.session.SavegameManager')
+	patcher.start()
+	dummy_converter = _dbreader_convert_dummy_objects()
+	dummy_converter.__enter__()
+
+	directory = tempfile.mkdtemp()
+	print '%-6s %12s %12s %12s %16s' % ('save', 'blocking', 'bg stall', 'bg write', 'ticks meanwhile')
+	for i in xrange(saves):
+		session.timer.run(ticks)
+		assert session._do_save(os.path.join(directory, 'blocking%d.sqlite' % i))
+		blocking_time = session.save_stall_time
+
+		results = []
+		assert session._do_save(os.path.join(directory, 'background%d.sqlite' % i), callback=results.append)
+		stall_time = session.save_stall_time
+		ticks_meanwhile = 0
+		while session._background_save[0].is_alive():
+			ticks_meanwhile += session.timer.run(1)
+		session.wait_for_background_save()
+		assert results == [True]
+		print '%-6d %11.3fs %11.3fs %11.3fs %16d' % (i + 1, blocking_time, stall_time, session.save_write_time, ticks_meanwhile)
+
+	dummy_converter.__exit__(None, None, None)
+	patcher.stop()
+	session.end()
+	shutil.rmtree(directory)
+
+if __name__ == '__main__':
+	saves = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+	ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+	ai_players = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+	seed = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+	run(saves, ticks, ai_players, seed)
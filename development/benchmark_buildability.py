@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+"""
+Measures the build checks of the building tool with and without the buildability cache
+of the settlements (horizons.world.buildability).
+
+An AI player builds up a settlement until it has a certain number of buildings. Then every
+tile of the settlement is checked like BuildingTool.highlight_buildable does, and every
+position of the settlement like the build preview does when the mouse moves or drags a
+line of roads (Buildable.check_build).
+
+Usage (from uh root dir):
+  development/benchmark_buildability.py [buildings [map seed]]
+"""
+
+import gettext
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+from horizons import headless
+from horizons.constants import BUILDINGS
+from horizons.entities import Entities
+from horizons.util import Point, random_map
+from horizons.world.building.buildable import Buildable
+
+BUILD_STEP = 500 # ticks between checks whether the settlement is big enough
+MAX_BUILD_TICKS = 100000
+REPEAT = 5
+
+
+def highlight(session, settlement, cls):
+	island = session.world.get_island(Point(*settlement.ground_map.iterkeys().next()))
+	count = 0
+	for tile in settlement.ground_map.itervalues():
+		if cls.is_tile_buildable(session, tile, None, island, check_settlement=False):
+			count += 1
+	return count
+
+def preview(session, settlement, cls):
+	count = 0
+	for (x, y) in settlement.ground_map:
+		if cls.check_build(session, Point(x, y), issuer=settlement.owner):
+			count += 1
+	return count
+
+def measure(session, settlement, name, function):
+	start = time.time()
+	result = function()
+	first = time.time() - start
+	start = time.time()
+	for i in xrange(REPEAT):
+		function()
+	return '%-30s %8.3fs %8.3fs %6d' % (name, first, (time.time() - start) / REPEAT, result)
+
+def run(buildings, seed):
+	# like the game with gui, where the building tool is used
+	headless.HeadlessSession.compact_ground_maps = False
+	session = headless.create_session(random_map.generate_map_from_seed(seed), ai_players=1)
+
+	built_ticks = 0
+	settlement = None
+	while built_ticks < MAX_BUILD_TICKS:
+		session.timer.run(BUILD_STEP)
+		built_ticks += BUILD_STEP
+		if session.world.settlements:
+			settlement = max(session.world.settlements, key=lambda s: len(s.buildings))
+			if len(settlement.buildings) >= buildings:
+				break
+	else:
+		print 'The AI did not build %d buildings within %d ticks' % (buildings, MAX_BUILD_TICKS)
+		return
+
+	print 'Settlement with %d buildings and %d tiles after %d ticks' % \
+	      (len(settlement.buildings), len(settlement.ground_map), built_ticks)
+
+	tests = []
+	for function in (highlight, preview):
+		for building_id in (BUILDINGS.TRAIL_CLASS, BUILDINGS.LUMBERJACK_CLASS, BUILDINGS.RESIDENTIAL_CLASS):
+			cls = Entities.buildings[building_id]
+			tests.append(('%s %s' % (function.__name__, cls.name),
+			              lambda function=function, cls=cls: function(session, settlement, cls)))
+
+	get_cached_buildability = Buildable.__dict__['_get_cached_buildability']
+	for cached in (False, True):
+		if cached:
+			Buildable._get_cached_buildability = get_cached_buildability
+		else:
+			Buildable._get_cached_buildability = classmethod(lambda cls, session, position: None)
+		print
+		print '%-30s %9s %9s %6s' % ('uncached' if not cached else 'cached', 'first', 'again', 'found')
+		for name, function in tests:
+			print measure(session, settlement, name, function)
+
+	session.end()
+
+if __name__ == '__main__':
+	buildings = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	seed = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+	run(buildings, seed)
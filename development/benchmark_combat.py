@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+"""
+Measures the stance ticks of many warships, which look for enemies in range every second
+(see MovingWeaponHolder._stance_tick and World.get_health_instances).
+
+Two enemy players get frigates spread over the sea of a random map, half of them each.
+The game then runs for some ticks, once with the spatial index of World.get_ships
+(horizons.world.unitgrid) and once with a linear scan over all ships like before.
+
+Every mode is measured in its own process with the same ship positions.
+
+Usage (from uh root dir):
+  development/benchmark_combat.py [ships [ticks [map seed]]]
+"""
+
+import gettext
+import subprocess
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+
+def linear_get_ships(self, position=None, radius=None):
+	"""World.get_ships without the spatial index"""
+	from horizons.util import Circle
+	if position is not None and radius is not None:
+		circle = Circle(position, radius)
+		return [ship for ship in self.ships if circle.contains(ship.position)]
+	return self.ships
+
+def measure(linear, ships, ticks, seed):
+	gettext.install('', unicode=True) # no translations here
+	setup_headless()
+
+	from horizons import headless
+	from horizons.command.diplomacy import AddEnemyPair
+	from horizons.command.unit import CreateUnit
+	from horizons.constants import UNITS
+	from horizons.util import Color, random_map
+	from horizons.world import World
+	from horizons.world.player import Player
+
+	if linear:
+		World.get_ships = linear_get_ships
+
+	# measure the queries separately, they are what the index changes
+	query_time = [0.0, 0]
+	get_health_instances = World.get_health_instances
+	def timed_get_health_instances(self, *args, **kwargs):
+		start = time.time()
+		result = get_health_instances(self, *args, **kwargs)
+		query_time[0] += time.time() - start
+		query_time[1] += 1
+		return result
+	World.get_health_instances = timed_get_health_instances
+
+	session = headless.create_session(random_map.generate_map_from_seed(seed))
+	world = session.world
+
+	players = []
+	for i in xrange(2):
+		player = Player(session, 10000000 + i, u"p%d" % i, Color[i + 1])
+		player.initialize(None)
+		world.players.append(player)
+		players.append(player)
+	AddEnemyPair(players[0], players[1]).execute(session)
+
+	# every 3rd sea tile in every 3rd row, spread evenly over the map, alternating owners
+	positions = sorted(coords for coords in world.water if coords[0] % 3 == 0 and coords[1] % 3 == 0)
+	step = max(1, len(positions) // ships)
+	for i, (x, y) in enumerate(positions[::step][:ships]):
+		player = players[i % 2]
+		CreateUnit(player.worldid, UNITS.FRIGATE_CLASS, x, y)(issuer=player)
+
+	start = time.time()
+	session.timer.run(ticks)
+	run_time = time.time() - start
+
+	print '%-7s %4d ships  %d ticks %7.2fs  %6d queries %6.2fs  %4d ships left' % \
+	      ('linear' if linear else 'grid', ships, ticks, run_time, query_time[1], query_time[0],
+	       len(world.ships))
+	session.end()
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1 and sys.argv[1] in ('--linear', '--grid'):
+		measure(sys.argv[1] == '--linear', int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+	else:
+		ships = sys.argv[1] if len(sys.argv) > 1 else '500'
+		ticks = sys.argv[2] if len(sys.argv) > 2 else '1000'
+		seed = sys.argv[3] if len(sys.argv) > 3 else '1'
+		for mode in ('--linear', '--grid'):
+			subprocess.call([sys.executable, sys.argv[0], mode, ships, ticks, seed])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""
+Compares loading a random map headless with the ground map dicts and with the compact
+ground maps of horizons.world.groundmap (see Session.compact_ground_maps).
+
+Every mode is measured in its own process, since the peak memory usage is reported.
+
+Usage (from uh root dir):
+  development/benchmark_groundmap.py [map seed [ticks]]
+"""
+
+import gettext
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+
+def measure(compact, seed, ticks):
+	gettext.install('', unicode=True) # no translations here
+	setup_headless()
+
+	from horizons import headless
+	from horizons.util import random_map
+
+	from horizons.world import World
+
+	# measure the part of the loading that creates the ground maps
+	raw_map_times = []
+	load_raw_map = World.load_raw_map
+	def timed_load_raw_map(*args, **kwargs):
+		start = time.time()
+		load_raw_map(*args, **kwargs)
+		raw_map_times.append(time.time() - start)
+	World.load_raw_map = timed_load_raw_map
+
+	headless.HeadlessSession.compact_ground_maps = compact
+	headless.init()
+	map_file = random_map.generate_huge_map_from_seed(seed)
+	start = time.time()
+	session = headless.create_session(map_file, ai_players=1)
+	load_time = time.time() - start
+
+	start = time.time()
+	session.timer.run(ticks)
+	run_time = time.time() - start
+
+	world = session.world
+	print '%-8s load %6.2fs (load_raw_map %5.2fs)  %d ticks %6.2fs  peak memory %4d MB  %d sea tiles (%d created)' % \
+	      ('compact' if compact else 'dicts', load_time, raw_map_times[0], ticks, run_time,
+	       resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, len(world.ground_map),
+	       world.ground_map.get_created_tiles() if compact else len(world.ground_map))
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1 and sys.argv[1] in ('--dicts', '--compact'):
+		measure(sys.argv[1] == '--compact', int(sys.argv[2]), int(sys.argv[3]))
+	else:
+		seed = sys.argv[1] if len(sys.argv) > 1 else '1'
+		ticks = sys.argv[2] if len(sys.argv) > 2 else '1000'
+		for mode in ('--dicts', '--compact'):
+			subprocess.call([sys.executable, sys.argv[0], mode, seed, ticks])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""
+Compares full and incremental savegames (see horizons.util.incrementalsave) of an AI game.
+
+After a full save, the game runs for some ticks and is then saved both incrementally and
+fully. This is repeated a few times. Besides the time of both saves, the number of objects
+that had to be written incrementally is reported, and the contents of both savegames are
+compared (except for the action runtimes, which aren't updated for unchanged objects).
+
+Usage (from uh root dir):
+  development/benchmark_incremental_save.py [ticks between saves [saves [ai players [map seed]]]]
+"""
+
+import gettext
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+import mock
+
+from horizons import headless
+from horizons.util import random_map
+from horizons.util.dbreader import DbReader
+from horizons.util.incrementalsave import IncrementalSaver
+
+from tests.game import _dbreader_convert_dummy_objects
+
+START_TICKS = 20000 # let the ai players build up their settlements first
+
+
+def get_rows(savegame):
+	"""Returns {table: Counter of rows} of a savegame"""
+	db = DbReader(savegame)
+	rows = {}
+	for (table, ) in db("SELECT name FROM sqlite_master WHERE type = 'table'"):
+		if table != 'concrete_object':
+			rows[table] = Counter(db("SELECT * FROM %s" % table))
+	db.close()
+	return rows
+
+def save(session, savegame, incremental):
+	start = time.time()
+	assert session._do_save(savegame, incremental=incremental)
+	return time.time() - start
+
+def run(ticks, saves, ai_players, seed):
+	headless.init()
+	session = headless.create_session(random_map.generate_map_from_seed(seed), ai_players=ai_players)
+	session.timer.run(START_TICKS)
+
+	# saving needs a screenshot and headless instances don't have an action runtime
+	patcher = mock.patch('horizons.session.SavegameManager')
+	patcher.start()
+	dummy_converter = _dbreader_convert_dummy_objects()
+	dummy_converter.__enter__()
+
+	directory = tempfile.mkdtemp()
+	incremental_savegame = os.path.join(directory, 'incremental%d.sqlite')
+	full_savegame = os.path.join(directory, 'full%d.sqlite')
+
+	save(session, full_savegame % 0, False)
+	print '%d buildings, %d units' % (sum(len(island.buildings) for island in session.world.islands),
+	                                  len(session.world.ships) + len(session.world.ground_units))
+	print '%-6s %10s %14s %16s %10s' % ('save', 'full', 'incremental', 'written objects', 'equal')
+	for i in xrange(1, saves + 1):
+		session.timer.run(ticks)
+		incremental_time = save(session, incremental_savegame % i, True)
+		saver = session.incremental_saver
+		written, saved = saver.written_objects, saver.saved_objects
+		# the full save must not become the base of the next incremental one
+		session.incremental_saver = IncrementalSaver()
+		full_time = save(session, full_savegame % i, False)
+		session.incremental_saver = saver
+		equal = get_rows(incremental_savegame % i) == get_rows(full_savegame % i)
+		print '%-6d %9.3fs %13.3fs %9d / %5d %10s' % (i, full_time, incremental_time, written, saved, equal)
+
+	dummy_converter.__exit__(None, None, None)
+	patcher.stop()
+	session.end()
+	shutil.rmtree(directory)
+
+if __name__ == '__main__':
+	ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	saves = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+	ai_players = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+	seed = int(sys.argv[4]) if len(sys.argv) > 4 else 2
+	run(ticks, saves, ai_players, seed)
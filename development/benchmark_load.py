@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+"""
+Measures loading a savegame of an AI game and reports the queries per table that the
+SavegameAccessor executed (see SavegameAccessor.get_query_report).
+
+The savegame is created first by letting ai players build for some ticks, it is kept so
+later runs with the same arguments can reuse it.
+
+Usage (from uh root dir):
+  development/benchmark_load.py [ticks [ai players [map seed]]]
+"""
+
+import gettext
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+import mock
+
+import horizons.main
+from horizons import headless
+from horizons.constants import VERSION
+from horizons.util import random_map
+from horizons.util.dbreader import DbReader
+from horizons.util.savegameaccessor import SavegameAccessor
+
+from tests.game import _dbreader_convert_dummy_objects
+
+
+def create_savegame(savegame, ticks, ai_players, seed):
+	session = headless.create_session(random_map.generate_map_from_seed(seed), ai_players=ai_players)
+	session.timer.run(ticks)
+	# saving needs a screenshot and headless instances don't have an action runtime
+	with mock.patch('horizons.session.SavegameManager'):
+		with _dbreader_convert_dummy_objects():
+			assert session._do_save(savegame)
+	session.end()
+
+	# the metadata isn't written without SavegameManager, the game wouldn't count as loaded
+	db = DbReader(savegame)
+	db("INSERT INTO metadata(name, value) VALUES(?, ?)", 'savecounter', 1)
+	db("INSERT INTO metadata(name, value) VALUES(?, ?)", 'savegamerev', VERSION.SAVEGAMEREVISION)
+	db.close()
+
+def run(ticks, ai_players, seed):
+	headless.init()
+	savegame = os.path.join(tempfile.gettempdir(), 'uh-benchmark-load-%d-%d-%d.sqlite' % (ticks, ai_players, seed))
+	if not os.path.exists(savegame):
+		print 'Creating savegame %s' % savegame
+		create_savegame(savegame, ticks, ai_players, seed)
+
+	# loading might change the file (it's a map then), so load a copy
+	directory = tempfile.mkdtemp()
+	copy = os.path.join(directory, 'savegame.sqlite')
+	shutil.copyfile(savegame, copy)
+
+	reports = []
+	close = SavegameAccessor.close
+	def report_close(self):
+		reports.append(self.get_query_report())
+		close(self)
+	SavegameAccessor.close = report_close
+
+	session = headless.HeadlessSession(headless.Dummy, horizons.main.db)
+	horizons.main._modules.session = session
+	start = time.time()
+	session.load(copy, [], True, True, 1)
+	load_time = time.time() - start
+
+	SavegameAccessor.close = close
+	print '%d buildings, %d units loaded in %.2fs' % (sum(len(island.buildings) for island in session.world.islands),
+	                                                 len(session.world.ships) + len(session.world.ground_units), load_time)
+	print '\n'.join(reports[-1])
+
+	session.end()
+	shutil.rmtree(directory)
+
+if __name__ == '__main__':
+	ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+	ai_players = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+	seed = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+	run(ticks, ai_players, seed)
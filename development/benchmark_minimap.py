@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""
+Compares calculating the minimap of a random map pixel by pixel, like Minimap._recalculate
+did before, with horizons.world.minimapraster, which Minimap uses now.
+
+The data is calculated like Minimap.dump_data does for the map preview (--generate-minimap),
+both ways have to return the same data. Then the updates after settlement changes are
+measured: the old way recalculated every pixel in the bounding rect of the changed tiles,
+the raster only checks the islands in the rect and returns the pixels that have changed.
+
+An AI player plays for some ticks first, so there are settlements on the map.
+
+Usage (from uh root dir):
+  development/benchmark_minimap.py [size [ticks [map seed]]]
+"""
+
+import gettext
+import json
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+from horizons import headless
+from horizons.util import Point, random_map
+from horizons.world.minimapraster import MinimapRaster
+
+ISLAND_COLOR = (137, 117, 87) # Minimap.COLORS["island"]
+REPEAT = 5
+
+
+def old_dump_data(world, width, height, left=0, top=0, right=None, bottom=None):
+	"""The loop of Minimap._recalculate before the raster, without rotation"""
+	pixel_per_coord_x = float(world.map_dimensions.width) / width
+	pixel_per_coord_y = float(world.map_dimensions.height) / height
+	pixel_per_coord_x_half_as_int = int(pixel_per_coord_x/2)
+	pixel_per_coord_y_half_as_int = int(pixel_per_coord_y/2)
+	real_map_point = Point(0, 0)
+	get_island_tuple = world.get_island_tuple
+	data = []
+	for x in xrange(left, width if right is None else right + 1):
+		last_island = None
+		island = None
+		for y in xrange(top, height if bottom is None else bottom + 1):
+			real_map_point.x = int(x*pixel_per_coord_x)+world.min_x + pixel_per_coord_x_half_as_int
+			real_map_point.y = int(y*pixel_per_coord_y)+world.min_y + pixel_per_coord_y_half_as_int
+			real_map_point_tuple = (real_map_point.x, real_map_point.y)
+			if last_island is not None and real_map_point_tuple in last_island.ground_map:
+				island = last_island
+			else:
+				island = get_island_tuple(real_map_point_tuple)
+			if island is not None:
+				last_island = island
+				settlement = island.get_settlement(real_map_point)
+				if settlement is None:
+					color = ISLAND_COLOR
+				else:
+					color = settlement.owner.color.to_tuple()
+			else:
+				continue
+			data.append( (x, y) + color )
+	return json.dumps(data)
+
+def raster_dump_data(world, width, height):
+	"""Like Minimap.dump_data"""
+	raster = MinimapRaster(world, width, height, ISLAND_COLOR)
+	pixels = raster.calculate()
+	return json.dumps([ (x, y) + color for (x, y), color in sorted(pixels.iteritems()) ])
+
+def measure(name, function):
+	start = time.time()
+	for i in xrange(REPEAT):
+		result = function()
+	print '%-40s %8.4fs' % (name, (time.time() - start) / REPEAT)
+	return result
+
+def run(size, ticks, seed):
+	# like the game with gui, which has a minimap
+	headless.HeadlessSession.compact_ground_maps = False
+	session = headless.create_session(random_map.generate_map_from_seed(seed), ai_players=1)
+	session.timer.run(ticks)
+	world = session.world
+	print '%dx%d pixels, %d islands, %d settlements after %d ticks' % \
+	      (size, size, len(world.islands), len(world.settlements), ticks)
+
+	old = measure('full, pixel by pixel', lambda: old_dump_data(world, size, size))
+	new = measure('full, raster', lambda: raster_dump_data(world, size, size))
+	if old != new:
+		print 'The data differs!'
+		return
+
+	# a settlement expansion: the pixels of the settlement range of a building
+	raster = MinimapRaster(world, size, size, ISLAND_COLOR)
+	raster.calculate()
+	left, top = size // 3, size // 3
+	right, bottom = left + size // 10, top + size // 10
+	measure('update %dx%d, pixel by pixel' % (size // 10 + 1, size // 10 + 1),
+	        lambda: old_dump_data(world, size, size, left, top, right, bottom))
+	measure('update %dx%d, raster' % (size // 10 + 1, size // 10 + 1),
+	        lambda: raster.update(left, top, right, bottom))
+
+	session.end()
+
+if __name__ == '__main__':
+	size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+	seed = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+	run(size, ticks, seed)
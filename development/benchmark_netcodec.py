@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""
+Compares the multiplayer game data wire formats: pickle (one message per packet, like
+before horizons.network.packets.codec), and the compact codec (one message per tick).
+
+Simulates the packets of a multiplayer game, where every player sends a CommandPacket
+each tick and a CheckupHashPacket every HASH_EVAL_DISTANCE ticks. Most ticks contain no
+commands.
+
+Usage (from uh root dir):
+  development/benchmark_netcodec.py [ticks] [players]
+"""
+
+import cPickle
+import gettext
+import random
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+import horizons.world # resolve import cycles
+from horizons.command.building import Build
+from horizons.command.misc import Chat
+from horizons.command.unit import Act
+from horizons.manager import MPManager, CommandPacket, CheckupHashPacket
+from horizons.network.packets import codec, unserialize, client, PICKLE_PROTOCOL
+
+COMMAND_PROBABILITY = 0.05 # chance that a player issues commands in a tick
+
+
+class Dummy(object):
+	def __init__(self, worldid):
+		self.worldid = worldid
+
+
+def create_commands(rng):
+	commands = []
+	while rng.random() < 0.5 or not commands:
+		kind = rng.randint(0, 2)
+		if kind == 0:
+			commands.append(Act(Dummy(rng.randint(1000, 5000)), rng.randint(0, 200), rng.randint(0, 200)))
+		elif kind == 1:
+			commands.append(Build(rng.randint(1, 60), rng.randint(0, 200), rng.randint(0, 200),
+			                      Dummy(rng.randint(1, 20)), settlement=Dummy(rng.randint(1000, 5000))))
+		else:
+			commands.append(Chat(u'gg'))
+	return commands
+
+def create_messages(ticks, players, seed=1):
+	"""Returns a list of lists of packets, one list per message of the codec"""
+	rng = random.Random(seed)
+	messages = []
+	for tick in xrange(ticks):
+		for player in xrange(1, players + 1):
+			commands = create_commands(rng) if rng.random() < COMMAND_PROBABILITY else []
+			packets = [CommandPacket(tick + MPManager.EXECUTIONDELAY, player, commands)]
+			if (tick + MPManager.HASHDELAY) % MPManager.HASH_EVAL_DISTANCE == 0:
+				checkup_hash = (rng.random(), ) + tuple(rng.getrandbits(64) for i in xrange(3))
+				packets.append(CheckupHashPacket(tick + MPManager.HASHDELAY, player, checkup_hash))
+			messages.append(packets)
+	return messages
+
+def measure(func):
+	start = time.time()
+	result = func()
+	return time.time() - start, result
+
+def main():
+	ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	players = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+	messages = create_messages(ticks, players)
+	codec.encode(messages[0]) # build class table
+
+	pickle_encode = lambda: [cPickle.dumps(client.game_data(packet), PICKLE_PROTOCOL) \
+	                         for packets in messages for packet in packets]
+	codec_encode = lambda: [codec.encode(packets) for packets in messages]
+
+	results = []
+	for name, encode in (('pickle', pickle_encode), ('codec', codec_encode)):
+		encode_time, data = measure(encode)
+		decode_time, decoded = measure(lambda: [unserialize(d) for d in data])
+		results.append( (name, len(data), sum(len(d) for d in data), encode_time, decode_time) )
+
+	print '%d ticks, %d players, %d%% of ticks with commands' % (ticks, players, COMMAND_PROBABILITY * 100)
+	print '  %-8s %12s %16s %16s %16s' % ('', 'msgs/tick', 'bytes/tick', 'encode us/tick', 'decode us/tick')
+	for name, num, size, encode_time, decode_time in results:
+		print '  %-8s %12.1f %16.1f %16.1f %16.1f' % (name, float(num) / ticks, float(size) / ticks,
+		                                             encode_time * 1e6 / ticks, decode_time * 1e6 / ticks)
+
+
+if __name__ == '__main__':
+	main()
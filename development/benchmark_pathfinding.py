@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+"""
+Benchmark comparing the pathfinding engines FindPath and GridFindPath
+(see horizons.world.pathfinding.pathfinding) on huge random maps.
+
+Searches ship paths between random water tiles and soldier/collector paths between random
+walkable tiles of the islands, and checks that both engines find the same paths.
+Also compares ship searches on all water with searches guided by the SeaGraph.
+
+Usage (from uh root dir):
+  development/benchmark_pathfinding.py [map seed [number of searches]]
+"""
+
+import gettext
+import random
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+from horizons.headless import create_session
+from horizons.util import Point
+from horizons.util.random_map import generate_huge_map_from_seed
+from horizons.world.pathfinding.pathfinding import FindPath
+from horizons.world.pathfinding.seagraph import SeaGraph
+
+
+def measure(engine, searches):
+	paths = []
+	start = time.time()
+	for args in searches:
+		paths.append(engine(*args))
+	return time.time() - start, paths
+
+def main():
+	seed = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+	count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	rng = random.Random(seed)
+
+	session = create_session(generate_huge_map_from_seed(seed))
+	world = session.world
+	print 'Map seed %d: %d water tiles, %d islands' % (seed, len(world.water), len(world.islands))
+
+	water = sorted(world.water)
+	ship_searches = []
+	for i in xrange(count):
+		source, destination = Point(*rng.choice(water)), Point(*rng.choice(water))
+		ship_searches.append((source, destination, world.water, world.ship_map, True, False))
+
+	land_searches = []
+	for i in xrange(count):
+		nodes = rng.choice(world.islands).path_nodes.nodes
+		if not nodes:
+			continue
+		coords = sorted(nodes)
+		source, destination = Point(*rng.choice(coords)), Point(*rng.choice(coords))
+		land_searches.append((source, destination, nodes, [], True, True))
+
+	for name, searches in (('ship', ship_searches), ('land', land_searches)):
+		old_time, old_paths = measure(FindPath(), searches)
+		new_time, new_paths = measure(world.pathfinder, searches)
+		assert old_paths == new_paths, 'engines found different paths'
+		found = len([path for path in new_paths if path is not None])
+		print '%s: %d searches (%d paths found)' % (name, len(searches), found)
+		print '  FindPath     %8.4fs' % old_time
+		print '  GridFindPath %8.4fs' % new_time
+
+	def sea_graph_search(source, destination, path_nodes, *args):
+		path_nodes = world.sea_graph.get_path_nodes(source, destination)
+		return None if path_nodes is None else world.pathfinder(source, destination, path_nodes, *args)
+	start = time.time()
+	SeaGraph(world.water)
+	print 'SeaGraph: %d regions, built in %.4fs' % (len(world.sea_graph.regions), time.time() - start)
+	full_time, full_paths = measure(world.pathfinder, ship_searches)
+	graph_time, graph_paths = measure(sea_graph_search, ship_searches)
+	assert [path is None for path in full_paths] == [path is None for path in graph_paths], \
+	       'SeaGraph changed reachability'
+	found = [ (full, graph) for full, graph in zip(full_paths, graph_paths) if full is not None ]
+	print 'ship: %d searches on all water or with the SeaGraph' % len(ship_searches)
+	print '  all water    %8.4fs' % full_time
+	print '  SeaGraph     %8.4fs (paths %.1f%% longer)' % (graph_time,
+	      100.0 * (sum(len(graph) for full, graph in found) / float(sum(len(full) for full, graph in found)) - 1))
+
+	session.end()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""
+Counts how often waiting productions get notified about inventory changes.
+
+An AI player builds up a settlement until it has a certain number of buildings. Then the
+calls of Production._check_inventory, which productions register as resource listeners, are
+counted for some ticks. For comparison, the script also counts the calls that a change
+listener on the whole inventory (as productions used before) would have received: one per
+change of an inventory for every production that is waiting on it.
+
+Usage (from uh root dir):
+  development/benchmark_production_listeners.py [buildings [ticks [map seed]]]
+"""
+
+import gettext
+import sys
+from collections import defaultdict
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+from horizons import headless
+from horizons.util import random_map
+from horizons.world.production.production import Production
+from horizons.world.storage import GenericStorage
+
+BUILD_STEP = 500 # ticks between checks whether the settlement is big enough
+MAX_BUILD_TICKS = 100000
+
+
+class Counter(object):
+	"""Wraps the methods that are relevant for counting."""
+	def __init__(self):
+		self.active = False
+		self.resource_listener_calls = 0
+		self.change_listener_calls = 0
+		self.inventory_changes = 0
+		self.waiting = defaultdict(set) # {id(inventory): set of productions listening to it}
+
+		counter = self
+		check_inventory = Production._check_inventory
+		add_listeners = Production._add_listeners
+		remove_listeners = Production._remove_listeners
+		changed = GenericStorage._changed
+
+		def _check_inventory(self):
+			if counter.active:
+				counter.resource_listener_calls += 1
+			check_inventory(self)
+
+		def _add_listeners(self):
+			add_listeners(self)
+			for inventory, res in self._listened_res:
+				counter.waiting[id(inventory)].add(self)
+
+		def _remove_listeners(self):
+			for inventory, res in self._listened_res:
+				counter.waiting[id(inventory)].discard(self)
+			remove_listeners(self)
+
+		def _changed(self):
+			if counter.active:
+				counter.inventory_changes += 1
+				counter.change_listener_calls += len(counter.waiting.get(id(self), ()))
+			changed(self)
+
+		Production._check_inventory = _check_inventory
+		Production._add_listeners = _add_listeners
+		Production._remove_listeners = _remove_listeners
+		GenericStorage._changed = _changed
+
+
+def run(buildings, ticks, seed):
+	counter = Counter()
+	session = headless.create_session(random_map.generate_map_from_seed(seed), ai_players=1)
+
+	built_ticks = 0
+	settlement = None
+	while built_ticks < MAX_BUILD_TICKS:
+		session.timer.run(BUILD_STEP)
+		built_ticks += BUILD_STEP
+		if session.world.settlements:
+			settlement = max(session.world.settlements, key=lambda s: len(s.buildings))
+			if len(settlement.buildings) >= buildings:
+				break
+	else:
+		print 'The AI did not build %d buildings within %d ticks' % (buildings, MAX_BUILD_TICKS)
+		return
+
+	waiting = len(set().union(*counter.waiting.itervalues()))
+	print 'Settlement with %d buildings after %d ticks, %d productions waiting for res' % \
+	      (len(settlement.buildings), built_ticks, waiting)
+
+	counter.active = True
+	session.timer.run(ticks)
+	counter.active = False
+
+	print 'Over %d ticks: %d inventory changes' % (ticks, counter.inventory_changes)
+	print '%-40s %10s' % ('', 'calls/tick')
+	print '%-40s %10.2f' % ('whole inventory change listeners', float(counter.change_listener_calls) / ticks)
+	print '%-40s %10.2f' % ('resource listeners', float(counter.resource_listener_calls) / ticks)
+
+	session.end()
+
+if __name__ == '__main__':
+	buildings = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+	seed = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+	run(buildings, ticks, seed)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""
+Micro-benchmark comparing the scheduler engines (see horizons.scheduler.SCHEDULER_ENGINES).
+
+Fills the scheduler with a number of pending callbacks, then measures adding them,
+removing single calls, removing all calls of instances and ticking.
+
+Usage (from uh root dir):
+  development/benchmark_scheduler.py [pending callbacks, ...]
+"""
+
+import gettext
+import random
+import sys
+import time
+
+sys.path.append(".")
+
+try:
+	from run_uh import setup_headless
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+gettext.install('', unicode=True) # no translations here
+setup_headless()
+
+from horizons.scheduler import Scheduler, SCHEDULER_ENGINES
+
+OPERATIONS = 100 # number of removals and lookups
+
+
+class FakeTimer(object):
+	def add_call(self, call):
+		pass
+
+	def remove_call(self, call):
+		pass
+
+
+class Instance(object):
+	def __init__(self):
+		self.calls = 0
+
+	def callback(self):
+		self.calls += 1
+
+	def other_callback(self):
+		self.calls += 1
+
+
+def measure(func):
+	start = time.time()
+	func()
+	return time.time() - start
+
+def run(engine, pending, seed=1):
+	rng = random.Random(seed)
+	Scheduler.create_instance(FakeTimer(), engine=engine)
+	scheduler = Scheduler()
+	scheduler.before_ticking()
+	instances = [Instance() for i in xrange(pending // 10)]
+	results = {}
+
+	def add():
+		for i in xrange(pending):
+			instance = instances[i % len(instances)]
+			callback = instance.callback if i % 2 else instance.other_callback
+			loops = -1 if i % 3 == 0 else 1
+			scheduler.add_new_object(callback, instance, run_in=rng.randint(1, 500), loops=loops,
+			                         loop_interval=rng.randint(1, 100))
+	results['add'] = measure(add)
+
+	def rem_call():
+		for instance in rng.sample(instances, OPERATIONS):
+			scheduler.rem_call(instance, instance.callback)
+	results['rem_call x%d' % OPERATIONS] = measure(rem_call)
+
+	def rem_all():
+		for instance in rng.sample(instances, OPERATIONS):
+			scheduler.rem_all_classinst_calls(instance)
+	results['rem_all x%d' % OPERATIONS] = measure(rem_all)
+
+	def get_calls():
+		for instance in rng.sample(instances, OPERATIONS):
+			scheduler.get_classinst_calls(instance)
+	results['get_calls x%d' % OPERATIONS] = measure(get_calls)
+
+	def tick():
+		for i in xrange(500):
+			scheduler.tick(scheduler.cur_tick + 1)
+	results['500 ticks'] = measure(tick)
+
+	scheduler.end()
+	Scheduler.destroy_instance()
+	return results
+
+def main():
+	sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+	for pending in sizes:
+		print 'Pending callbacks: %d' % pending
+		results = dict((engine, run(engine, pending)) for engine in sorted(SCHEDULER_ENGINES))
+		keys = results.values()[0].keys()
+		print '  %-16s' % '' + ''.join('%12s' % engine for engine in sorted(results))
+		for key in sorted(keys):
+			print '  %-16s' % key + ''.join('%11.4fs' % results[engine][key] for engine in sorted(results))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""
+Load test for the multiplayer master server (horizons/network/server.py).
+
+Drives the server with simulated clients through an in-process stand-in for the enet
+host, so no sockets are involved and only the server core is measured:
+  - connect all clients
+  - half of them create lobbies (random map, version and number of players)
+  - the others request filtered lobby lists, every 10th request is followed by a join
+  - all clients disconnect
+
+Usage (from uh root dir):
+  development/loadtest_server.py [clients]
+"""
+
+import cPickle
+import logging
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.append(".")
+
+try:
+	from horizons.network import packets
+	from horizons.network.server import Server, enet
+except ImportError as e:
+	print e.message
+	print 'Please run from uh root dir'
+	sys.exit(1)
+
+MAPS = [u'map%02d' % i for i in xrange(20)]
+VERSIONS = [u'2012.1', u'2012.2', u'2012.3']
+LIST_REQUESTS = 5 # per client that doesn't create a game
+
+
+class LocalPacket(object):
+	def __init__(self, data):
+		self.data = data
+
+class LocalEvent(object):
+	def __init__(self, type, peer, data = 0, packet = None):
+		self.type = type
+		self.peer = peer
+		self.data = data
+		self.packet = packet
+
+NO_EVENT = LocalEvent(enet.EVENT_TYPE_NONE, None)
+
+
+class LocalHost(object):
+	"""Stand-in for enet.Host, events are queued by the simulated clients."""
+	def __init__(self):
+		self.events = deque()
+		self.flushes = 0
+
+	def service(self, timeout):
+		return self.events.popleft() if self.events else NO_EVENT
+
+	def check_events(self):
+		return self.service(0)
+
+	def flush(self):
+		self.flushes += 1
+
+
+class LocalPeer(enet.Peer):
+	"""Stand-in for enet.Peer, stores what the server sends."""
+	address = None
+	data = None
+	state = enet.PEER_STATE_CONNECTED
+
+	def __init__(self, host, port):
+		self.local_host = host
+		self.address = enet.Address('127.0.0.1', port)
+		self.received = []
+
+	def send(self, channelid, packet):
+		self.received.append(packet.data)
+
+	def disconnect_later(self):
+		self.state = enet.PEER_STATE_DISCONNECTED
+		self.local_host.events.append(LocalEvent(enet.EVENT_TYPE_DISCONNECT, self))
+
+	disconnect = disconnect_now = disconnect_later
+
+
+class SimulatedClient(object):
+	def __init__(self, host, port):
+		self.host = host
+		self.peer = LocalPeer(host, port)
+		self.sid = None
+
+	def connect(self):
+		self.host.events.append(LocalEvent(enet.EVENT_TYPE_CONNECT, self.peer))
+
+	def send(self, packet):
+		packet.sid = self.sid
+		self.host.events.append(LocalEvent(enet.EVENT_TYPE_RECEIVE, self.peer,
+		                                   packet=LocalPacket(packet.serialize())))
+
+	def disconnect(self):
+		self.peer.disconnect_later()
+
+	def read(self):
+		"""Returns the packets received since the last call"""
+		received = [cPickle.loads(data) for data in self.peer.received]
+		self.peer.received = []
+		return received
+
+
+def run_events(server):
+	"""Lets the server handle all queued events, returns the number of service iterations"""
+	iterations = 0
+	while server.service(0):
+		iterations += 1
+	return iterations
+
+def percentile(values, p):
+	values = sorted(values)
+	return values[min(len(values) - 1, int(len(values) * p))]
+
+def main():
+	num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+	rng = random.Random(1)
+	logging.getLogger().setLevel(logging.WARNING) # the server logs every request on debug level
+
+	host = LocalHost()
+	server = Server('127.0.0.1', 2002)
+	server.host = host
+	clients = [SimulatedClient(host, 10000 + i) for i in xrange(num_clients)]
+
+	start = time.time()
+	for client in clients:
+		client.connect()
+	iterations = run_events(server)
+	duration = time.time() - start
+	for client in clients:
+		client.sid = client.read()[0].sid
+	print 'connect:    %8.0f connections/s (%d flushes in %d iterations)' % \
+	      (num_clients / duration, host.flushes, iterations)
+
+	creators = clients[:num_clients // 2]
+	start = time.time()
+	for i, client in enumerate(creators):
+		client.send(packets.client.cmd_creategame(rng.choice(VERSIONS), rng.choice(MAPS),
+		                                          rng.randint(2, 8), u'player%d' % i, u'game%d' % i))
+	run_events(server)
+	print 'create:     %8.0f games/s, %d lobbies' % (len(creators) / (time.time() - start), len(server.games))
+	for client in creators:
+		client.read()
+
+	latencies = []
+	joins = 0
+	for i, client in enumerate(clients[num_clients // 2:]):
+		for j in xrange(LIST_REQUESTS):
+			version = rng.choice(VERSIONS)
+			client.send(packets.client.cmd_listgames(version, rng.choice(MAPS + [None]),
+			                                         rng.choice([None, 2, 4, 8])))
+			start = time.time()
+			run_events(server)
+			latencies.append(time.time() - start)
+			games = client.read()[0].games
+			if games and (i * LIST_REQUESTS + j) % 10 == 0:
+				client.send(packets.client.cmd_joingame(rng.choice(games).uuid, version, u'joiner%d' % i))
+				run_events(server)
+				client.read()
+				joins += 1
+				break
+	print 'list:       %8d requests, p50 %.3fms, p99 %.3fms, %d joins' % \
+	      (len(latencies), percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, joins)
+
+	start = time.time()
+	for client in clients:
+		client.disconnect()
+	run_events(server)
+	print 'disconnect: %8.0f clients/s, %d lobbies left' % (num_clients / (time.time() - start), len(server.games))
+
+
+if __name__ == '__main__':
+	main()
@@ -69,6 +69,7 @@ from goal.donothing import DoNothingGoal
 
 from horizons.scheduler import Scheduler
 from horizons.util import Callback, WorldObject
+from horizons.util.incrementalsave import save_world_objects
 from horizons.ext.enum import Enum
 from horizons.ai.generic import GenericAI
 from horizons.util.python import decorators
@@ -125,7 +126,7 @@ class AIPlayer(GenericAI):
 		self.fishers = []
 		self.settlement_founder = SettlementFounder(self)
 		self.unit_builder = UnitBuilder(self)
-		self.settlement_expansions = [] # [(coords, settlement)]
+		self.settlement_expansions = [] # [(coords list, settlement)]
 		self.goals = [DoNothingGoal(self)]
 		self.special_domestic_trade_manager = SpecialDomesticTradeManager(self)
 		self.international_trade_manager = InternationalTradeManager(self)
@@ -177,8 +178,7 @@ class AIPlayer(GenericAI):
 			db("INSERT INTO ai_ship(rowid, owner, state) VALUES(?, ?, ?)", ship.worldid, self.worldid, state.index)
 
 		# save the land managers
-		for land_manager in self.islands.itervalues():
-			land_manager.save(db)
+		save_world_objects(db, self.islands.itervalues())
 
 		# save the settlement managers
 		for settlement_manager in self.settlement_managers:
@@ -325,7 +325,8 @@ class AIPlayer(GenericAI):
 		Scheduler().add_new_object(Callback(self._settlement_manager_by_settlement_id[message.building.settlement.worldid].handle_disaster, message), self, run_in = 0)
 
 	def on_settlement_expansion(self, settlement, coords):
-		""" stores the ownership change in a list for later processing """
+		""" stores the ownership change in a list for later processing
+		@param coords: list of the coordinates that have been added to the settlement """
 		if settlement.owner is not self:
 			self.settlement_expansions.append((coords, settlement))
 
@@ -337,7 +338,7 @@ class AIPlayer(GenericAI):
 		for coords, settlement in self.settlement_expansions:
 			if settlement.island.worldid not in self.islands:
 				continue # we don't have a settlement there and have no current plans to create one
-			change_lists[settlement.island.worldid].append(coords)
+			change_lists[settlement.island.worldid].extend(coords)
 		self.settlement_expansions = []
 		if not change_lists:
 			return # no changes in land ownership on islands we care about
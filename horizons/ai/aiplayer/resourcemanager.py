@@ -362,10 +362,10 @@ class SingleResourceManager(WorldObject):
 	def _load(self, db, settlement_manager, worldid):
 		super(SingleResourceManager, self).load(db, worldid)
 		(resource_id, building_id, self.low_priority, self.available, self.total) = \
-		    db("SELECT resource_id, building_id, low_priority, available, total FROM ai_single_resource_manager WHERE rowid = ?", worldid)[0]
+		    db.get_ai_single_resource_manager_row(worldid)
 		self.__init(settlement_manager, resource_id, building_id)
 
-		for (identifier, quota, priority) in db("SELECT identifier, quota, priority FROM ai_single_resource_manager_quota WHERE single_resource_manager = ?", worldid):
+		for (identifier, quota, priority) in db.get_ai_single_resource_manager_quotas(worldid):
 			self.quotas[identifier] = (quota, priority)
 
 	@classmethod
@@ -45,6 +45,7 @@ from horizons.ai.aiplayer.goal.tradingship import TradingShipGoal
 
 from horizons.scheduler import Scheduler
 from horizons.util import WorldObject
+from horizons.util.incrementalsave import save_world_objects
 from horizons.util.python import decorators
 from horizons.command.building import Tear
 from horizons.command.uioptions import SetTaxSetting, SetSettlementUpgradePermissions
@@ -150,7 +151,8 @@ class SettlementManager(WorldObject):
 		db("INSERT INTO ai_settlement_manager(rowid, land_manager) VALUES(?, ?)", \
 			self.worldid, self.land_manager.worldid)
 
-		self.village_builder.save(db)
+		# the village plan is big and rarely changes, so it is worth saving incrementally
+		save_world_objects(db, [self.village_builder])
 		self.production_builder.save(db)
 		self.resource_manager.save(db)
 		self.trade_manager.save(db)
@@ -64,6 +64,8 @@ def change_runnning_costs(obj, costs_diff):
 	"""
 	assert(hasattr(obj, 'running_costs'))
 	obj.running_costs += costs_diff
+	if getattr(obj, 'settlement', None) is not None:
+		obj.session.world.checkup_hash.update_building(obj)
 
 def change_storage_space(obj, res, amount_diff):
 	obj.get_component(StorageComponent).inventory.change_resource_slot_size(res, amount_diff)
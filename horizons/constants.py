@@ -276,6 +276,7 @@ class GAME:
 
 	WORLD_WORLDID = 0 # worldid of World object
 	MAX_TICKS = None # exit after on tick MAX_TICKS (disabled by setting to None)
+	SCHEDULER_ENGINE = 'heap' # how the scheduler stores pending callbacks, see horizons.scheduler
 
 class GUI:
 	CITYINFO_UPDATE_DELAY = 2 # seconds
@@ -326,6 +327,7 @@ class WILD_ANIMAL:
 class COLLECTORS:
 	DEFAULT_WORK_DURATION = 16 # how many ticks collectors pretend to work at target
 	DEFAULT_WAIT_TICKS = 32 # how long collectors wait before again looking for a job
+	MAX_WAIT_TICKS = 128 # how long collectors wait for a possible job before looking again (see CollectingComponent)
 	DEFAULT_STORAGE_SIZE = 8
 	STATISTICAL_WINDOW = 1000 # How many latest ticks are relevant for calculating how busy a collector is
 
@@ -388,6 +390,8 @@ class PATHS:
 	LOG_DIR = os.path.join(_user_dir, "log")
 	USER_CONFIG_FILE = os.path.join(_user_dir, "settings.xml")
 	SCREENSHOT_DIR = os.path.join(_user_dir, "screenshots")
+	RANDOM_ISLAND_CACHE_FILE = os.path.join(_user_dir, "random_islands.sqlite")
+	SAVEGAME_CATALOG_FILE = os.path.join(_user_dir, "savegame_catalog.sqlite")
 
 	# paths relative to uh dir
 	ACTION_SETS_DIRECTORY = os.path.join("content", "gfx")
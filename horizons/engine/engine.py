@@ -33,6 +33,7 @@ from fife.extensions.serializers.simplexml import SimpleXMLSerializer
 from fife.extensions.fife_settings import FIFE_MODULE
 
 from horizons.util import SQLiteAnimationLoader, SQLiteAtlasLoader
+from horizons.util.phasetimer import PhaseTimer
 from horizons.constants import LANGUAGENAMES, PATHS, GFX
 from horizons.engine.settingshandler import SettingsHandler, get_screen_resolutions
 from horizons.engine.sound import Sound
@@ -160,7 +161,8 @@ class Fife(ApplicationBase):
 		self.targetrenderer = self.engine.getTargetRenderer()
 		self.use_atlases = GFX.USE_ATLASES
 		if self.use_atlases:
-			self.animationloader = SQLiteAtlasLoader()
+			with PhaseTimer.phase("load atlases"):
+				self.animationloader = SQLiteAtlasLoader()
 		else:
 			self.animationloader = SQLiteAnimationLoader()
 
@@ -429,8 +429,11 @@ class MapPreview(object):
 		Only use for existing maps, it's too slow for random maps"""
 		if self.minimap is not None:
 			self.minimap.end()
-		world = self._load_raw_world(map_file)
-		self.minimap = Minimap(self._get_map_preview_icon(),
+		icon = self._get_map_preview_icon()
+		# use the minimap stored in the map if there is one, loading the map takes long
+		data = SavegameManager.get_minimap_data(map_file, (icon.width, icon.height))
+		world = self._load_raw_world(map_file) if data is None else None
+		self.minimap = Minimap(icon,
 			                     session=None,
 			                     view=None,
 			                     world=world,
@@ -441,7 +444,10 @@ class MapPreview(object):
 			                     tooltip=None,
 			                     on_click=None,
 			                     preview=True)
-		self.minimap.draw()
+		if data is None:
+			self.minimap.draw()
+		else:
+			self.minimap.draw_data(data)
 
 	def update_random_map(self, map_params, on_click):
 		"""Called when a random map parameter has changed.
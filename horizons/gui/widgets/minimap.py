@@ -29,6 +29,7 @@ from horizons.extscheduler import ExtScheduler
 from horizons.util.python.decorators import bind_all
 from horizons.command.unit import Act
 from horizons.world.component.namedcomponent import NamedComponent
+from horizons.world.minimapraster import MinimapRaster
 
 import math
 from math import sin, cos
@@ -48,7 +49,7 @@ class Minimap(object):
 	* Create a minimap tag for pychan
 	** Handle clicks, remove overlay icon
 	"""
-	COLORS = { "island": (137, 117,  87),
+	COLORS = { "island": MinimapRaster.ISLAND_COLOR,
 		"cam":    (  1,   1,   1),
 		"water" : (198, 188, 165),
 		"highlight" : (255, 0, 0), # for events
@@ -61,6 +62,11 @@ class Minimap(object):
 
 	SHIP_DOT_UPDATE_INTERVAL = 0.5 # seconds
 
+	# the 'flag' over the icons of ships of regular players: (x0, y0, x1, y1) relative to
+	# the ship, first the lines with the color of the owner, then the black border
+	SHIP_FLAG_LINES = ((-5, -5, 0, -5), (-6, -6, 0, -6), (-4, -4, 0, -4))
+	SHIP_FLAG_BORDER_LINES = ((-6, -7, 0, -7), (-4, -3, 0, -4), (-6, -7, -4, -3))
+
 	RENDER_NAMES = { # alpha-ordering determines the order
 	  "background" : "c",
 	  "base" : "d", # islands, etc.
@@ -119,6 +125,10 @@ class Minimap(object):
 		self._id = str(self.__class__.__minimap_id_counter.next()) # internal identifier, used for allocating resources
 
 		self._image_size_cache = {} # internal detail
+		self._ship_icon_cache = {} # {path: image}
+
+		# colors of the pixels, kept up to date while the minimap is drawn (see draw() and disable())
+		self._raster = None
 
 		self.imagemanager = imagemanager
 		
@@ -143,11 +153,12 @@ class Minimap(object):
 
 		if self in self.__class__._instances:
 			self.__class__._instances.remove(self)
+			self._raster = None # updates are missed from now on
 
-	def draw(self):
+	def draw(self, recalculate=True):
 		"""Recalculates and draws the whole minimap of self.session.world or world.
 		The world you specified is reused for every operation until the next draw().
-		@param recalculate: do a full recalculation
+		@param recalculate: do a full recalculation, else reuse the colors of the last one if possible
 		"""
 		if self.world is None and self.session.world is not None:
 			self.world = self.session.world # in case minimap has been constructed before the world
@@ -175,7 +186,10 @@ class Minimap(object):
 			self.icon.image = fife.GuiImage( self.minimap_image.image )
 
 		self.update_cam()
-		self._recalculate()
+		if recalculate or self._raster is None:
+			self._recalculate()
+		else:
+			self._draw_pixels(self._raster.pixels.iteritems(), clear=True)
 		if not self.preview:
 			self._timed_update(force=True)
 			ExtScheduler().rem_all_classinst_calls(self)
@@ -245,21 +259,37 @@ class Minimap(object):
 		for minimap in cls._instances:
 			minimap._update(tup)
 
+	@classmethod
+	def update_area(cls, coords):
+		"""Like update, but for many coords at once (e.g. a settlement expansion).
+		@param coords: iterable of (x, y)"""
+		for minimap in cls._instances:
+			minimap._update_area(coords)
+
 	def _update(self, tup):
 		"""Recalculate and redraw minimap for real world coord tup
 		@param tup: (x, y)"""
+		self._update_area([tup])
+
+	def _update_area(self, coords):
+		"""Recalculate and redraw the part of the minimap that shows coords.
+		The bounding rect of their minimap points is redrawn once.
+		@param coords: iterable of (x, y)"""
 		if self.world is None or not self.world.inited:
 			return # don't draw while loading
-		minimap_point = self._world_to_minimap( tup, self._get_rotation_setting() )
+		use_rotation = self._get_rotation_setting()
+		minimap_points = set( self._world_to_minimap(tup, use_rotation) for tup in coords )
+		if not minimap_points:
+			return
 		world_to_minimap = self._world_to_minimap_ratio
 		# TODO: remove this remnant of the old implementation, perhaps by refactoring recalculate()
-		minimap_point = (
-		  minimap_point[0] + self.location.left,
-		  minimap_point[1] + self.location.top,
-		)
-		rect = Rect.init_from_topleft_and_size(minimap_point[0], minimap_point[1], \
-								                           int(round(1/world_to_minimap[0])) + 1, \
-								                           int(round(1/world_to_minimap[1])) + 1)
+		left = min(point[0] for point in minimap_points) + self.location.left
+		top = min(point[1] for point in minimap_points) + self.location.top
+		right = max(point[0] for point in minimap_points) + self.location.left
+		bottom = max(point[1] for point in minimap_points) + self.location.top
+		rect = Rect.init_from_topleft_and_size(left, top, \
+		                                       right - left + int(round(1/world_to_minimap[0])) + 1, \
+		                                       bottom - top + int(round(1/world_to_minimap[1])) + 1)
 		self._recalculate(rect)
 
 	def use_overlay_icon(self, icon):
@@ -454,92 +484,51 @@ class Minimap(object):
 		"""Calculate which pixel of the minimap should display what and draw it
 		@param where: Rect of minimap coords. Defaults to self.location
 		@param dump_data: Don't draw but return calculated data"""
-		self.minimap_image.set_drawing_enabled()
+		if where is None or self._raster is None:
+			self._raster = MinimapRaster(self.world, self.location.width, self.location.height)
+			pixels = self._raster.calculate().iteritems()
+			clear = True
+		else:
+			# only the pixels that have changed have to be drawn again
+			left = self.location.left
+			top = self.location.top
+			pixels = self._raster.update(where.left - left, where.top - top,
+			                             where.right - left, where.bottom - top)
+			clear = False
+
+		if dump_data:
+			data = [ (x, y) + color for (x, y), color in sorted(pixels) if color is not None ]
+			return json.dumps( data )
+
+		self._draw_pixels(pixels, clear)
 
+	def _draw_pixels(self, pixels, clear):
+		"""Draws pixels of the minimap (see MinimapRaster)
+		@param pixels: iterable of ((x, y), color), where color is None for water
+		@param clear: whether to remove all pixels that have been drawn before"""
+		self.minimap_image.set_drawing_enabled()
 		rt = self.minimap_image.rendertarget
 		render_name = self._get_render_name("base")
-
-		if where is None:
-			where = self.location
+		if clear:
 			rt.removeAll(render_name)
 
-		# calculate which area of the real map is mapped to which pixel on the minimap
-		pixel_per_coord_x, pixel_per_coord_y = self._world_to_minimap_ratio
-
-		# calculate values here so we don't have to do it in the loop
-		pixel_per_coord_x_half_as_int = int(pixel_per_coord_x/2)
-		pixel_per_coord_y_half_as_int = int(pixel_per_coord_y/2)
-
-		real_map_point = Point(0, 0)
-		world_min_x = self.world.min_x
-		world_min_y = self.world.min_y
-		get_island_tuple = self.world.get_island_tuple
-		island_col = self.COLORS["island"]
+		drawPoint = rt.addPoint
+		fife_point = fife.Point(0,0)
+		water_col = self.COLORS["water"]
 		location_left = self.location.left
 		location_top = self.location.top
-		if dump_data:
-			data = []
-			drawPoint = lambda name, fife_point, r, g, b : data.append( (fife_point.x, fife_point.y, r, g, b) )
-		else:
-			drawPoint = rt.addPoint
-		fife_point = fife.Point(0,0)
-
 		use_rotation = self._get_rotation_setting()
 
-		# loop through map coordinates, assuming (0, 0) is the origin of the minimap
-		# this faciliates calculating the real world coords
-		for x in xrange(where.left-self.location.left, where.left+where.width-self.location.left):
-			# Optimisation: remember last island
-			last_island = None
-			island = None
-			for y in xrange(where.top-self.location.top, where.top+where.height-self.location.top):
-
-				"""
-				This code should be here, but since python can't do inlining, we have to inline
-				ourselves for performance reasons
-				covered_area = Rect.init_from_topleft_and_size(
-				  int(x * pixel_per_coord_x)+world_min_x, \
-				  int(y * pixel_per_coord_y)+world_min_y), \
-				  int(pixel_per_coord_x), int(pixel_per_coord_y))
-				real_map_point = covered_area.center()
-				"""
-				# use center of the rect that the pixel covers
-				real_map_point.x = int(x*pixel_per_coord_x)+world_min_x + \
-											pixel_per_coord_x_half_as_int
-				real_map_point.y = int(y*pixel_per_coord_y)+world_min_y + \
-											pixel_per_coord_y_half_as_int
-				real_map_point_tuple = (real_map_point.x, real_map_point.y)
-
-				# check what's at the covered_area
-				if last_island is not None and real_map_point_tuple in last_island.ground_map:
-					island = last_island
-				else:
-					island = get_island_tuple(real_map_point_tuple)
-				if island is not None:
-					last_island = island
-					# this pixel is an island
-					settlement = island.get_settlement(real_map_point)
-					if settlement is None:
-						# island without settlement
-						color = island_col
-					else:
-						# pixel belongs to a player
-						color = settlement.owner.color.to_tuple()
-				else:
-					continue
-
-				if use_rotation:
-					# inlined _get_rotated_coords
-					rot_x, rot_y = self._rotate( (location_left + x, location_top + y), self._rotations)
-					fife_point.set(rot_x - location_left, rot_y - location_top)
-				else:
-					fife_point.set(x, y)
-
-				drawPoint(render_name, fife_point, *color)
-
-		if dump_data:
-			return json.dumps( data )
-
+		for (x, y), color in pixels:
+			if color is None:
+				color = water_col
+			if use_rotation:
+				# inlined _get_rotated_coords
+				rot_x, rot_y = self._rotate( (location_left + x, location_top + y), self._rotations)
+				fife_point.set(rot_x - location_left, rot_y - location_top)
+			else:
+				fife_point.set(x, y)
+			drawPoint(render_name, fife_point, *color)
 
 	def _timed_update(self, force=False):
 		"""Regular updates for domains we can't or don't want to keep track of."""
@@ -552,55 +541,42 @@ class Minimap(object):
 		# make use of this dummy points instead of creating a fife.point instances which are consuming a lot of resources
 		dummy_point0 = fife.Point(0,0)
 		dummy_point1 = fife.Point(0,0)
+		rt = self.minimap_image.rendertarget
+		pirate = self.world.pirate
+		selected_instances = self.session.selected_instances
 		for ship in self.world.ship_map.itervalues():
-			if not ship():
+			ship = ship()
+			if not ship:
 				continue
 
-			coord = self._world_to_minimap( ship().position.to_tuple(), use_rotation )
-			color = ship().owner.color.to_tuple()
+			coord = self._world_to_minimap( ship.position.to_tuple(), use_rotation )
+			owner = ship.owner
+			color = owner.color.to_tuple()
 			# set correct icon
-			if ship().owner is self.session.world.pirate:
-				ship_icon_path = self.__class__.SHIP_PIRATE
-			else: 	
-				ship_icon_path = self.__class__.SHIP_NEUTRAL
-			ship_icon = self.imagemanager.load(ship_icon_path)
+			if owner is pirate:
+				ship_icon = self._get_ship_icon(self.__class__.SHIP_PIRATE)
+			else:
+				ship_icon = self._get_ship_icon(self.__class__.SHIP_NEUTRAL)
 			dummy_point1.set(coord[0], coord[1])
-			self.minimap_image.rendertarget.addImage(render_name, dummy_point1, ship_icon)
-			if ship().owner.regular_player is True:
+			rt.addImage(render_name, dummy_point1, ship_icon)
+			if owner.regular_player is True:
 				# add the 'flag' over the ship icon, with the color of the owner
-				dummy_point0.set(coord[0] - 5, coord[1] - 5)
-				dummy_point1.set(coord[0], coord[1] - 5)
-				self.minimap_image.rendertarget.addLine(render_name, dummy_point0,
-									dummy_point1, color[0], color[1], color[2])
-				dummy_point0.set(coord[0] - 6, coord[1] - 6)
-				dummy_point1.set(coord[0], coord[1] - 6)
-				self.minimap_image.rendertarget.addLine(render_name, dummy_point0,
-									dummy_point1, color[0], color[1], color[2])
-				dummy_point0.set(coord[0] - 4, coord[1] - 4)
-				dummy_point1.set(coord[0], coord[1] - 4)
-				self.minimap_image.rendertarget.addLine(render_name, dummy_point0,
-									dummy_point1, color[0], color[1], color[2])
-				# add black border around the flag
-				dummy_point0.set(coord[0] - 6, coord[1] - 7)
-				dummy_point1.set(coord[0], coord[1] - 7)
-				self.minimap_image.rendertarget.addLine(render_name, dummy_point0, dummy_point1, 0, 0, 0)
-				dummy_point0.set(coord[0] - 4, coord[1] - 3)
-				dummy_point1.set(coord[0], coord[1] - 4)
-				self.minimap_image.rendertarget.addLine(render_name, dummy_point0, dummy_point1, 0, 0, 0)
-				dummy_point0.set(coord[0] - 6, coord[1] - 7)
-				dummy_point1.set(coord[0] - 4, coord[1] - 3)
-				self.minimap_image.rendertarget.addLine(render_name, dummy_point0, dummy_point1, 0, 0, 0)
-				
+				for lines, line_color in ((self.SHIP_FLAG_LINES, color), (self.SHIP_FLAG_BORDER_LINES, (0, 0, 0))):
+					for x0, y0, x1, y1 in lines:
+						dummy_point0.set(coord[0] + x0, coord[1] + y0)
+						dummy_point1.set(coord[0] + x1, coord[1] + y1)
+						rt.addLine(render_name, dummy_point0, dummy_point1, *line_color)
+
 			# TODO: nicer selected view
 			dummy_point0.set(coord[0], coord[1])
-			if ship() in self.session.selected_instances:
-				self.minimap_image.rendertarget.addPoint(render_name, dummy_point0, *Minimap.COLORS["water"])
+			if ship in selected_instances:
+				rt.addPoint(render_name, dummy_point0, *Minimap.COLORS["water"])
 				for x_off, y_off in ((-2,  0),
 					                   (+2,  0),
 					                   ( 0, -2),
 					                   ( 0, +2)):
 					dummy_point1.set(coord[0]+x_off, coord[1] + y_off)
-					self.minimap_image.rendertarget.addPoint(render_name, dummy_point1, *color)
+					rt.addPoint(render_name, dummy_point1, *color)
 
 		# draw settlement warehouses if something has changed
 		settlements = self.world.settlements
@@ -619,6 +595,13 @@ class Minimap(object):
 				                    coord)
 			self._last_settlements = cur_settlements
 
+	def _get_ship_icon(self, img_path):
+		"""Returns the image of a ship icon, loading it only once"""
+		img = self._ship_icon_cache.get(img_path)
+		if img is None:
+			img = self._ship_icon_cache[img_path] = self.imagemanager.load(img_path)
+		return img
+
 	def _update_image(self, img_path, name, coord_tuple):
 		"""Updates image as part of minimap (e.g. when it has moved)"""
 		img = self.imagemanager.load( img_path )
@@ -642,14 +625,14 @@ class Minimap(object):
 		self.rotation -= 1
 		self.rotation %= 4
 		if self._get_rotation_setting():
-			self.draw()
+			self.draw(recalculate=False)
 
 	def rotate_left (self):
 		# see above
 		self.rotation += 1
 		self.rotation %= 4
 		if self._get_rotation_setting():
-			self.draw()
+			self.draw(recalculate=False)
 
 	## CALC UTILITY
 	def _world_to_minimap(self, coord, use_rotation):
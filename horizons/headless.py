@@ -0,0 +1,135 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+"""Runs a game without engine, renderer and gui, ticking as fast as possible.
+This is used to soak-test AI games and savegames, e.g. on machines without a GPU:
+
+  ./run_uh.py --headless --ticks 10000 --start-random-map --ai-players 2 --human-ai-hybrid
+
+run_uh.py replaces the fife, enet and horizons.gui modules with dummies in this mode
+(see run_uh.setup_headless), so this module must not be imported in normal games.
+"""
+
+import time
+
+import horizons.main
+import horizons.world # needs to be imported before session
+
+from horizons.constants import GAME_SPEED
+from horizons.ext.dummy import Dummy
+from horizons.extscheduler import ExtScheduler
+from horizons.savegamemanager import SavegameManager
+from horizons.spsession import SPSession
+from horizons.timer import Timer
+from horizons.util import Color
+
+
+class HeadlessTimer(Timer):
+	"""Timer that isn't driven by the engine, but ticks on demand without waiting."""
+
+	def activate(self):
+		pass
+
+	def run(self, ticks):
+		"""Executes ticks as fast as possible.
+		@param ticks: number of ticks to execute
+		@return: number of ticks that were actually executed"""
+		for i in xrange(ticks):
+			for f in self.tick_func_test:
+				if f(self.tick_next_id) == self.TEST_SKIP:
+					return i
+			for f in self.tick_func_call:
+				f(self.tick_next_id)
+			self.tick_next_id += 1
+		return ticks
+
+
+class HeadlessSession(SPSession):
+	"""Singleplayer session without view and autosaves."""
+
+	compact_ground_maps = True
+
+	def create_timer(self):
+		return HeadlessTimer()
+
+	def create_view(self):
+		return Dummy
+
+	def reset_autosave(self):
+		pass
+
+
+def init():
+	"""Sets up the global game data that would be loaded on startup in normal games."""
+	if getattr(horizons.main, "db", None) is not None:
+		return
+	horizons.main.fife = Dummy
+	horizons.main.db = horizons.main._create_main_db()
+	ExtScheduler.create_instance([]) # nothing pumps this, there is no gui to update
+	SavegameManager.init()
+
+def create_session(map_file, ai_players=0, human_ai=False, force_player_id=None):
+	"""Starts a headless singleplayer game, like horizons.main.start_singleplayer.
+	@return: HeadlessSession, its world is ready to tick
+	"""
+	init()
+	session = HeadlessSession(Dummy, horizons.main.db)
+	horizons.main._modules.session = session
+	players = horizons.main.create_singleplayer_player_list(u"Player", Color[1], ai_players, human_ai)
+	session.load(map_file, players, True, True, 1, force_player_id=force_player_id)
+	return session
+
+def run_headless(options):
+	"""Loads the game specified by the command line options and runs it for options.ticks ticks.
+	@param options: options object from optparse.OptionParser. see run_uh.py.
+	@return: bool, whether the game could be run
+	"""
+	if options.ticks is None or options.ticks <= 0:
+		print "Error: --headless requires a positive number of --ticks."
+		return False
+
+	init()
+	if options.load_map is not None:
+		map_file = horizons.main._find_savegame(options.load_map)
+	elif options.start_map is not None:
+		map_file = horizons.main._find_map(options.start_map)
+	elif options.start_random_map or options.start_specific_random_map is not None:
+		from horizons.util import random_map
+		map_file = random_map.generate_map_from_seed(options.start_specific_random_map)
+	else:
+		print "Error: --headless requires a map, use e.g. --start-map, --start-random-map or --load-map."
+		return False
+	if map_file is None:
+		return False
+
+	session = create_session(map_file, options.ai_players, options.human_ai, options.force_player_id)
+
+	print "Running %d ticks headless on %s" % (options.ticks, map_file)
+	start = time.time()
+	ticks = session.timer.run(options.ticks)
+	duration = max(time.time() - start, 1e-6)
+	print "Ran %d ticks (%.1f ingame seconds) in %.2f seconds: %.1f ticks/sec" % \
+	      (ticks, float(ticks) / GAME_SPEED.TICKS_PER_SECOND, duration, ticks / duration)
+
+	session.end()
+	horizons.main._modules.session = None
+	return ticks == options.ticks
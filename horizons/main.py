@@ -47,6 +47,7 @@ from horizons.constants import AI, COLORS, GAME, PATHS, NETWORK, SINGLEPLAYER, G
 from horizons.network.networkinterface import NetworkInterface
 from horizons.util import ActionSetLoader, DifficultySettings, TileSetLoader, Color, parse_port, Callback
 from horizons.util.uhdbaccessor import UhDbAccessor, read_savegame_template
+from horizons.util.phasetimer import PhaseTimer
 
 # private module pointers of this module
 class Modules(object):
@@ -96,18 +97,6 @@ def start(_command_line_arguments):
 		  ) )
 		sys.exit(0)
 
-	# init fife before mp_bind is parsed, since it's needed there
-	fife = Fife()
-
-	if command_line_arguments.mp_bind:
-		try:
-			mpieces = command_line_arguments.mp_bind.partition(':')
-			NETWORK.CLIENT_ADDRESS = mpieces[0]
-			fife.set_uh_setting("NetworkPort", parse_port(mpieces[2], allow_zero=True))
-		except ValueError:
-			print "Error: Invalid syntax in --mp-bind commandline option. Port must be a number between 1 and 65535."
-			return False
-
 	if command_line_arguments.ai_highlights:
 		AI.HIGHLIGHT_PLANS = True
 	if command_line_arguments.human_ai:
@@ -121,6 +110,23 @@ def start(_command_line_arguments):
 	if command_line_arguments.max_ticks:
 		GAME.MAX_TICKS = command_line_arguments.max_ticks
 
+	if command_line_arguments.headless: # simulate without engine and gui
+		from horizons.headless import run_headless
+		return run_headless(command_line_arguments)
+
+	# init fife before mp_bind is parsed, since it's needed there
+	with PhaseTimer.phase("create engine"):
+		fife = Fife()
+
+	if command_line_arguments.mp_bind:
+		try:
+			mpieces = command_line_arguments.mp_bind.partition(':')
+			NETWORK.CLIENT_ADDRESS = mpieces[0]
+			fife.set_uh_setting("NetworkPort", parse_port(mpieces[2], allow_zero=True))
+		except ValueError:
+			print "Error: Invalid syntax in --mp-bind commandline option. Port must be a number between 1 and 65535."
+			return False
+
 	db = _create_main_db()
 
 	# init game parts
@@ -155,16 +161,20 @@ def start(_command_line_arguments):
 		fife.set_fife_setting('PlaySounds', False)
 
 	ExtScheduler.create_instance(fife.pump)
-	fife.init()
-	_modules.gui = Gui()
-	SavegameManager.init()
+	with PhaseTimer.phase("init engine"):
+		fife.init()
+	with PhaseTimer.phase("create gui"):
+		_modules.gui = Gui()
+	with PhaseTimer.phase("init savegame manager"):
+		SavegameManager.init()
 
 	from horizons.entities import Entities
-	Entities.load(db, load_now=False) # create all references
+	with PhaseTimer.phase("create entities"):
+		Entities.load(db, load_now=False) # create all references
 
 	# for preloading game data while in main screen
 	preload_lock = threading.Lock()
-	preload_thread = threading.Thread(target=preload_game_data, args=(preload_lock,))
+	preload_thread = threading.Thread(target=preload_game_data, args=(preload_lock,), name="preloading")
 	preloading = (preload_thread, preload_lock)
 
 	# initalize update checker
@@ -226,6 +236,7 @@ def start(_command_line_arguments):
 		_modules.gui.join_mp_game()
 	else: # no commandline parameter, show main screen
 		_modules.gui.show_main()
+		PhaseTimer.mark("main menu shown")
 		if not command_line_arguments.nopreload:
 			preloading[0].start()
 
@@ -261,7 +272,8 @@ def start_singleplayer(map_file, playername = "Player", playercolor = None, is_s
 	@param force_player_id: the worldid of the selected human player or default if None (debug option)
 	"""
 	global fife, preloading, db
-	preload_game_join(preloading)
+	with PhaseTimer.phase("wait for preloading"):
+		preload_game_join(preloading)
 
 	if playercolor is None: # this can't be a default parameter because of circular imports
 		playercolor = Color[1]
@@ -281,25 +293,7 @@ def start_singleplayer(map_file, playername = "Player", playercolor = None, is_s
 	from spsession import SPSession
 	_modules.session = SPSession(_modules.gui, db)
 
-	# for now just make it a bit easier for the AI
-	difficulty_level = {False: DifficultySettings.DEFAULT_LEVEL, True: DifficultySettings.EASY_LEVEL}
-	players = [{ 'id' : 1, 'name' : playername, 'color' : playercolor, 'local' : True, 'ai': human_ai, 'difficulty': difficulty_level[bool(human_ai)]}]
-
-	# add AI players with a distinct color; if none can be found then use black
-	for num in xrange(ai_players):
-		color = Color[COLORS.BLACK] # if none can be found then be black
-		for possible_color in Color:
-			if possible_color == Color[COLORS.BLACK]:
-				continue # black is used by the trader and the pirate
-			available = True
-			for player in players:
-				if player['color'].to_tuple() == possible_color.to_tuple():
-					available = False
-					break
-			if available:
-				color = possible_color
-				break
-		players.append({'id': num + 2, 'name' : 'AI' + str(num + 1), 'color' : color, 'local' : False, 'ai': True, 'difficulty': difficulty_level[True]})
+	players = create_singleplayer_player_list(playername, playercolor, ai_players, human_ai)
 
 	from horizons.scenario import InvalidScenarioFileFormat # would create import loop at top
 	try:
@@ -329,13 +323,41 @@ def start_singleplayer(map_file, playername = "Player", playercolor = None, is_s
 		load_game(ai_players, human_ai, force_player_id=force_player_id)
 
 
+def create_singleplayer_player_list(playername, playercolor, ai_players, human_ai):
+	"""Returns the list of player dicts for Session.load() in a singleplayer game
+	@param ai_players: number of AI players to add (excludes possible human AI)
+	@param human_ai: whether the human player is controlled by an AI
+	"""
+	# for now just make it a bit easier for the AI
+	difficulty_level = {False: DifficultySettings.DEFAULT_LEVEL, True: DifficultySettings.EASY_LEVEL}
+	players = [{ 'id' : 1, 'name' : playername, 'color' : playercolor, 'local' : True, 'ai': human_ai, 'difficulty': difficulty_level[bool(human_ai)]}]
+
+	# add AI players with a distinct color; if none can be found then use black
+	for num in xrange(ai_players):
+		color = Color[COLORS.BLACK] # if none can be found then be black
+		for possible_color in Color:
+			if possible_color == Color[COLORS.BLACK]:
+				continue # black is used by the trader and the pirate
+			available = True
+			for player in players:
+				if player['color'].to_tuple() == possible_color.to_tuple():
+					available = False
+					break
+			if available:
+				color = possible_color
+				break
+		players.append({'id': num + 2, 'name' : 'AI' + str(num + 1), 'color' : color, 'local' : False, 'ai': True, 'difficulty': difficulty_level[True]})
+
+	return players
+
 def prepare_multiplayer(game, trader_enabled = True, pirate_enabled = True, natural_resource_multiplier = 1):
 	"""Starts a multiplayer game server
 	TODO: acctual game data parameter passing
 	"""
 	global fife, preloading, db
 
-	preload_game_join(preloading)
+	with PhaseTimer.phase("wait for preloading"):
+		preload_game_join(preloading)
 
 	# remove cursor while loading
 	fife.cursor.set(fife_module.CURSOR_NONE)
@@ -391,10 +413,10 @@ def _start_dev_map(ai_players, human_ai, force_player_id):
 	load_game(ai_players, human_ai, m, force_player_id=force_player_id)
 	return True
 
-def _start_map(map_name, ai_players=0, human_ai=False, is_scenario=False, campaign=None, pirate_enabled=True, trader_enabled=True, force_player_id=None):
-	"""Start a map specified by user
+def _find_map(map_name, is_scenario=False):
+	"""Finds a map specified by user, prints an error if there is no unique match
 	@param map_name: name of map or path to map
-	@return: bool, whether loading succeded"""
+	@return: path to map file or None"""
 	# check for exact/partial matches in map list first
 	maps = SavegameManager.get_available_scenarios() if is_scenario else SavegameManager.get_maps()
 	map_file = None
@@ -417,11 +439,20 @@ def _start_map(map_name, ai_players=0, human_ai=False, is_scenario=False, campai
 		else:
 			#xgettext:python-format
 			print u"Error: Cannot find map '{name}'.".format(name=map_name)
-			return False
+			return None
 	if len(map_file.splitlines()) > 1:
 		print "Error: Found multiple matches:"
 		for match in map_file.splitlines():
 			print os.path.basename(match)
+		return None
+	return map_file
+
+def _start_map(map_name, ai_players=0, human_ai=False, is_scenario=False, campaign=None, pirate_enabled=True, trader_enabled=True, force_player_id=None):
+	"""Start a map specified by user
+	@param map_name: name of map or path to map
+	@return: bool, whether loading succeded"""
+	map_file = _find_map(map_name, is_scenario)
+	if map_file is None:
 		return False
 	load_game(ai_players, human_ai, map_file, is_scenario, campaign=campaign,
 	          trader_enabled=trader_enabled, pirate_enabled=pirate_enabled, force_player_id=force_player_id)
@@ -472,10 +503,10 @@ def _start_campaign(campaign_name, force_player_id=None):
 	return _start_map(scenarios[0], 0, False, is_scenario = True, campaign = {'campaign_name': campaign_name, 'scenario_index': 0, 'scenario_name': scenarios[0]}, \
 		force_player_id=force_player_id)
 
-def _load_map(savegame, ai_players, human_ai, force_player_id=None):
-	"""Load a map specified by user.
+def _find_savegame(savegame):
+	"""Finds a savegame specified by user, prints an error if there is no unique match
 	@param savegame: eiter the displayname of a savegame or a path to a savegame
-	@return: bool, whether loading succeded"""
+	@return: path to savegame or None"""
 	# first check for partial or exact matches in the normal savegame list
 	saves = SavegameManager.get_saves()
 	map_file = None
@@ -498,11 +529,20 @@ def _load_map(savegame, ai_players, human_ai, force_player_id=None):
 		else:
 			#xgettext:python-format
 			print u"Error: Cannot find savegame '{name}'.".format(name=savegame)
-			return False
+			return None
 	if len(map_file.splitlines()) > 1:
 		print "Error: Found multiple matches:"
 		for match in map_file.splitlines():
 			print os.path.basename(match)
+		return None
+	return map_file
+
+def _load_map(savegame, ai_players, human_ai, force_player_id=None):
+	"""Load a map specified by user.
+	@param savegame: eiter the displayname of a savegame or a path to a savegame
+	@return: bool, whether loading succeded"""
+	map_file = _find_savegame(savegame)
+	if map_file is None:
 		return False
 	load_game(savegame=map_file, force_player_id=force_player_id)
 	return True
@@ -518,6 +558,7 @@ def _load_last_quicksave(force_player_id=None):
 	load_game(savegame=save, force_player_id=force_player_id)
 	return True
 
+@PhaseTimer.timed("create main db")
 def _create_main_db():
 	"""Returns a dbreader instance, that is connected to the main game data dbfiles.
 	NOTE: This data is read_only, so there are no concurrency issues"""
@@ -537,16 +578,17 @@ def preload_game_data(lock):
 		from horizons.util import Callback
 		log = logging.getLogger("preload")
 		mydb = _create_main_db() # create own db reader instance, since it's not thread-safe
-		preload_functions = [ ActionSetLoader.load, \
-		                      TileSetLoader.load,
-		                      Callback(Entities.load_grounds, mydb, load_now=True), \
-		                      Callback(Entities.load_buildings, mydb, load_now=True), \
-		                      Callback(Entities.load_units, load_now=True) ]
-		for f in preload_functions:
+		preload_functions = [ ("action sets", ActionSetLoader.load), \
+		                      ("tile sets", TileSetLoader.load), \
+		                      ("grounds", Callback(Entities.load_grounds, mydb, load_now=True)), \
+		                      ("buildings", Callback(Entities.load_buildings, mydb, load_now=True)), \
+		                      ("units", Callback(Entities.load_units, load_now=True)) ]
+		for name, f in preload_functions:
 			if not lock.acquire(False):
 				break
 			log.debug("Preload: %s", f)
-			f()
+			with PhaseTimer.phase("preload " + name):
+				f()
 			log.debug("Preload: %s is done", f)
 			lock.release()
 		log.debug("Preloading done.")
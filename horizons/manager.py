@@ -21,6 +21,8 @@
 
 import operator
 import logging
+import time
+from collections import deque
 
 from horizons.timer import Timer
 from horizons.scheduler import Scheduler
@@ -66,6 +68,9 @@ class MPManager(LivingObject):
 	EXECUTIONDELAY = 4
 	HASHDELAY = 4
 	HASH_EVAL_DISTANCE = 2 # interval, check hash every nth tick
+	# debug option: exchange all checked values instead of the compact digest, so that a
+	# divergence can be tracked down to single values. All players have to set this.
+	DETAILED_CHECKUP_HASH = False
 
 	def __init__(self, session, networkinterface):
 		"""Initialize the Multiplayer Manager"""
@@ -113,12 +118,16 @@ class MPManager(LivingObject):
 		# in case of lags this code would be executed multiple times for the same tick)
 		if self._last_local_commands_send_tick < tick:
 			self._last_local_commands_send_tick = tick
+			# a packet is sent even without commands, the other players can't execute
+			# the tick without it (see horizons.network.packets.codec for why empty ticks
+			# aren't coalesced)
 			commandpacket = CommandPacket(self.calculate_execution_tick(tick), \
 					self.session.world.player.worldid, self.gamecommands)
 			self.gamecommands = []
 			self.commandsmanager.add_packet(commandpacket)
 			self.log.debug("sending command for tick %d" % (commandpacket.tick))
-			self.networkinterface.send_to_all_clients(commandpacket)
+			# all packets of this tick are sent in one message
+			outgoing_packets = [commandpacket]
 
 			self.localcommandsmanager.add_packet(CommandPacket(self.calculate_execution_tick(tick), \
 					self.session.world.player.worldid, self.localcommands))
@@ -126,13 +135,15 @@ class MPManager(LivingObject):
 
 			# check if we have to evaluate a hash value
 			if self.calculate_hash_tick(tick) % self.HASH_EVAL_DISTANCE == 0:
-				hash_value = self.session.world.get_checkup_hash()
+				hash_value = self.session.world.get_checkup_hash(detailed=self.DETAILED_CHECKUP_HASH)
 				#self.log.debug("MPManager: Checkup hash for tick %s is %s", tick, hash_value)
 				checkuphashpacket = CheckupHashPacket(self.calculate_hash_tick(tick), \
 			                              self.session.world.player.worldid, hash_value)
 				self.checkuphashmanager.add_packet(checkuphashpacket)
 				self.log.debug("sending checkuphash for tick %d" % (checkuphashpacket.tick))
-				self.networkinterface.send_to_all_clients(checkuphashpacket)
+				outgoing_packets.append(checkuphashpacket)
+
+			self.networkinterface.send_to_all_clients(outgoing_packets)
 
 		# decide if tick can be calculated
 		# in the first few ticks, no data is available
@@ -183,6 +194,15 @@ class MPManager(LivingObject):
 		self.log.error("MPManager: Hash diff:\n%s hash1: %s\n%s hash2: %s" % (player1, hash1, player2, hash2))
 		self.log.error("------------------")
 		self.log.error("Differences:")
+		if not isinstance(hash1, dict) or not isinstance(hash2, dict):
+			# compact digests, see World.get_checkup_hash
+			names = ('rngvalue', 'buildings', 'inventories', 'ships')
+			for name, value1, value2 in zip(names, hash1, hash2):
+				if value1 != value2:
+					self.log.error("%s: %s != %s", name, value1, value2)
+			self.log.error("Set MPManager.DETAILED_CHECKUP_HASH to compare single values.")
+			self.log.error("------------------")
+			return
 		if len(hash1) != len(hash2):
 			self.log.error("Different length")
 		items1 = sorted(hash1.iteritems())
@@ -212,6 +232,14 @@ class MPManager(LivingObject):
 	def get_player_count(self):
 		return len(self.session.world.players)
 
+	def get_network_statistics(self):
+		"""Returns statistics of the packet managers for network diagnostics
+		@see MPPacketmanager.get_statistics"""
+		return {
+			'commands': self.commandsmanager.get_statistics(),
+			'checkup_hashes': self.checkuphashmanager.get_statistics(),
+		}
+
 	def get_builds_in_construction(self):
 		commandpackets = self.commandsmanager.get_packets_from_player(self.session.world.player.worldid)
 		commandlist = []
@@ -231,31 +259,71 @@ class MPManager(LivingObject):
 ################################################
 
 class MPPacketmanager(object):
+	"""Stores packets by tick until they are executed.
+	Also keeps statistics for network diagnostics: the number of stored packets (backlog)
+	and how long ticks had to wait for the packets of other players."""
 	log =  logging.getLogger("mpmanager")
+	WAIT_HISTORY = 100 # number of wait times to keep
+
 	def __init__(self, mpmanager):
 		self.mpmanager = mpmanager
-		self.command_packet_list = []
+		self.packets = {} # {tick: [packets in order of arrival]}
+		self.players = {} # {tick: set of ids of players that sent packets}
+		self.backlog = 0 # number of stored packets
+		self.max_backlog = 0
+		self.wait_times = deque(maxlen=self.WAIT_HISTORY) # (tick, seconds waited)
+		self._waiting_since = None # (tick, time) of the tick that is waiting for packets
 
 	def is_tick_ready(self, tick):
 		"""Check if packets from all players have arrived (necessary for tick to begin)"""
-		ready = len(self.get_packets_for_tick(tick, remove_returned_commands=False)) == self.mpmanager.get_player_count()
+		ready = len(self.players.get(tick, ())) == self.mpmanager.get_player_count()
 		if not ready:
-			self.log.debug("tick not ready, packets: " + str(list(str(x) for x in self.get_packets_for_tick(tick, remove_returned_commands=False))))
+			self.log.debug("tick %s not ready, packets from players: %s", tick, sorted(self.players.get(tick, ())))
+			if self._waiting_since is None or self._waiting_since[0] != tick:
+				self._waiting_since = (tick, time.time())
+		elif self._waiting_since is not None and self._waiting_since[0] == tick:
+			wait_time = time.time() - self._waiting_since[1]
+			self.wait_times.append( (tick, wait_time) )
+			self._waiting_since = None
+			self.log.debug("waited %.3fs for packets of tick %s", wait_time, tick)
 		return ready
 
 	def get_packets_for_tick(self, tick, remove_returned_commands=True):
 		"""Returns packets that are to be executed at a certain tick"""
-		command_packets = filter(lambda x: x.tick==tick, self.command_packet_list)
-		if remove_returned_commands:
-			self.command_packet_list = filter(lambda x: x.tick!=tick, self.command_packet_list)
+		if not remove_returned_commands:
+			return list(self.packets.get(tick, []))
+		command_packets = self.packets.pop(tick, [])
+		self.players.pop(tick, None)
+		self.backlog -= len(command_packets)
 		return command_packets
 
 	def get_packets_from_player(self, player_id):
-		return filter(lambda x: x.player_id==player_id, self.command_packet_list)
+		return [ packet for tick in sorted(self.packets) for packet in self.packets[tick] \
+		         if packet.player_id == player_id ]
 
 	def add_packet(self, command_packet):
 		"""Receive a packet"""
-		self.command_packet_list.append(command_packet)
+		tick = command_packet.tick
+		if tick not in self.packets:
+			self.packets[tick] = []
+			self.players[tick] = set()
+		self.packets[tick].append(command_packet)
+		self.players[tick].add(command_packet.player_id)
+		self.backlog += 1
+		self.max_backlog = max(self.max_backlog, self.backlog)
+
+	def get_statistics(self):
+		"""Returns a dict of values for network diagnostics"""
+		wait_times = [wait_time for tick, wait_time in self.wait_times]
+		return {
+			'backlog': self.backlog,
+			'max_backlog': self.max_backlog,
+			'buffered_ticks': len(self.packets),
+			'waiting_tick': self._waiting_since[0] if self._waiting_since is not None else None,
+			'recent_waits': len(wait_times),
+			'mean_wait': sum(wait_times) / len(wait_times) if wait_times else 0.0,
+			'max_wait': max(wait_times) if wait_times else 0.0,
+		}
 
 class MPCommandsManager(MPPacketmanager):
 	pass
@@ -204,6 +204,15 @@ class Client(object):
 		if self.serverpeer is None:
 			raise network.NotConnected()
 		if self.mode is ClientMode.Game:
+			if isinstance(packet, list):
+				# packets of a tick, use the compact format if possible
+				try:
+					data = packets.codec.encode(packet)
+				except packets.codec.CodecError as e:
+					self.log.debug("Sending game data as pickle: %s" % (e))
+				else:
+					packets.packet._send(self.serverpeer, data, channelid)
+					return
 			packet = packets.client.game_data(packet)
 		packet.send(self.serverpeer, self.sid, channelid)
 
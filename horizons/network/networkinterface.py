@@ -211,7 +211,10 @@ class NetworkInterface(object):
 			callback(self.get_game())
 
 	def _cb_game_data(self, data):
-		self.received_packets.append(data)
+		if isinstance(data, list): # all packets of a tick
+			self.received_packets.extend(data)
+		else:
+			self.received_packets.append(data)
 
 	def register_error_callback(self, function, unique = True):
 		if unique and function in self.cbs_error:
@@ -238,6 +241,7 @@ class NetworkInterface(object):
 	def send_to_all_clients(self, packet):
 		"""
 		Sends packet to all players, that are part of the game
+		@param packet: packet or list of packets
 		"""
 		if self._client.isconnected():
 			try:
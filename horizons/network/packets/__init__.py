@@ -151,6 +151,9 @@ SafeUnpickler.add('common', cmd_fatalerror)
 #-------------------------------------------------------------------------------
 
 def unserialize(data, validate = False):
+	if PICKLE_RECIEVE_FROM == 'server' and codec.is_encoded(data):
+		# game data of a running multiplayer game, only clients decode that (the server just forwards it)
+		return horizons.network.packets.client.game_data(codec.decode(data))
 	mypacket = SafeUnpickler.loads(data)
 	if validate and not (hasattr(mypacket.validate, '__func__') and mypacket.validate.__func__ is packet.validate.__func__):
 		mypacket.validate()
@@ -160,4 +163,5 @@ def unserialize(data, validate = False):
 
 import horizons.network.packets.server
 import horizons.network.packets.client
+from horizons.network.packets import codec
 
@@ -0,0 +1,352 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Compact binary wire format for the packets that are sent every tick of a multiplayer game
+(CommandPacket and CheckupHashPacket of horizons.manager).
+
+A message contains all packets a player sends in one tick:
+
+  header:  'U', version byte, 2 byte fingerprint of the class table
+  varint number of packets
+  per packet: kind byte, zigzag varint tick difference to the previous packet,
+              varint player id, payload (list of commands or checkup hash value)
+
+Commands and their arguments are encoded as tagged values. Objects are only created
+for classes that are whitelisted for the network (see SafeUnpickler), they are referenced
+by their index in the sorted class table. The fingerprint makes sure that both sides
+use the same table.
+
+Messages that can't be encoded this way (e.g. containing objects that define
+__getstate__) are still sent as pickle, unserialize() handles both.
+
+Runs of empty ticks are not coalesced into one message. The game runs in lockstep: every
+player has to receive the packet of every other player for a tick before executing it
+(see MPManager.can_tick). In tick t, a player can only promise that it has no commands for
+tick t + MPManager.EXECUTIONDELAY, because later ticks depend on input it hasn't seen yet.
+Holding back empty ticks to send them at once would therefore stall all other players.
+Instead, an empty tick is kept as small as possible.
+"""
+
+import binascii
+import pkgutil
+import struct
+import sys
+
+MAGIC = 'U'
+VERSION = 1
+HEADER_LENGTH = 4
+
+MAX_DEPTH = 32 # nesting of decoded values, protects against malicious messages
+
+# value tags
+T_NONE, T_TRUE, T_FALSE, T_INT, T_FLOAT, T_STR, T_STR_REF, T_UNICODE, \
+  T_TUPLE, T_LIST, T_DICT, T_SET, T_OBJECT, T_UINT64 = range(14)
+# ints in [SMALL_INT_MIN, SMALL_INT_MAX] are stored in the tag byte itself
+T_SMALL_INT = 0x80
+SMALL_INT_MIN = -16
+SMALL_INT_MAX = 0xff - T_SMALL_INT + SMALL_INT_MIN
+
+# packet kinds
+K_COMMANDS, K_CHECKUP_HASH = range(2)
+
+_pack_float = struct.Struct('>d').pack
+_unpack_float = struct.Struct('>d').unpack_from
+_pack_uint64 = struct.Struct('>Q').pack
+_unpack_uint64 = struct.Struct('>Q').unpack_from
+
+
+class CodecError(Exception):
+	pass
+
+
+class _ClassTable(object):
+	"""Numbered list of the classes that may be sent over the network."""
+	def __init__(self):
+		from horizons.network.packets import PICKLE_SAFE
+		import horizons.manager
+		import horizons.command
+		# import all commands, so that the table doesn't depend on what has been used so far
+		for loader, name, ispkg in pkgutil.iter_modules(horizons.command.__path__):
+			__import__('horizons.command.' + name)
+
+		self.classes = []
+		for module in sorted(PICKLE_SAFE['server']):
+			for name in sorted(PICKLE_SAFE['server'][module]):
+				klass = getattr(sys.modules[module], name, None)
+				if isinstance(klass, type) and klass not in (set, frozenset):
+					self.classes.append(klass)
+		self.indices = dict( (klass, i) for i, klass in enumerate(self.classes) )
+		names = '\n'.join( klass.__module__ + '.' + klass.__name__ for klass in self.classes )
+		self.fingerprint = struct.pack('>H', binascii.crc32(names) & 0xffff)
+		self.header = MAGIC + chr(VERSION) + self.fingerprint
+
+		self.packet_classes = (horizons.manager.CommandPacket, horizons.manager.CheckupHashPacket)
+
+_class_table = None
+
+def _get_class_table():
+	global _class_table
+	if _class_table is None:
+		_class_table = _ClassTable()
+	return _class_table
+
+
+def _write_varint(out, value):
+	while value > 0x7f:
+		out.append(chr(0x80 | (value & 0x7f)))
+		value >>= 7
+	out.append(chr(value))
+
+def _write_signed(out, value):
+	_write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+
+class _Encoder(object):
+	def __init__(self, table):
+		self.table = table
+		self.out = [table.header]
+		self.strings = {} # {str: index in the order of first appearance}
+
+	def write_value(self, value):
+		out = self.out
+		t = type(value)
+		if t is int or t is long:
+			if SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+				out.append(chr(T_SMALL_INT + value - SMALL_INT_MIN))
+			elif 1 << 56 <= value < 1 << 64: # e.g. hash values, shorter than as varint
+				out.append(chr(T_UINT64))
+				out.append(_pack_uint64(value))
+			else:
+				out.append(chr(T_INT))
+				_write_signed(out, value)
+		elif value is None:
+			out.append(chr(T_NONE))
+		elif t is bool:
+			out.append(chr(T_TRUE if value else T_FALSE))
+		elif t is str:
+			self.write_str(value)
+		elif t is unicode:
+			data = value.encode('utf-8')
+			out.append(chr(T_UNICODE))
+			_write_varint(out, len(data))
+			out.append(data)
+		elif t is float:
+			out.append(chr(T_FLOAT))
+			out.append(_pack_float(value))
+		elif t is tuple or t is list or t is set:
+			out.append(chr(T_TUPLE if t is tuple else T_LIST if t is list else T_SET))
+			_write_varint(out, len(value))
+			# sort sets, so that the encoding doesn't depend on the hash seed
+			for item in (sorted(value) if t is set else value):
+				self.write_value(item)
+		elif t is dict:
+			out.append(chr(T_DICT))
+			self.write_items(value)
+		elif t in self.table.indices and hasattr(value, '__dict__') and not hasattr(value, '__getstate__'):
+			out.append(chr(T_OBJECT))
+			_write_varint(out, self.table.indices[t])
+			self.write_items(value.__dict__)
+		else:
+			raise CodecError("Can't encode %s" % t)
+
+	def write_str(self, value):
+		if value in self.strings:
+			self.out.append(chr(T_STR_REF))
+			_write_varint(self.out, self.strings[value])
+		else:
+			self.strings[value] = len(self.strings)
+			self.out.append(chr(T_STR))
+			_write_varint(self.out, len(value))
+			self.out.append(value)
+
+	def write_items(self, d):
+		_write_varint(self.out, len(d))
+		for key in sorted(d):
+			self.write_value(key)
+			self.write_value(d[key])
+
+	def write_packets(self, packets):
+		command_packet, checkup_hash_packet = self.table.packet_classes
+		out = self.out
+		_write_varint(out, len(packets))
+		last_tick = 0
+		for packet in packets:
+			if type(packet) is command_packet:
+				out.append(chr(K_COMMANDS))
+			elif type(packet) is checkup_hash_packet:
+				out.append(chr(K_CHECKUP_HASH))
+			else:
+				raise CodecError("Can't encode packet %s" % type(packet))
+			_write_signed(out, packet.tick - last_tick)
+			last_tick = packet.tick
+			_write_varint(out, packet.player_id)
+			if type(packet) is command_packet:
+				# empty ticks are the common case, they end up as a single byte here
+				_write_varint(out, len(packet.commandlist))
+				for command in packet.commandlist:
+					self.write_value(command)
+			else:
+				self.write_value(packet.checkup_hash)
+
+
+class _Decoder(object):
+	def __init__(self, table, data):
+		self.table = table
+		self.data = data
+		self.bytes = bytearray(data) # indexing yields ints
+		self.pos = HEADER_LENGTH
+		self.strings = []
+		self.depth = 0
+
+	def read_byte(self):
+		try:
+			byte = self.bytes[self.pos]
+		except IndexError:
+			raise CodecError("Message is truncated")
+		self.pos += 1
+		return byte
+
+	def read_varint(self):
+		data = self.bytes
+		pos = self.pos
+		value = 0
+		shift = 0
+		try:
+			byte = data[pos]
+			while byte > 0x7f:
+				value |= (byte & 0x7f) << shift
+				shift += 7
+				pos += 1
+				byte = data[pos]
+		except IndexError:
+			raise CodecError("Message is truncated")
+		self.pos = pos + 1
+		return value | (byte << shift)
+
+	def read_signed(self):
+		value = self.read_varint()
+		return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+	def read_bytes(self, length):
+		if self.pos + length > len(self.data):
+			raise CodecError("Message is truncated")
+		value = self.data[self.pos:self.pos + length]
+		self.pos += length
+		return value
+
+	def read_value(self):
+		tag = self.read_byte()
+		if tag >= T_SMALL_INT:
+			return tag - T_SMALL_INT + SMALL_INT_MIN
+		elif tag == T_INT:
+			return self.read_signed()
+		elif tag == T_NONE:
+			return None
+		elif tag == T_TRUE:
+			return True
+		elif tag == T_FALSE:
+			return False
+		elif tag == T_STR:
+			value = self.read_bytes(self.read_varint())
+			self.strings.append(value)
+			return value
+		elif tag == T_STR_REF:
+			index = self.read_varint()
+			if index >= len(self.strings):
+				raise CodecError("Invalid string reference")
+			return self.strings[index]
+		elif tag == T_UNICODE:
+			return self.read_bytes(self.read_varint()).decode('utf-8')
+		elif tag == T_FLOAT:
+			return _unpack_float(self.read_bytes(8))[0]
+		elif tag == T_UINT64:
+			return _unpack_uint64(self.read_bytes(8))[0]
+
+		self.depth += 1
+		if self.depth > MAX_DEPTH:
+			raise CodecError("Message is nested too deeply")
+		if tag == T_TUPLE:
+			value = tuple(self.read_value() for i in xrange(self.read_varint()))
+		elif tag == T_LIST:
+			value = [self.read_value() for i in xrange(self.read_varint())]
+		elif tag == T_SET:
+			value = set(self.read_value() for i in xrange(self.read_varint()))
+		elif tag == T_DICT:
+			value = self.read_items()
+		elif tag == T_OBJECT:
+			index = self.read_varint()
+			if index >= len(self.table.classes):
+				raise CodecError("Invalid class reference")
+			klass = self.table.classes[index]
+			# same as unpickling, __init__ isn't called
+			value = klass.__new__(klass)
+			value.__dict__.update(self.read_items())
+		else:
+			raise CodecError("Invalid tag %d" % tag)
+		self.depth -= 1
+		return value
+
+	def read_items(self):
+		return dict( (self.read_value(), self.read_value()) for i in xrange(self.read_varint()) )
+
+	def read_packets(self):
+		command_packet, checkup_hash_packet = self.table.packet_classes
+		packets = []
+		tick = 0
+		for i in xrange(self.read_varint()):
+			kind = self.read_byte()
+			tick += self.read_signed()
+			player_id = self.read_varint()
+			if kind == K_COMMANDS:
+				commands = [self.read_value() for j in xrange(self.read_varint())]
+				packets.append(command_packet(tick, player_id, commands))
+			elif kind == K_CHECKUP_HASH:
+				packets.append(checkup_hash_packet(tick, player_id, self.read_value()))
+			else:
+				raise CodecError("Invalid packet kind %d" % kind)
+		if self.pos != len(self.data):
+			raise CodecError("Trailing data in message")
+		return packets
+
+
+def is_encoded(data):
+	"""Returns whether data has been created by encode() (and not by pickle)."""
+	return data[:1] == MAGIC
+
+def encode(packets):
+	"""Encodes a list of CommandPackets and CheckupHashPackets.
+	@return: str
+	@throws CodecError: if some value can't be encoded"""
+	encoder = _Encoder(_get_class_table())
+	encoder.write_packets(packets)
+	return ''.join(encoder.out)
+
+def decode(data):
+	"""Decodes a message created by encode().
+	@return: list of packets
+	@throws CodecError: if the message is invalid or from a different version"""
+	table = _get_class_table()
+	if data[:HEADER_LENGTH] != table.header:
+		if data[1:2] != chr(VERSION):
+			raise CodecError("Unsupported codec version %r" % data[1:2])
+		raise CodecError("Message uses different network classes. Please check your game version")
+	return _Decoder(table, data).read_packets()
@@ -19,8 +19,11 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import itertools
 import logging
+import time
 import uuid
+from collections import defaultdict
 
 from horizons.network.common import *
 from horizons import network
@@ -31,10 +34,91 @@ enet = find_enet_module(client = False)
 MAX_PEERS = 4095
 CONNECTION_TIMEOUT = 500
 MINIMUM_PLAYERS = 2
+GAMESLIST_CACHE_SIZE = 1000 # number of different lobby list queries to keep
 
 logging.basicConfig(format = '[%(asctime)-15s] [%(levelname)s] %(message)s',
 		level = logging.DEBUG)
 
+class GameIndex(object):
+	"""All games of the server, indexed for the lookups of the lobby.
+	Games that can be joined (open and not full) are indexed by client version, map name
+	and number of maximum players. Call update() whenever a game has changed.
+	@param listener: called with the game whenever a game is added, changed or removed"""
+	def __init__(self, listener = None):
+		self.listener = listener
+		self._games = {} # uuid => game
+		self._order = {} # game => serial number, games are listed in order of creation
+		self._serial = itertools.count()
+		self._joinable = set()
+		self._by_version = defaultdict(set)
+		self._by_map = defaultdict(set)
+		self._by_maxplayers = defaultdict(set)
+
+	def __len__(self):
+		return len(self._games)
+
+	def __iter__(self):
+		return iter(sorted(self._games.itervalues(), key=self._order.__getitem__))
+
+	def add(self, game):
+		self._games[game.uuid] = game
+		self._order[game] = self._serial.next()
+		self.update(game)
+
+	def remove(self, game):
+		self._unindex(game)
+		del self._games[game.uuid]
+		del self._order[game]
+		if self.listener is not None:
+			self.listener(game)
+
+	def update(self, game):
+		"""Updates the index after the state, players or properties of game have changed."""
+		self._unindex(game)
+		if game.state is Game.State.Open and game.playercnt < game.maxplayers:
+			self._joinable.add(game)
+			self._by_version[game.clientversion].add(game)
+			self._by_map[game.mapname].add(game)
+			self._by_maxplayers[game.maxplayers].add(game)
+		if self.listener is not None:
+			self.listener(game)
+
+	def _unindex(self, game):
+		if game not in self._joinable:
+			return
+		self._joinable.remove(game)
+		for index, key in ((self._by_version, game.clientversion), (self._by_map, game.mapname),
+		                   (self._by_maxplayers, game.maxplayers)):
+			index[key].discard(game)
+			if not index[key]:
+				del index[key]
+
+	def get(self, uuid, clientversion):
+		"""Returns the game with the given uuid if it runs clientversion, else None"""
+		game = self._games.get(uuid)
+		if game is None or game.clientversion != clientversion:
+			return None
+		return game
+
+	def find_joinable(self, clientversion = -1, mapname = None, maxplayers = None):
+		"""Returns the games that can be joined, optionally filtered.
+		@param clientversion: -1 for any version"""
+		candidates = [self._joinable]
+		if clientversion != -1:
+			candidates.append(self._by_version.get(clientversion, ()))
+		if mapname:
+			candidates.append(self._by_map.get(mapname, ()))
+		if maxplayers:
+			candidates.append(self._by_maxplayers.get(maxplayers, ()))
+		candidates.sort(key=len)
+		games = [ game for game in candidates[0] if all(game in c for c in candidates[1:]) ]
+		games.sort(key=self._order.__getitem__)
+		return games
+
+	def count(self, state):
+		"""Returns the number of games in state (a Game.State value)"""
+		return sum(1 for game in self._games.itervalues() if game.state is state)
+
 class Server(object):
 	def __init__(self, hostname, port, statistic_file = None):
 		packets.SafeUnpickler.set_mode(client = False)
@@ -43,8 +127,8 @@ class Server(object):
 		self.port = port
 		self.statistic = {
 			'file': statistic_file,
-			'timestamp': 0,
-			'interval': 1 * 60 * 1000,
+			'timestamp': 0, # time of next write
+			'interval': 1 * 60,
 		}
 		self.callbacks = {
 			'onconnect':    [ self.onconnect ],
@@ -66,8 +150,9 @@ class Server(object):
 			'terminategame':  [ self.terminategame ],
 			'gamedata':       [ self.gamedata ],
 		}
-		self.games = [] # list of games
+		self.games = GameIndex(self.ongamechanged)
 		self.players = {} # sessionid => Player() dict
+		self.gameslist_cache = {} # serialized game lists by query
 		self.check_urandom()
 
 	def check_urandom(self):
@@ -103,27 +188,36 @@ class Server(object):
 			callback(*args)
 
 
-	def run(self):
+	def run(self, host = None):
+		"""Runs the server forever.
+		@param host: use this instead of listening on hostname:port (e.g. for load tests)"""
 		logging.info("Starting up server on %s:%d" % (self.hostname, self.port))
-		try:
-			self.host = enet.Host(enet.Address(self.hostname, self.port), MAX_PEERS, 0, 0, 0)
-		except (IOError, MemoryError):
-			# these exceptions do not provide any information.
-			raise network.NetworkException("Unable to create network structure. Maybe invalid or irresolvable server address:")
+		if host is not None:
+			self.host = host
+		else:
+			try:
+				self.host = enet.Host(enet.Address(self.hostname, self.port), MAX_PEERS, 0, 0, 0)
+			except (IOError, MemoryError):
+				# these exceptions do not provide any information.
+				raise network.NetworkException("Unable to create network structure. Maybe invalid or irresolvable server address:")
 
 		logging.debug("Entering the main loop...")
 		while True:
-			if self.statistic['file'] is not None:
-				if self.statistic['timestamp'] <= 0:
-					self.print_statistic(self.statistic['file'])
-					self.statistic['timestamp'] = self.statistic['interval']
-				else:
-					self.statistic['timestamp'] -= CONNECTION_TIMEOUT
+			self.service()
 
-			event = self.host.service(CONNECTION_TIMEOUT)
-			if event.type == enet.EVENT_TYPE_NONE:
-				continue
-			elif event.type == enet.EVENT_TYPE_CONNECT:
+
+	def service(self, timeout = CONNECTION_TIMEOUT):
+		"""One iteration of the main loop. Waits up to timeout ms for an event, then handles
+		all queued events and sends the answers in one go.
+		@return: number of handled events"""
+		if self.statistic['file'] is not None and self.statistic['timestamp'] <= time.time():
+			self.print_statistic(self.statistic['file'])
+			self.statistic['timestamp'] = time.time() + self.statistic['interval']
+
+		handled = 0
+		event = self.host.service(timeout)
+		while event is not None and event.type != enet.EVENT_TYPE_NONE:
+			if event.type == enet.EVENT_TYPE_CONNECT:
 				self.call_callbacks("onconnect", event)
 			elif event.type == enet.EVENT_TYPE_DISCONNECT:
 				self.call_callbacks("ondisconnect", event)
@@ -131,19 +225,23 @@ class Server(object):
 				self.call_callbacks("onreceive", event)
 			else:
 				logging.warning("Invalid packet (%u)" % (event.type))
+			handled += 1
+			event = self.host.check_events()
+		if handled:
+			self.host.flush()
+		return handled
 
 
 	def send(self, peer, packet, channelid = 0):
+		"""Queues packet, it's sent at the end of the current service() iteration"""
 		if self.host is None:
 			raise network.NotConnected("Server is not running")
 		packet.send(peer, None, channelid)
-		self.host.flush()
 
 	def _send(self, peer, data, channelid = 0):
 		if self.host is None:
 			raise network.NotConnected("Server is not running")
 		packets.packet._send(peer, data, channelid)
-		self.host.flush()
 
 
 	def disconnect(self, peer, later = True):
@@ -152,6 +250,8 @@ class Server(object):
 			if later:
 				peer.disconnect_later()
 			else:
+				# send queued packets (e.g. the error message) first
+				self.host.flush()
 				peer.disconnect()
 		except IOError:
 			peer.reset()
@@ -273,7 +373,7 @@ class Server(object):
 		player.name = unicode(packet.playername)
 		game = Game(packet, player)
 		logging.debug("[CREATE] [%s] %s created %s" % (game.uuid, player, game))
-		self.games.append(game)
+		self.games.add(game)
 		self.send(peer, packets.server.data_gamestate(game))
 
 		if game.playercnt == game.maxplayers:
@@ -285,20 +385,26 @@ class Server(object):
 
 	def onlistgames(self, peer, packet):
 		logging.debug("[LIST]")
-		gameslist = packets.server.data_gameslist()
-		for _game in self.games:
-			if _game.state is not Game.State.Open:
-				continue
-			if _game.maxplayers == len(_game.players):
-				continue
-			if packet.clientversion != -1 and packet.clientversion != _game.clientversion:
-				continue
-			if packet.mapname and packet.mapname != _game.mapname:
-				continue
-			if packet.maxplayers and packet.maxplayers != _game.maxplayers:
-				continue
-			gameslist.addgame(_game)
-		self.send(peer, gameslist)
+		query = (packet.clientversion, packet.mapname, packet.maxplayers)
+		data = self.gameslist_cache.get(query)
+		if data is None:
+			gameslist = packets.server.data_gameslist()
+			for _game in self.games.find_joinable(*query):
+				gameslist.addgame(_game)
+			data = gameslist.serialize()
+			if len(self.gameslist_cache) >= GAMESLIST_CACHE_SIZE:
+				self.gameslist_cache.clear()
+			self.gameslist_cache[query] = data
+		self._send(peer, data)
+
+	def ongamechanged(self, game):
+		"""Drops the cached game lists that might show game"""
+		for query in self.gameslist_cache.keys():
+			clientversion, mapname, maxplayers = query
+			if (clientversion == -1 or clientversion == game.clientversion) and \
+			   (not mapname or mapname == game.mapname) and \
+			   (not maxplayers or maxplayers == game.maxplayers):
+				del self.gameslist_cache[query]
 
 
 	def onjoingame(self, peer, packet):
@@ -316,14 +422,7 @@ class Server(object):
 			self.error(peer, "You can't join a game while in another game")
 			return
 
-		game = None
-		for _game in self.games:
-			if (packet.clientversion != _game.clientversion):
-				continue
-			if (packet.uuid != _game.uuid):
-				continue
-			game = _game
-			break
+		game = self.games.get(packet.uuid, packet.clientversion)
 		if game is None:
 			self.error(peer, "Unknown game or game is running a different version")
 			return
@@ -347,6 +446,7 @@ class Server(object):
 		logging.debug("[JOIN] [%s] %s joined %s" % (game.uuid, player, game))
 		player.name = packet.playername
 		game.add_player(player)
+		self.games.update(game)
 		for _player in game.players:
 			self.send(_player.peer, packets.server.data_gamestate(game))
 
@@ -370,6 +470,7 @@ class Server(object):
 			return
 		logging.debug("[LEAVE] [%s] %s left %s" % (game.uuid, player, game))
 		game.remove_player(player)
+		self.games.update(game)
 		for _player in game.players:
 			self.send(_player.peer, packets.server.data_gamestate(game))
 		if game.playercnt <= 0:
@@ -388,6 +489,7 @@ class Server(object):
 	def preparegame(self, game):
 		logging.debug("[PREPARE] [%s] Players: %s" % (game.uuid, [unicode(i) for i in game.players]))
 		game.state = Game.State.Prepare
+		self.games.update(game)
 		for _player in game.players:
 			self.send(_player.peer, packets.server.cmd_preparegame())
 
@@ -395,6 +497,7 @@ class Server(object):
 	def startgame(self, game):
 		logging.debug("[START] [%s] Players: %s" % (game.uuid, [unicode(i) for i in game.players]))
 		game.state = Game.State.Running
+		self.games.update(game)
 		for _player in game.players:
 			self.send(_player.peer, packets.server.cmd_startgame())
 
@@ -449,6 +552,7 @@ class Server(object):
 		player.name = packet.playername
 		if game.creator_sid == player.sid:
 			game.creator = player.name
+			self.games.update(game)
 		for _player in game.players:
 			self.send(_player.peer, packets.server.data_gamestate(game))
 
@@ -484,11 +588,7 @@ class Server(object):
 			fd = open(file, "w")
 
 			fd.write("Games.Total: %d\n" % (len(self.games)))
-			games_playing = 0
-			for game in self.games:
-				if game.state is Game.State.Running:
-					games_playing += 1
-			fd.write("Games.Playing: %d\n" % (games_playing))
+			fd.write("Games.Playing: %d\n" % (self.games.count(Game.State.Running)))
 
 			fd.write("Players.Total: %d\n" % (len(self.players)))
 			players_inlobby = 0
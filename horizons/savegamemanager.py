@@ -27,10 +27,13 @@ import os.path
 import glob
 import time
 import re
+import json
+import zlib
 import yaml
 
 from horizons.constants import PATHS, VERSION
 from horizons.util import DbReader, YamlCache
+from horizons.util.savegamecatalog import SavegameCatalog
 
 import horizons.main
 
@@ -78,10 +81,16 @@ class SavegameManager(object):
 
 	savegame_screenshot_width = 290
 
+	# size of the minimap that is stored in maps and savegames for the map preview of the
+	# map selection (see sp_free_maps.xml), so it doesn't have to load the map
+	minimap_preview_size = (130, 130)
+
 	# metadata of a savegame with default values
 	savegame_metadata = { 'timestamp' : -1,	'savecounter' : 0, 'savegamerev' : 0, 'rng_state' : "" }
 	savegame_metadata_types = { 'timestamp' : float, 'savecounter' : int, 'savegamerev': int, \
 	                            'rng_state' : str } # 'screenshot' : NoneType }
+	# metadata that is needed to list savegames, it is kept in the SavegameCatalog
+	savegame_catalog_keys = ('timestamp', 'savecounter', 'savegamerev')
 
 	campaign_status_file = os.path.join(savegame_dir, 'campaign_status.yaml')
 
@@ -105,9 +114,9 @@ class SavegameManager(object):
 
 		for f in files:
 			if f.startswith(cls.autosave_dir):
-				name = u"Autosave {date}".format(date=get_timestamp_string(cls.get_metadata(f)))
+				name = u"Autosave {date}".format(date=get_timestamp_string(cls.get_cached_metadata(f)))
 			elif f.startswith(cls.quicksave_dir):
-				name = u"Quicksave {date}".format(date=get_timestamp_string(cls.get_metadata(f)))
+				name = u"Quicksave {date}".format(date=get_timestamp_string(cls.get_cached_metadata(f)))
 			else:
 				name = os.path.splitext(os.path.basename(f))[0]
 
@@ -188,6 +197,7 @@ class SavegameManager(object):
 				files.sort()
 				for i in xrange(0, len(files) - limit):
 					os.unlink(files[i])
+					SavegameCatalog.remove(files[i])
 
 		if autosaves:
 			tmp_del("%s/*.%s" % (cls.autosave_dir, cls.savegame_extension),
@@ -232,10 +242,56 @@ class SavegameManager(object):
 		return metadata
 
 	@classmethod
-	def write_metadata(cls, db, savecounter, rng_state):
+	def get_minimap_data(cls, savegamefile, size):
+		"""Returns the minimap that has been stored by write_minimap_data.
+		Only this row is read, the map itself isn't loaded.
+		@param size: (width, height) of the minimap
+		@return: data for Minimap.draw_data or None if there is no minimap of this size"""
+		try:
+			result = DbReader(savegamefile)("SELECT value FROM metadata_blob WHERE name = ?",
+			                                cls.__get_minimap_blob_name(size))
+		except sqlite3.OperationalError: # old file without metadata_blob table
+			return None
+		if not result:
+			return None
+		return zlib.decompress(result[0][0])
+
+	@classmethod
+	def write_minimap_data(cls, db, world):
+		"""Stores the minimap of a world in the size of the map preview (see get_minimap_data).
+		@param db: DbReader or SaveSnapshot
+		@param world: World object or fake thereof, see MinimapRaster"""
+		from horizons.world.minimapraster import MinimapRaster # horizons.world imports this module
+		width, height = cls.minimap_preview_size
+		raster = MinimapRaster(world, width, height)
+		raster.calculate()
+		data = zlib.compress(json.dumps(raster.get_data()))
+		name = cls.__get_minimap_blob_name(cls.minimap_preview_size)
+		db("DELETE FROM metadata_blob WHERE name = ?", name)
+		db("INSERT INTO metadata_blob values(?, ?)", name, sqlite3.Binary(data))
+
+	@classmethod
+	def __get_minimap_blob_name(cls, size):
+		return "minimap_%dx%d" % size
+
+	@classmethod
+	def get_cached_metadata(cls, savegamefile):
+		"""Returns the metainfo of a savegame that is needed to list it (savegame_catalog_keys) as dict.
+		Only savegames that are new or have changed since they were listed last time are opened,
+		use get_metadata for everything else."""
+		metadata = SavegameCatalog.get(savegamefile)
+		if metadata is None:
+			full_metadata = cls.get_metadata(savegamefile)
+			metadata = dict( (key, full_metadata[key]) for key in cls.savegame_catalog_keys )
+			SavegameCatalog.put(savegamefile, metadata)
+		return metadata
+
+	@classmethod
+	def write_metadata(cls, db, savecounter, rng_state, world=None):
 		"""Writes metadata to db.
 		@param db: DbReader
-		@param savecounter: int"""
+		@param savecounter: int
+		@param world: if not None, a minimap of it is stored for the map preview"""
 		metadata = cls.savegame_metadata.copy()
 		metadata['timestamp'] = time.time()
 		metadata['savecounter'] = savecounter
@@ -273,6 +329,9 @@ class SavegameManager(object):
 		db("INSERT INTO metadata_blob values(?, ?)", "screen", sqlite3.Binary(screenshot_data))
 		os.unlink(screenshot_filename)
 
+		if world is not None:
+			cls.write_minimap_data(db, world)
+
 	@classmethod
 	def get_regular_saves(cls, include_displaynames = True):
 		"""Returns all savegames, that were saved via the ingame save dialog"""
@@ -19,7 +19,9 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+
 import logging
+import heapq
 
 from collections import deque
 
@@ -32,13 +34,13 @@ class Scheduler(LivingObject):
 	""""Class providing timed callbacks.
 	Master of time.
 
-	TODO:
-	- Refactor to use a data structure that is suitable for iteration (ticking) as well as
-	  searching/deleting by instance, possibly also by callback.
-	  Suggestion: { tick -> { instance -> [callback] }} (basically a k-d tree)
-
+	The pending callbacks are kept by an engine, which can be selected on creation
+	(see GAME.SCHEDULER_ENGINE and SCHEDULER_ENGINES). All engines execute callbacks in
+	exactly the same order: by tick, and in order of scheduling within a tick.
+	This is required for multiplayer games to stay in sync.
 
 	@param timer: Timer instance the schedular registers itself with.
+	@param engine: name of the engine used to store callbacks, defaults to GAME.SCHEDULER_ENGINE
 	"""
 	__metaclass__ = ManualConstructionSingleton
 
@@ -47,15 +49,20 @@ class Scheduler(LivingObject):
 	# the tick with this id is actually executed, and no tick with a smaller number can occur
 	FIRST_TICK_ID = 0
 
-	def __init__(self, timer):
+	# SchedulerProfiler that measures the callbacks of all schedulers, None if not profiling
+	profiler = None
+
+	def __init__(self, timer, engine=None):
 		"""
 		@param timer: Timer obj
+		@param engine: key of SCHEDULER_ENGINES
 		"""
 		super(Scheduler, self).__init__()
-		self.schedule = {}
+		self.engine = engine if engine is not None else GAME.SCHEDULER_ENGINE
+		self.schedule = SCHEDULER_ENGINES[self.engine]()
 		self.additional_cur_tick_schedule = [] # jobs to be executed at the same tick they were added
-		self.calls_by_instance = {} # for get_classinst_calls
 		self.cur_tick = self.__class__.FIRST_TICK_ID-1 # before ticking
+		self.in_tick = False # whether the callbacks of a tick are being executed right now
 		self.timer = timer
 		self.timer.add_call(self.tick)
 
@@ -77,39 +84,40 @@ class Scheduler(LivingObject):
 			horizons.main.quit()
 			return
 
-		if self.cur_tick in self.schedule:
-			self.log.debug("Scheduler: tick %s, cbs: %s", self.cur_tick, len(self.schedule[self.cur_tick]))
-
-			# use iteration method that works in case the list is altered during iteration
-			# this can happen for e.g. rem_all_classinst_calls
-			cur_schedule = self.schedule[self.cur_tick]
-			while cur_schedule:
-				callback = cur_schedule.popleft()
-				# TODO: some system-level unit tests fail if this list is not processed in the correct order
-				#       (i.e. if e.g. pop() was used here). This is an indication of invalid assumptions
-				#       in the program and should be fixed.
-
-				if hasattr(callback, "invalid"):
-					self.log.debug("S(t:%s): %s: INVALID", tick_id, callback)
-					continue
-				self.log.debug("S(t:%s): %s", tick_id, callback)
+		self.in_tick = True
+		profiler = self.profiler
+		if profiler is not None:
+			profiler.start_tick()
+
+		# the engine must support altering the schedule during iteration,
+		# this can happen for e.g. rem_all_classinst_calls
+		for callback in self.schedule.pop_tick(tick_id):
+			# TODO: some system-level unit tests fail if this list is not processed in the correct order
+			#       (i.e. if e.g. pop() was used here). This is an indication of invalid assumptions
+			#       in the program and should be fixed.
+
+			if hasattr(callback, "invalid"):
+				self.log.debug("S(t:%s): %s: INVALID", tick_id, callback)
+				continue
+			self.log.debug("S(t:%s): %s", tick_id, callback)
+			if profiler is None:
 				callback.callback()
-				assert callback.loops >= -1
-				if callback.loops != 0:
-					self.add_object(callback, readd=True)
-				else: # gone for good
-					if callback.class_instance in self.calls_by_instance:
-						# this can already be removed by e.g. rem_all_classinst_calls
-						try:
-							self.calls_by_instance[callback.class_instance].remove(callback)
-						except ValueError:
-							pass # also the callback can be deleted by e.g. rem_call
-			del self.schedule[self.cur_tick]
+			else:
+				profiler.run(callback)
+			assert callback.loops >= -1
+			if callback.loops != 0:
+				self.add_object(callback, readd=True)
+			else: # gone for good
+				self.schedule.finished(callback)
 
 		# run jobs added in the loop above
 		self._run_additional_jobs()
 
-		assert (len(self.schedule) == 0) or self.schedule.keys()[0] > self.cur_tick
+		if profiler is not None:
+			profiler.end_tick(tick_id)
+		self.in_tick = False
+
+		assert self.schedule.next_tick() is None or self.schedule.next_tick() > self.cur_tick
 
 	def before_ticking(self):
 		"""Called after game load and before game has started.
@@ -120,9 +128,13 @@ class Scheduler(LivingObject):
 		self._run_additional_jobs()
 
 	def _run_additional_jobs(self):
+		profiler = self.profiler
 		for callback in self.additional_cur_tick_schedule:
 			assert callback.loops == 0 # can't loop with no delay
-			callback.callback()
+			if profiler is None:
+				callback.callback()
+			else:
+				profiler.run(callback)
 		self.additional_cur_tick_schedule = []
 
 	def add_object(self, callback_obj, readd=False):
@@ -136,15 +148,8 @@ class Scheduler(LivingObject):
 			self.additional_cur_tick_schedule.append(callback_obj)
 		else: # default: run in future tick
 			interval = callback_obj.loop_interval if readd else callback_obj.run_in
-			tick_key = self.cur_tick + interval
-			if not tick_key in self.schedule:
-				self.schedule[tick_key] = deque()
-			callback_obj.tick = tick_key
-			self.schedule[tick_key].append(callback_obj)
-			if not readd:  # readded calls haven't been removed here
-				if not callback_obj.class_instance in self.calls_by_instance:
-					self.calls_by_instance[callback_obj.class_instance] = []
-				self.calls_by_instance[callback_obj.class_instance].append( callback_obj )
+			callback_obj.tick = self.cur_tick + interval
+			self.schedule.add(callback_obj, readd)
 
 	def add_new_object(self, callback, class_instance, run_in=1, loops=1, loop_interval=None):
 		"""Creates a new CallbackObject instance and calls the self.add_object() function.
@@ -161,32 +166,13 @@ class Scheduler(LivingObject):
 		@param callback_obj: CallbackObject to remove
 		@return: int, number of removed calls
 		"""
-		removed_objs = 0
-		if self.schedule is not None:
-			for key in self.schedule:
-				while callback_obj in self.schedule[key]:
-					self.schedule[key].remove(callback_obj)
-					self.calls_by_instance[callback_obj.class_instance].remove(callback_obj)
-					removed_objs += 1
-
-		if not self.calls_by_instance[callback_obj.class_instance]:
-			del self.calls_by_instance[callback_obj.class_instance]
-
-		return removed_objs
+		if self.schedule is None:
+			return 0
+		return self.schedule.remove_object(callback_obj)
 
 	def rem_all_classinst_calls(self, class_instance):
 		"""Removes all callbacks from the scheduler that belong to the class instance class_inst."""
-		"""
-		for key in self.schedule:
-			callback_objects = self.schedule[key]
-			for i in xrange(len(callback_objects) - 1, -1, -1):
-				if callback_objects[i].class_instance is class_instance:
-					del callback_objects[i]
-		"""
-		if class_instance in self.calls_by_instance:
-			for callback_obj in self.calls_by_instance[class_instance]:
-				callback_obj.invalid = True # don't remove, finding them all takes too long
-			del self.calls_by_instance[class_instance]
+		self.schedule.remove_instance(class_instance)
 
 		# filter additional callbacks as well
 		self.additional_cur_tick_schedule = \
@@ -199,30 +185,12 @@ class Scheduler(LivingObject):
 		@return: int, number of removed calls
 		"""
 		assert callable(callback)
-		removed_calls = 0
-		for key in self.schedule:
-			callback_objects = self.schedule[key]
-			for i in xrange(len(callback_objects) - 1, -1, -1):
-				if callback_objects[i].class_instance is instance and callback_objects[i].callback == callback and \
-				   not hasattr(callback_objects[i], "invalid"):
-					del callback_objects[i]
-					removed_calls += 1
-
-		test = 0
-		if removed_calls > 0: # there also must be calls in the calls_by_instance dict
-			for i in xrange(len(self.calls_by_instance[instance]) - 1, -1, -1):
-				obj = self.calls_by_instance[instance][i]
-				if obj.callback == callback:
-					del self.calls_by_instance[instance][i]
-					test += 1
-			assert test == removed_calls,  "%s, %s" % (test, removed_calls)
-			if not self.calls_by_instance[instance]:
-				del self.calls_by_instance[instance]
+		removed_calls = self.schedule.remove_call(instance, callback)
 
 		for i in xrange(len(self.additional_cur_tick_schedule) - 1, -1, -1):
 			if self.additional_cur_tick_schedule[i].class_instance is instance and \
 				self.additional_cur_tick_schedule[i].callback == callback:
-					del callback_objects[i]
+					del self.additional_cur_tick_schedule[i]
 					removed_calls += 1
 
 		return removed_calls
@@ -236,19 +204,9 @@ class Scheduler(LivingObject):
 		@return: dict, entries: { CallbackObject: remaining_ticks_to_executing }
 		"""
 		calls = {}
-		"""
-		for key in self.schedule:
-			for callback_obj in self.schedule[key]:
-				if callback_obj.class_instance is instance:
-					if callback is None:
-						calls[callback_obj] = key - self.cur_tick
-					elif callback_obj.callback == callback:
-						calls[callback_obj] = key - self.cur_tick
-		"""
-		if instance in self.calls_by_instance:
-			for callback_obj in self.calls_by_instance[instance]:
-				if  callback is None or callback_obj.callback == callback:
-					calls[callback_obj] = callback_obj.tick - self.cur_tick
+		for callback_obj in self.schedule.get_instance_calls(instance):
+			if  callback is None or callback_obj.callback == callback:
+				calls[callback_obj] = callback_obj.tick - self.cur_tick
 		return calls
 
 	def get_remaining_ticks(self, instance, callback, assert_present=True):
@@ -271,6 +229,223 @@ class Scheduler(LivingObject):
 		return self.timer.get_ticks(GAME.INGAME_TICK_INTERVAL)
 
 
+class _DictSchedule(object):
+	"""Stores callbacks in a dict { tick -> deque of callbacks }.
+	Removing callbacks requires to search the whole schedule.
+	"""
+	log = Scheduler.log
+
+	def __init__(self):
+		self.schedule = {}
+		self.calls_by_instance = {} # for get_classinst_calls
+
+	def __len__(self):
+		return len(self.schedule)
+
+	def next_tick(self):
+		# NOTE: this is not necessarily the smallest key
+		return self.schedule.keys()[0] if self.schedule else None
+
+	def add(self, callback_obj, readd):
+		tick_key = callback_obj.tick
+		if not tick_key in self.schedule:
+			self.schedule[tick_key] = deque()
+		self.schedule[tick_key].append(callback_obj)
+		if not readd:  # readded calls haven't been removed here
+			if not callback_obj.class_instance in self.calls_by_instance:
+				self.calls_by_instance[callback_obj.class_instance] = []
+			self.calls_by_instance[callback_obj.class_instance].append( callback_obj )
+
+	def pop_tick(self, tick):
+		"""Yields the callbacks of tick in order. The deque is consumed while iterating,
+		so that callbacks of this tick can be removed by the callbacks themselves."""
+		if tick not in self.schedule:
+			return
+		self.log.debug("Scheduler: tick %s, cbs: %s", tick, len(self.schedule[tick]))
+		cur_schedule = self.schedule[tick]
+		while cur_schedule:
+			yield cur_schedule.popleft()
+		del self.schedule[tick]
+
+	def finished(self, callback_obj):
+		if callback_obj.class_instance in self.calls_by_instance:
+			# this can already be removed by e.g. rem_all_classinst_calls
+			try:
+				self.calls_by_instance[callback_obj.class_instance].remove(callback_obj)
+			except ValueError:
+				pass # also the callback can be deleted by e.g. rem_call
+
+	def remove_object(self, callback_obj):
+		removed_objs = 0
+		for key in self.schedule:
+			while callback_obj in self.schedule[key]:
+				self.schedule[key].remove(callback_obj)
+				self.calls_by_instance[callback_obj.class_instance].remove(callback_obj)
+				removed_objs += 1
+
+		if not self.calls_by_instance[callback_obj.class_instance]:
+			del self.calls_by_instance[callback_obj.class_instance]
+
+		return removed_objs
+
+	def remove_instance(self, class_instance):
+		if class_instance in self.calls_by_instance:
+			for callback_obj in self.calls_by_instance[class_instance]:
+				callback_obj.invalid = True # don't remove, finding them all takes too long
+			del self.calls_by_instance[class_instance]
+
+	def remove_call(self, instance, callback):
+		removed_calls = 0
+		for key in self.schedule:
+			callback_objects = self.schedule[key]
+			for i in xrange(len(callback_objects) - 1, -1, -1):
+				if callback_objects[i].class_instance is instance and callback_objects[i].callback == callback and \
+				   not hasattr(callback_objects[i], "invalid"):
+					del callback_objects[i]
+					removed_calls += 1
+
+		test = 0
+		if removed_calls > 0: # there also must be calls in the calls_by_instance dict
+			for i in xrange(len(self.calls_by_instance[instance]) - 1, -1, -1):
+				obj = self.calls_by_instance[instance][i]
+				if obj.callback == callback:
+					del self.calls_by_instance[instance][i]
+					test += 1
+			assert test == removed_calls,  "%s, %s" % (test, removed_calls)
+			if not self.calls_by_instance[instance]:
+				del self.calls_by_instance[instance]
+		return removed_calls
+
+	def get_instance_calls(self, instance):
+		return self.calls_by_instance.get(instance, ())
+
+
+class _HeapSchedule(object):
+	"""Keeps a heap of the ticks that have callbacks, and a dict { tick -> deque of entries }.
+	Entries are appended in order of scheduling, so the order of execution is the same
+	as for _DictSchedule.
+
+	Removed callbacks are not deleted from their deque (which would require a search), their
+	entry is cancelled instead: An entry is a list [callback_obj], and cancelling sets it to
+	[None]. Cancelled entries are dropped when their tick is reached, or when there are a lot
+	of them (see _compact).
+	All pending calls are additionally indexed by instance.
+	"""
+	# drop cancelled entries when more than this fraction of the entries are cancelled
+	COMPACTION_RATIO = 0.5
+	COMPACTION_MIN_SIZE = 1024
+
+	def __init__(self):
+		self.ticks = [] # heap of keys of self.schedule
+		self.schedule = {}
+		self.calls_by_instance = {} # { instance: set of callback objects }
+		self.size = 0 # number of entries, including cancelled ones
+		self.cancelled = 0
+
+	def __len__(self):
+		return self.size - self.cancelled
+
+	def next_tick(self):
+		return self.ticks[0] if self.ticks else None
+
+	def add(self, callback_obj, readd):
+		entry = [callback_obj]
+		callback_obj.heap_entry = entry
+		try:
+			self.schedule[callback_obj.tick].append(entry)
+		except KeyError:
+			self.schedule[callback_obj.tick] = deque((entry, ))
+			heapq.heappush(self.ticks, callback_obj.tick)
+		self.size += 1
+		if not readd:  # readded calls are still indexed
+			try:
+				self.calls_by_instance[callback_obj.class_instance].add(callback_obj)
+			except KeyError:
+				self.calls_by_instance[callback_obj.class_instance] = set((callback_obj, ))
+
+	def pop_tick(self, tick):
+		if not self.ticks or self.ticks[0] != tick:
+			return
+		heapq.heappop(self.ticks)
+		cur_schedule = self.schedule[tick]
+		while cur_schedule:
+			callback_obj = cur_schedule.popleft()[0]
+			self.size -= 1
+			if callback_obj is None:
+				self.cancelled -= 1
+				continue
+			callback_obj.heap_entry = None
+			yield callback_obj
+		del self.schedule[tick]
+
+	def finished(self, callback_obj):
+		calls = self.calls_by_instance.get(callback_obj.class_instance)
+		if calls is not None: # this can already be removed by e.g. rem_all_classinst_calls
+			calls.discard(callback_obj)
+			if not calls:
+				del self.calls_by_instance[callback_obj.class_instance]
+
+	def _cancel(self, callback_obj):
+		"""Cancels the pending execution of callback_obj.
+		@return: whether callback_obj was pending"""
+		entry = getattr(callback_obj, "heap_entry", None)
+		if entry is None:
+			return False
+		entry[0] = None
+		callback_obj.heap_entry = None
+		self.cancelled += 1
+		return True
+
+	def _compact(self):
+		if self.size < self.COMPACTION_MIN_SIZE or self.cancelled <= self.size * self.COMPACTION_RATIO:
+			return
+		# filter the deques in place, pop_tick might be iterating over the one of the current tick
+		for entries in self.schedule.itervalues():
+			pending = [entry for entry in entries if entry[0] is not None]
+			entries.clear()
+			entries.extend(pending)
+		# keep the ticks of empty deques, pop_tick will remove them
+		self.size -= self.cancelled
+		self.cancelled = 0
+
+	def remove_object(self, callback_obj):
+		removed_objs = 1 if self._cancel(callback_obj) else 0
+		if removed_objs:
+			self.finished(callback_obj)
+			self._compact()
+		return removed_objs
+
+	def remove_instance(self, class_instance):
+		calls = self.calls_by_instance.pop(class_instance, None)
+		if calls is not None:
+			for callback_obj in calls:
+				callback_obj.invalid = True
+				self._cancel(callback_obj)
+			self._compact()
+
+	def remove_call(self, instance, callback):
+		calls = self.calls_by_instance.get(instance)
+		if calls is None:
+			return 0
+		removed = [ obj for obj in calls if obj.callback == callback and \
+		            not hasattr(obj, "invalid") and self._cancel(obj) ]
+		if removed:
+			calls.difference_update(removed)
+			if not calls:
+				del self.calls_by_instance[instance]
+			self._compact()
+		return len(removed)
+
+	def get_instance_calls(self, instance):
+		return self.calls_by_instance.get(instance, ())
+
+
+SCHEDULER_ENGINES = {
+  'dict': _DictSchedule,
+  'heap': _HeapSchedule,
+}
+
+
 class _CallbackObject(object):
 	"""Class used by the TimerManager Class to organize callbacks."""
 	def __init__(self, scheduler, callback, class_instance, run_in, loops, loop_interval):
@@ -0,0 +1,181 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import csv
+import functools
+import heapq
+import marshal
+import time
+
+from horizons.constants import GAME_SPEED
+from horizons.util.python.callback import Callback
+from horizons.util.python.weakmethod import WeakMethod
+
+
+class SchedulerProfiler(object):
+	"""Measures the callbacks that the Scheduler executes, see Scheduler.profiler.
+
+	The time of the callbacks is summed up per class of the instance and callback function.
+	The durations of whole ticks are counted in a histogram, and ticks that take longer than
+	a tick may take at normal game speed (the budget) are counted and the slowest of them kept.
+
+	The callbacks can be written as csv or in the format of the profile module, which can be
+	viewed with development/print_profile_output.py or pstats.
+	"""
+
+	# upper bounds of the buckets of the tick duration histogram in milliseconds
+	HISTOGRAM_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+	# number of ticks over budget that are kept, the slowest ones win
+	MAX_SLOW_TICKS = 100
+
+	def __init__(self, budget=None):
+		"""
+		@param budget: seconds a tick may take, defaults to the duration of a tick at normal speed
+		"""
+		self.budget = budget if budget is not None else 1.0 / GAME_SPEED.TICKS_PER_SECOND
+		self.callbacks = {} # {(class name, function): [calls, seconds, max seconds]}
+		self.histogram = [0] * (len(self.HISTOGRAM_BUCKETS) + 1) # the last one counts the longer ticks
+		self.ticks = 0
+		self.tick_time = 0.0
+		self.ticks_over_budget = 0
+		self.slow_ticks = [] # heap of (seconds, tick id, key of the slowest callback, its seconds)
+		self._tick_start = None
+		self._slowest = (None, 0.0) # slowest callback of the current tick
+
+	def start_tick(self):
+		self._tick_start = time.time()
+		self._slowest = (None, 0.0)
+
+	def end_tick(self, tick_id):
+		seconds = time.time() - self._tick_start
+		self.ticks += 1
+		self.tick_time += seconds
+		milliseconds = seconds * 1000
+		for i, bound in enumerate(self.HISTOGRAM_BUCKETS):
+			if milliseconds <= bound:
+				self.histogram[i] += 1
+				break
+		else:
+			self.histogram[-1] += 1
+
+		if seconds > self.budget:
+			self.ticks_over_budget += 1
+			entry = (seconds, tick_id) + self._slowest
+			if len(self.slow_ticks) < self.MAX_SLOW_TICKS:
+				heapq.heappush(self.slow_ticks, entry)
+			else:
+				heapq.heappushpop(self.slow_ticks, entry)
+
+	def run(self, callback_obj):
+		"""Executes the callback of a _CallbackObject and measures it."""
+		start = time.time()
+		callback_obj.callback()
+		seconds = time.time() - start
+
+		key = (callback_obj.class_instance.__class__.__name__, _get_function(callback_obj.callback))
+		stats = self.callbacks.get(key)
+		if stats is None:
+			stats = self.callbacks[key] = [0, 0.0, 0.0]
+		stats[0] += 1
+		stats[1] += seconds
+		if seconds > stats[2]:
+			stats[2] = seconds
+		if seconds > self._slowest[1]:
+			self._slowest = (key, seconds)
+
+	def get_histogram(self):
+		"""Returns list of (label, number of ticks) for the tick durations"""
+		labels = ['<= %d ms' % bound for bound in self.HISTOGRAM_BUCKETS]
+		labels.append('> %d ms' % self.HISTOGRAM_BUCKETS[-1])
+		return zip(labels, self.histogram)
+
+	def format_summary(self):
+		"""Returns the tick statistics and the slowest ticks as text"""
+		lines = ['%d ticks, %.3fs, %d over the budget of %.1f ms' %
+		         (self.ticks, self.tick_time, self.ticks_over_budget, self.budget * 1000)]
+		for label, count in self.get_histogram():
+			lines.append('%12s %8d' % (label, count))
+		if self.slow_ticks:
+			lines.append('')
+			lines.append('%8s %10s  %s' % ('tick', 'duration', 'slowest callback'))
+			for seconds, tick_id, key, callback_seconds in sorted(self.slow_ticks, reverse=True):
+				lines.append('%8d %8.1fms  %s (%.1f ms)' % (tick_id, seconds * 1000, _format_key(key), callback_seconds * 1000))
+		return '\n'.join(lines)
+
+	def write_csv(self, filename):
+		"""Writes the callbacks as csv, the slowest first"""
+		with open(filename, 'wb') as f:
+			writer = csv.writer(f)
+			writer.writerow(['class', 'callback', 'location', 'calls', 'total ms', 'mean ms', 'max ms'])
+			for (class_name, function), (calls, seconds, max_seconds) in \
+			    sorted(self.callbacks.iteritems(), key=lambda item: -item[1][1]):
+				filename, line = _get_location(function)
+				writer.writerow([class_name, _get_name(function), '%s:%d' % (filename, line), calls,
+				                 '%.3f' % (seconds * 1000), '%.4f' % (seconds * 1000 / calls), '%.3f' % (max_seconds * 1000)])
+
+	def write_stats(self, filename):
+		"""Writes the callbacks in the format of the profile module, see pstats.Stats"""
+		stats = {}
+		for (class_name, function), (calls, seconds, max_seconds) in self.callbacks.iteritems():
+			filename_, line = _get_location(function)
+			key = (filename_, line, '%s.%s' % (class_name, _get_name(function)))
+			# the same function can be executed for instances of different classes with the same name
+			old = stats.get(key, (0, 0, 0.0, 0.0, {}))
+			stats[key] = (old[0] + calls, old[1] + calls, old[2] + seconds, old[3] + seconds, {})
+		with open(filename, 'wb') as f:
+			marshal.dump(stats, f)
+
+	def write(self, filename):
+		"""Writes the callbacks as csv if filename ends with .csv, else for pstats."""
+		if filename.endswith('.csv'):
+			self.write_csv(filename)
+		else:
+			self.write_stats(filename)
+
+
+def _get_function(callback):
+	"""Returns the function that a callback executes in the end"""
+	while True:
+		if isinstance(callback, Callback):
+			callback = callback.callback
+		elif isinstance(callback, WeakMethod):
+			callback = callback.function
+		elif isinstance(callback, functools.partial):
+			callback = callback.func
+		else:
+			return getattr(callback, 'im_func', callback)
+
+def _get_name(function):
+	return getattr(function, '__name__', function.__class__.__name__)
+
+def _get_location(function):
+	"""Returns (filename, line) of the function or ('~', 0) for builtins"""
+	code = getattr(function, 'func_code', None)
+	if code is None:
+		return ('~', 0)
+	return (code.co_filename, code.co_firstlineno)
+
+def _format_key(key):
+	if key is None:
+		return '-'
+	class_name, function = key
+	return '%s.%s' % (class_name, _get_name(function))
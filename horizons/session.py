@@ -22,6 +22,8 @@
 import os
 import os.path
 import logging
+import shutil
+import threading
 import json
 import traceback
 import time
@@ -34,6 +36,8 @@ from horizons.gui.ingamegui import IngameGui
 from horizons.gui.mousetools import SelectionTool, PipetteTool, TearingTool, BuildingTool, AttackingTool
 from horizons.command.building import Tear
 from horizons.util.dbreader import DbReader
+from horizons.util.incrementalsave import IncrementalSaver, SaveSnapshot
+from horizons.util.phasetimer import PhaseTimer
 from horizons.command.unit import RemoveUnit
 from horizons.gui.keylisteners import IngameKeyListener
 from horizons.scheduler import Scheduler
@@ -42,7 +46,7 @@ from horizons.view import View
 from horizons.gui import Gui
 from horizons.world import World
 from horizons.entities import Entities
-from horizons.util import WorldObject, LivingObject, livingProperty, SavegameAccessor
+from horizons.util import WorldObject, LivingObject, livingProperty, SavegameAccessor, Callback
 from horizons.util.uhdbaccessor import read_savegame_template
 from horizons.util.lastactiveplayersettlementmanager import LastActivePlayerSettlementManager
 from horizons.world.component.namedcomponent import NamedComponent
@@ -92,6 +96,10 @@ class Session(LivingObject):
 
 	log = logging.getLogger('session')
 
+	# whether the world keeps its tiles in the compact maps of horizons.world.groundmap.
+	# tiles are created on access there, so this is only possible if they don't have to be drawn.
+	compact_ground_maps = False
+
 	def __init__(self, gui, db, rng_seed=None):
 		super(Session, self).__init__()
 		assert isinstance(db, horizons.util.uhdbaccessor.UhDbAccessor)
@@ -100,6 +108,12 @@ class Session(LivingObject):
 		self.db = db # main db for game data (game.sql)
 		# this saves how often the current game has been saved
 		self.savecounter = 0
+		# remembers the last savegame, so the next one can be saved incrementally
+		self.incremental_saver = IncrementalSaver()
+		# (thread, callback, [success]) of the savegame that is being written in the background
+		self._background_save = None
+		# seconds the game was blocked by the last save and how long writing the savegame took
+		self.save_stall_time = self.save_write_time = None
 		self.is_alive = True
 
 		self._clear_caches()
@@ -111,7 +125,7 @@ class Session(LivingObject):
 		self.timer = self.create_timer()
 		Scheduler.create_instance(self.timer)
 		self.manager = self.create_manager()
-		self.view = View(self)
+		self.view = self.create_view()
 		Entities.load(self.db)
 		self.scenario_eventhandler = ScenarioEventHandler(self) # dummy handler with no events
 		self.campaign = {}
@@ -136,6 +150,8 @@ class Session(LivingObject):
 		"""Actually starts the game."""
 		self.timer.activate()
 		self.reset_autosave()
+		if PhaseTimer.enabled:
+			Scheduler().add_new_object(Callback(PhaseTimer.mark, "first tick"), self, run_in=0)
 
 	def reset_autosave(self):
 		"""(Re-)Set up autosave. Called if autosave interval has been changed."""
@@ -160,6 +176,10 @@ class Session(LivingObject):
 		"""Returns a Timer instance."""
 		raise NotImplementedError
 
+	def create_view(self):
+		"""Returns a View instance."""
+		return View(self)
+
 	def _clear_caches(self):
 		"""Clear all data caches in global namespace related to a session"""
 		WorldObject.reset()
@@ -169,6 +189,7 @@ class Session(LivingObject):
 
 	def end(self):
 		self.log.debug("Ending session")
+		self.wait_for_background_save()
 		self.is_alive = False
 
 		self.gui.session = None
@@ -259,6 +280,7 @@ class Session(LivingObject):
 	def save(self, savegame=None):
 		raise NotImplementedError
 
+	@PhaseTimer.timed("load session")
 	def load(self, savegame, players, trader_enabled, pirate_enabled,
 	         natural_resource_multiplier, is_scenario=False, campaign=None,
 	         force_player_id=None, disasters_enabled=True):
@@ -283,7 +305,8 @@ class Session(LivingObject):
 		self.campaign = {} if not campaign else campaign
 
 		self.log.debug("Session: Loading from %s", savegame)
-		savegame_db = SavegameAccessor(savegame) # Initialize new dbreader
+		with PhaseTimer.phase("open savegame"):
+			savegame_db = SavegameAccessor(savegame) # Initialize new dbreader
 		savegame_data = SavegameManager.get_metadata(savegame)
 
 		# load how often the game has been saved (used to know the difference between
@@ -302,25 +325,29 @@ class Session(LivingObject):
 			# changing the rng is safe for mp, as all players have to have the same map
 			self.random.setstate( rng_state_tuple )
 
-		self.world = World(self) # Load horizons.world module (check horizons/world/__init__.py)
-		self.world._init(savegame_db, force_player_id, disasters_enabled=disasters_enabled)
+		with PhaseTimer.phase("load world"):
+			self.world = World(self) # Load horizons.world module (check horizons/world/__init__.py)
+			self.world._init(savegame_db, force_player_id, disasters_enabled=disasters_enabled)
 		self.view.load(savegame_db) # load view
 		if not self.is_game_loaded():
-			# NOTE: this must be sorted before iteration, cause there is no defined order for
-			#       iterating a dict, and it must happen in the same order for mp games.
-			for i in sorted(players, lambda p1, p2: cmp(p1['id'], p2['id'])):
-				self.world.setup_player(i['id'], i['name'], i['color'], i['local'], i['ai'], i['difficulty'])
-			self.world.set_forced_player(force_player_id)
-			center = self.world.init_new_world(trader_enabled, pirate_enabled, natural_resource_multiplier)
+			with PhaseTimer.phase("init new world"):
+				# NOTE: this must be sorted before iteration, cause there is no defined order for
+				#       iterating a dict, and it must happen in the same order for mp games.
+				for i in sorted(players, lambda p1, p2: cmp(p1['id'], p2['id'])):
+					self.world.setup_player(i['id'], i['name'], i['color'], i['local'], i['ai'], i['difficulty'])
+				self.world.set_forced_player(force_player_id)
+				center = self.world.init_new_world(trader_enabled, pirate_enabled, natural_resource_multiplier)
 			self.view.center(center[0], center[1])
 		else:
 			# try to load scenario data
 			self.scenario_eventhandler.load(savegame_db)
 		self.manager.load(savegame_db) # load the manager (there might me old scheduled ticks).
-		self.world.init_fish_indexer() # now the fish should exist
+		with PhaseTimer.phase("init fish indexer"):
+			self.world.init_fish_indexer() # now the fish should exist
 		if self.is_game_loaded():
 			LastActivePlayerSettlementManager().load(savegame_db) # before ingamegui
-		self.ingame_gui.load(savegame_db) # load the old gui positions and stuff
+		with PhaseTimer.phase("load gui"):
+			self.ingame_gui.load(savegame_db) # load the old gui positions and stuff
 
 		for instance_id in savegame_db("SELECT id FROM selected WHERE `group` IS NULL"): # Set old selected instance
 			obj = WorldObject.get_object_by_id(instance_id[0])
@@ -337,8 +364,10 @@ class Session(LivingObject):
 		# Open menus later, they may need unit data not yet inited
 		self.cursor.apply_select()
 
-		Scheduler().before_ticking()
+		with PhaseTimer.phase("run scheduled jobs"):
+			Scheduler().before_ticking()
 		savegame_db.close()
+		PhaseTimer.mark("session loaded")
 
 		assert hasattr(self.world, "player"), 'Error: there is no human player'
 		"""
@@ -485,18 +514,91 @@ class Session(LivingObject):
 			os.makedirs(maps_folder)
 		self.world.save_map(maps_folder, prefix)
 
-	def _do_save(self, savegame):
+	def _do_save(self, savegame, incremental=False, callback=None):
 		"""Actual save code.
-		@param savegame: absolute path"""
+		The game state is recorded in a SaveSnapshot first, the savegame is written from it afterwards.
+		@param savegame: absolute path
+		@param incremental: whether to only write what changed since the last save into a
+		                    copy of it, if possible (see horizons.util.incrementalsave)
+		@param callback: if not None, the savegame is written in another thread while the
+		                 game continues, callback(success) is called when it's done
+		@return: bool, whether no error happened (or the snapshot could be taken if callback is given)"""
 		assert os.path.isabs(savegame)
+		# the snapshot of a background save has to be the consistent state between two ticks,
+		# saves during a tick (e.g. by the multiplayer SaveCommand) have to be written right away
+		assert callback is None or not Scheduler().in_tick, "background saves can't be started during a tick"
 		self.log.debug("Session: Saving to %s", savegame)
+		start = time.time()
+		self.wait_for_background_save() # it's still using the incremental saver
+
+		self.savecounter += 1
+		try:
+			snapshot = self._create_save_snapshot()
+		except:
+			print "Save Exception"
+			traceback.print_exc()
+			return False
+
+		if callback is None:
+			success = self._write_savegame(savegame, snapshot, incremental)
+			self.save_stall_time = self.save_write_time = time.time() - start
+			return success
+
+		results = []
+		def write():
+			write_start = time.time()
+			results.append(self._write_savegame(savegame, snapshot, incremental, background=True))
+			self.save_write_time = time.time() - write_start
+		thread = threading.Thread(target=write, name="savegame writer")
+		self._background_save = (thread, callback, results)
+		thread.start()
+		ExtScheduler().add_new_object(self._check_background_save, self, 0.1, -1)
+		self.save_stall_time = time.time() - start
+		return True
+
+	def _create_save_snapshot(self):
+		"""Records everything that is saved. The snapshot only contains plain values, so the
+		game can continue afterwards. Snapshots for background saves (autosaves, triggered by
+		the ExtScheduler) are never taken during a tick, so they are the consistent state between
+		two ticks (see _do_save). Other saves can happen during a tick, e.g. the multiplayer
+		SaveCommand, but they are written before the game continues.
+		@return: SaveSnapshot"""
+		snapshot = SaveSnapshot()
+		self.world.save(snapshot)
+		#self.manager.save(snapshot)
+		self.view.save(snapshot)
+		self.ingame_gui.save(snapshot)
+		self.scenario_eventhandler.save(snapshot)
+		LastActivePlayerSettlementManager().save(snapshot)
+
+		for instance in self.selected_instances:
+			snapshot("INSERT INTO selected(`group`, id) VALUES(NULL, ?)", instance.worldid)
+		for group in xrange(len(self.selection_groups)):
+			for instance in self.selection_groups[group]:
+				snapshot("INSERT INTO selected(`group`, id) VALUES(?, ?)", group, instance.worldid)
+
+		rng_state = json.dumps( self.random.getstate() )
+		SavegameManager.write_metadata(snapshot, self.savecounter, rng_state, self.world)
+		return snapshot
+
+	def _write_savegame(self, savegame, snapshot, incremental, background=False):
+		"""Writes a snapshot to a savegame file.
+		@param background: whether this runs in another thread, the user can't be asked anything then
+		@return: bool, whether no error happened"""
+		base_savegame = self.incremental_saver.get_base_savegame() if incremental else None
+		if base_savegame == savegame:
+			base_savegame = None # would be deleted below
 		try:
 			if os.path.exists(savegame):
 				os.unlink(savegame)
-			self.savecounter += 1
 
+			if base_savegame is not None and not self._copy_base_savegame(base_savegame, savegame):
+				base_savegame = None # write a full savegame instead
 			db = DbReader(savegame)
 		except IOError as e: # usually invalid filename
+			if background:
+				traceback.print_exc()
+				return False
 			headline = _("Failed to create savegame file")
 			descr = _("There has been an error while creating your savegame file.")
 			advice = _("This usually means that the savegame name contains unsupported special characters.")
@@ -506,6 +608,9 @@ class Session(LivingObject):
 		except ZeroDivisionError as err:
 			# TODO:
 			# this should say WindowsError, but that somehow now leads to a NameError
+			if background:
+				traceback.print_exc()
+				return False
 			if err.winerror == 5:
 				self.gui.show_error_popup(_("Access is denied"), \
 				                          _("The savegame file is probably read-only."))
@@ -517,31 +622,50 @@ class Session(LivingObject):
 			raise
 
 		try:
-			read_savegame_template(db)
+			if base_savegame is None:
+				read_savegame_template(db)
 
 			db("BEGIN")
-			self.world.save(db)
-			#self.manager.save(db)
-			self.view.save(db)
-			self.ingame_gui.save(db)
-			self.scenario_eventhandler.save(db)
-			LastActivePlayerSettlementManager().save(db)
-
-			for instance in self.selected_instances:
-				db("INSERT INTO selected(`group`, id) VALUES(NULL, ?)", instance.worldid)
-			for group in xrange(len(self.selection_groups)):
-				for instance in self.selection_groups[group]:
-					db("INSERT INTO selected(`group`, id) VALUES(?, ?)", group, instance.worldid)
-
-			rng_state = json.dumps( self.random.getstate() )
-			SavegameManager.write_metadata(db, self.savecounter, rng_state)
+			self.incremental_saver.write(db, snapshot, base_savegame is not None)
 			# make sure everything get's written now
 			db("COMMIT")
 			db.close()
+			self.incremental_saver.finish(savegame)
 			return True
 		except:
 			print "Save Exception"
 			traceback.print_exc()
+			self.incremental_saver.reset()
 			db.close() # close db before delete
 			os.unlink(savegame) # remove invalid savegamefile
 			return False
+
+	def _copy_base_savegame(self, base_savegame, savegame):
+		"""Copies the last savegame to savegame, so it can be updated incrementally.
+		@return: bool, whether it could be copied"""
+		try:
+			shutil.copyfile(base_savegame, savegame)
+			return True
+		except (IOError, OSError) as e: # e.g. the base savegame has been deleted or the disk is full
+			self.log.warning("Session: failed to copy %s, saving completely: %s", base_savegame, e)
+			if os.path.exists(savegame):
+				os.unlink(savegame) # incomplete copy
+			return False
+
+	def _check_background_save(self):
+		"""Called regularly while a savegame is written in another thread."""
+		if not self._background_save[0].is_alive():
+			self.wait_for_background_save()
+
+	def wait_for_background_save(self):
+		"""Waits until the savegame that is written in another thread is done and calls its callback."""
+		if self._background_save is None:
+			return
+		thread, callback, results = self._background_save
+		thread.join()
+		self._background_save = None
+		ExtScheduler().rem_call(self, self._check_background_save)
+		success = bool(results) and results[0]
+		self.log.debug("Session: background save done after %.3fs, the game was stalled for %.3fs",
+		               self.save_write_time, self.save_stall_time)
+		callback(success)
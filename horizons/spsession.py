@@ -47,9 +47,11 @@ class SPSession(Session):
 		self.start()
 
 	def autosave(self):
-		"""Called automatically in an interval"""
+		"""Called automatically in an interval, the savegame is written in the background"""
 		self.log.debug("Session: autosaving")
-		success = self._do_save(SavegameManager.create_autosave_filename())
+		self._do_save(SavegameManager.create_autosave_filename(), callback=self._autosaved)
+
+	def _autosaved(self, success):
 		if success:
 			SavegameManager.delete_dispensable_savegames(autosaves = True)
 			self.ingame_gui.message_widget.add(None, None, 'AUTOSAVE')
@@ -0,0 +1,260 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Savegame snapshots and incremental savegames.
+
+The save code doesn't write to the savegame directly, but to a SaveSnapshot, which only
+records the sql statements. The snapshot is plain data, so the savegame can be written from
+it later, e.g. in another thread while the game continues (see Session._do_save).
+
+Instead of writing the whole world again, a copy of the previous savegame can be updated
+with the rows of the objects that have changed since then. The rows that every building,
+ship and ground unit wrote last time are remembered by their rowids. Only objects whose
+statements differ from the last save are written (their old rows are deleted first).
+Everything that isn't saved per object (players, settlements, diplomacy, ...) is written
+again completely. Every few saves a full save compacts the file again.
+
+The objects to save incrementally are passed to save_world_objects() by the save code.
+
+NOTE: Incremental saves aren't used by the game yet. The whole world is still serialized
+for every save and only compared afterwards. Many objects save tick values relative to the
+current tick, so most of them differ on every save anyway, and incremental saves aren't
+faster than full ones. They are only worth enabling once clean objects can skip serializing.
+"""
+
+import os
+import re
+from collections import defaultdict
+
+from horizons.util.python import decorators
+
+
+def save_world_objects(db, objects):
+	"""Saves objects to db. Use this in save() methods for collections of many objects
+	that are saved independently of each other (e.g. buildings), so they can be saved incrementally.
+	@param db: DbReader or SaveSnapshot
+	@param objects: iterable of WorldObjects"""
+	if isinstance(db, SaveSnapshot):
+		db.save_objects(objects)
+	else:
+		for obj in objects:
+			obj.save(db)
+
+
+_insert_regexp = re.compile(r'\s*INSERT\s+INTO\s+`?(\w+)', re.IGNORECASE)
+
+@decorators.cachedfunction
+def _get_table(command):
+	"""Returns the table that the sql command inserts into or None if it isn't an INSERT"""
+	match = _insert_regexp.match(command)
+	return match.group(1) if match else None
+
+
+class SaveSnapshot(object):
+	"""Takes the place of the savegame DbReader while saving, see Session._do_save.
+	Records the statements in the order they are executed, the statements of objects that
+	are saved with save_world_objects() are grouped by object.
+	"""
+
+	def __init__(self):
+		# (command, args) or (None, [(worldid, [(command, args), ...]), ...]) for objects
+		self.entries = []
+		self._statements = None # statements of the object that is being saved
+
+	def __call__(self, command, *args):
+		"""Same as DbReader.__call__, but nothing can be selected."""
+		if self._statements is not None:
+			self._statements.append((command, args))
+		else:
+			self.entries.append((command, args))
+		return []
+
+	def save_objects(self, objects):
+		if self._statements is not None: # part of an object that is being saved
+			for obj in objects:
+				obj.save(self)
+			return
+
+		group = []
+		for obj in objects:
+			self._statements = []
+			try:
+				obj.save(self)
+			finally:
+				statements = self._statements
+				self._statements = None
+			group.append((obj.worldid, statements))
+		self.entries.append((None, group))
+
+
+class SaveWriter(object):
+	"""Writes a SaveSnapshot to a savegame, see IncrementalSaver.write()."""
+
+	def __init__(self, db, ignored_tables, objects=None, global_rowids=None):
+		"""
+		@param db: DbReader of the savegame
+		@param ignored_tables: tables whose rows don't make an object count as changed
+		@param objects: {worldid: (statements, rowids)} of the savegame that db is a copy of, None for a full save
+		@param global_rowids: {table: [rowid]} of rows of that savegame that don't belong to an object
+		"""
+		self.db = db
+		self.ignored_tables = ignored_tables
+		self.incremental = objects is not None
+		self.old_objects = objects or {}
+		# the state of the new savegame, see __init__ parameters
+		self.objects = {}
+		self.global_rowids = defaultdict(list)
+		self.written_objects = 0
+		if global_rowids:
+			for table, rowids in global_rowids.iteritems():
+				self._delete_rows(table, rowids)
+
+	def write(self, snapshot):
+		db = self.db
+		for command, args in snapshot.entries:
+			if command is None:
+				self._write_objects(args)
+				continue
+			db(command, *args)
+			table = _get_table(command)
+			if table is not None:
+				self.global_rowids[table].append(db.cur.lastrowid)
+
+		# delete the rows of objects that haven't been saved this time, i.e. don't exist any more
+		for worldid, (statements, rowids) in self.old_objects.iteritems():
+			if worldid not in self.objects:
+				for table, table_rowids in rowids.iteritems():
+					self._delete_rows(table, table_rowids)
+
+	def _write_objects(self, group):
+		changed = [] # (worldid, statements, rowids in the old savegame or None)
+		for worldid, statements in group:
+			old = self.old_objects.get(worldid)
+			if old is not None and self._equal(old[0], statements):
+				self.objects[worldid] = old
+			else:
+				changed.append((worldid, statements, old[1] if old is not None else None))
+
+		# delete all old rows first, the new ones might have the same rowids
+		old_rowids = defaultdict(list)
+		for worldid, statements, rowids in changed:
+			if rowids is not None:
+				for table, table_rowids in rowids.iteritems():
+					old_rowids[table].extend(table_rowids)
+		for table, rowids in old_rowids.iteritems():
+			self._delete_rows(table, rowids)
+
+		for worldid, statements, rowids in changed:
+			self.objects[worldid] = (statements, self._execute(statements))
+		self.written_objects += len(changed)
+
+	def _equal(self, old_statements, statements):
+		if old_statements == statements:
+			return True
+		ignored = self.ignored_tables
+		return [s for s in old_statements if _get_table(s[0]) not in ignored] == \
+		       [s for s in statements if _get_table(s[0]) not in ignored]
+
+	def _execute(self, statements):
+		"""Executes statements of an object.
+		@return: {table: [rowid]} of the inserted rows"""
+		rowids = defaultdict(list)
+		db = self.db
+		for command, args in statements:
+			db(command, *args)
+			table = _get_table(command)
+			if table is not None:
+				rowids[table].append(db.cur.lastrowid)
+		return dict(rowids)
+
+	def _delete_rows(self, table, rowids):
+		self.db.execute_many("DELETE FROM %s WHERE rowid = ?" % table, ((rowid, ) for rowid in rowids))
+
+
+class IncrementalSaver(object):
+	"""Keeps track of what was written to the last savegame of a session, so the next
+	one can be saved incrementally.
+
+	Usage (see Session._do_save):
+	  base = saver.get_base_savegame()
+	  # copy base to the new savegame if it isn't None, else create an empty one
+	  saver.write(db, snapshot, base is not None)
+	  # commit
+	  saver.finish(path of the new savegame) # or reset() on errors
+	"""
+
+	# every n-th save is a full save, so deleted rows don't accumulate in the savegame file
+	FULL_SAVE_INTERVAL = 10
+
+	# the action runtime of concrete objects changes all the time, but it is only cosmetic:
+	# keeping the one of an older save just makes the animation start at a different frame
+	IGNORED_TABLES = frozenset(['concrete_object'])
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		"""Forgets the last savegame, the next save will be a full one."""
+		self._savegame = None # (path, mtime, size) of the last savegame
+		self._objects = None
+		self._global_rowids = None
+		self._writer = None
+		self.incremental_saves = 0 # since the last full save
+		# statistics of the last save: objects saved with save_world_objects() and how many of them were written
+		self.saved_objects = self.written_objects = 0
+
+	def get_base_savegame(self):
+		"""Returns the path of the last savegame if the next save can be based on it, else None."""
+		if self._savegame is None or self.incremental_saves + 1 >= self.FULL_SAVE_INTERVAL:
+			return None
+		path, mtime, size = self._savegame
+		try:
+			stat = os.stat(path)
+		except OSError: # deleted
+			return None
+		if (stat.st_mtime, stat.st_size) != (mtime, size): # changed by someone else
+			return None
+		return path
+
+	def write(self, db, snapshot, incremental):
+		"""Writes a snapshot to a savegame, the caller has to commit.
+		@param db: DbReader of the new savegame, a copy of get_base_savegame() if incremental
+		@param snapshot: SaveSnapshot
+		@param incremental: whether to save incrementally"""
+		if incremental:
+			self._writer = SaveWriter(db, self.IGNORED_TABLES, self._objects, self._global_rowids)
+		else:
+			self._writer = SaveWriter(db, self.IGNORED_TABLES)
+		self._writer.write(snapshot)
+
+	def finish(self, savegame):
+		"""Called after everything has been saved and committed.
+		@param savegame: path of the new savegame"""
+		writer = self._writer
+		stat = os.stat(savegame)
+		self._savegame = (savegame, stat.st_mtime, stat.st_size)
+		self._objects = writer.objects
+		self._global_rowids = dict(writer.global_rowids)
+		self._writer = None
+		self.incremental_saves = self.incremental_saves + 1 if writer.incremental else 0
+		self.saved_objects = len(writer.objects)
+		self.written_objects = writer.written_objects
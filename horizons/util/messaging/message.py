@@ -101,3 +101,13 @@ class HoverInstancesChanged(Message):
 class NewDisaster(Message):
 	"""Sent when a building is affected by a disaster."""
 	arguments = ('building', 'disaster_class', )
+
+class IslandBuildingsChanged(Message):
+	"""Sent by an island when a building is built on it or removed from it.
+	Not sent while loading."""
+	arguments = ('building', )
+
+class PickupReservationFreed(Message):
+	"""Sent by a building when a collector that was on the way to pick up resources
+	there canceled its job, so other collectors can pick them up now."""
+	pass
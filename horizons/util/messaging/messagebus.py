@@ -60,12 +60,13 @@ class MessageBus(object):
 	def broadcast(self, message):
 		"""Send a message to the bus and broadcast it to all recipients"""
 		messagetype = message.__class__
-		for callback in self.global_receivers[messagetype]:
+		# iterate over copies, receivers may unsubscribe in their callbacks
+		for callback in self.global_receivers[messagetype][:]:
 			# Execute the callback
 			callback(message)
 
 		pair = (messagetype, message.sender)
-		for callback in self.local_receivers[pair]:
+		for callback in self.local_receivers[pair][:]:
 			# Execute the callback
 			callback(message)
 
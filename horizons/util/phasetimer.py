@@ -0,0 +1,165 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Timing of the phases of starting the game and loading sessions, see --startup-report.
+
+Phases are nested by starting them inside each other:
+
+  with PhaseTimer.phase("session load"):
+    with PhaseTimer.phase("world"):
+      ...
+
+Phases that are started in threads other than the main thread (e.g. preloading) become
+top-level phases, named after the thread. Milestones like showing the main menu or the
+first tick are recorded with mark(), as time since the start of the program.
+
+Nothing is recorded unless enable() has been called, so the phases can stay in the code.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+class Phase(object):
+	def __init__(self, name, start):
+		self.name = name
+		self.start = start
+		self.duration = None # still running
+		self.children = []
+
+	def to_dict(self, origin):
+		return {
+		  'name': self.name,
+		  'start': round(self.start - origin, 4),
+		  'duration': round(self.duration, 4) if self.duration is not None else None,
+		  'children': [child.to_dict(origin) for child in self.children],
+		}
+
+	def format(self, origin, depth=0):
+		"""Returns the lines of the tree of this phase"""
+		duration = '%8.3fs' % self.duration if self.duration is not None else '%9s' % 'running'
+		lines = ['%8.3fs %s  %s%s' % (self.start - origin, duration, '  ' * depth, self.name)]
+		for child in self.children:
+			lines.extend(child.format(origin, depth + 1))
+		return lines
+
+
+class PhaseTimer(object):
+	"""Records the durations of nested phases of the program."""
+
+	enabled = False
+	start_time = None # time.time() at the start of the program
+	phases = [] # top-level Phases
+	milestones = [] # (name, seconds since start)
+	_local = threading.local() # .stack: Phases that are running in the current thread
+
+	@classmethod
+	def enable(cls, start_time=None):
+		"""Starts recording.
+		@param start_time: time.time() at the start of the program, defaults to now"""
+		cls.enabled = True
+		cls.start_time = start_time if start_time is not None else time.time()
+		cls.phases = []
+		cls.milestones = []
+		cls._local = threading.local()
+
+	@classmethod
+	def disable(cls):
+		cls.enabled = False
+
+	@classmethod
+	@contextmanager
+	def phase(cls, name):
+		"""Context manager that records the phase name while it is active."""
+		if not cls.enabled:
+			yield
+			return
+		stack = getattr(cls._local, 'stack', None)
+		if stack is None:
+			stack = cls._local.stack = []
+		phase = Phase(name, time.time())
+		if stack:
+			stack[-1].children.append(phase)
+		else:
+			thread = threading.current_thread()
+			if not isinstance(thread, threading._MainThread):
+				phase.name = '%s [%s]' % (name, thread.name)
+			cls.phases.append(phase)
+		stack.append(phase)
+		try:
+			yield
+		finally:
+			phase.duration = time.time() - phase.start
+			stack.pop()
+
+	@classmethod
+	def timed(cls, name):
+		"""Decorator that records every call of the function as phase name."""
+		def decorator(func):
+			@wraps(func)
+			def wrapper(*args, **kwargs):
+				with cls.phase(name):
+					return func(*args, **kwargs)
+			return wrapper
+		return decorator
+
+	@classmethod
+	def mark(cls, name):
+		"""Records that the milestone name has been reached now."""
+		if cls.enabled:
+			cls.milestones.append((name, time.time() - cls.start_time))
+
+	@classmethod
+	def get_report(cls):
+		"""Returns the recorded phases and milestones as dict, the times are in seconds since the start"""
+		return {
+		  'phases': [phase.to_dict(cls.start_time) for phase in cls.phases],
+		  'milestones': [{'name': name, 'time': round(seconds, 4)} for name, seconds in cls.milestones],
+		}
+
+	@classmethod
+	def format_report(cls):
+		"""Returns the recorded phases and milestones as a tree"""
+		lines = ['%9s %9s  %s' % ('start', 'duration', 'phase')]
+		for phase in cls.phases:
+			lines.extend(phase.format(cls.start_time))
+		lines.append('')
+		lines.append('%9s  %s' % ('time', 'milestone'))
+		for name, seconds in cls.milestones:
+			lines.append('%8.3fs  %s' % (seconds, name))
+		return '\n'.join(lines)
+
+	@classmethod
+	def write_report(cls, filename):
+		"""Writes the report to filename: as json if it ends with .json, else as tree. - is stdout."""
+		if filename.endswith('.json'):
+			report = json.dumps(cls.get_report(), indent=1)
+		else:
+			report = cls.format_report()
+		if filename == '-':
+			print report
+		else:
+			with open(filename, 'w') as f:
+				f.write(report + '\n')
@@ -29,6 +29,7 @@ import copy
 
 from horizons.util import Circle, Rect, Point, DbReader
 from horizons.util.uhdbaccessor import read_savegame_template
+from horizons.util.randomislandcache import RandomIslandCache
 from horizons.constants import GROUND
 
 # this is how a random island id looks like (used for creation)
@@ -44,10 +45,31 @@ def is_random_island_id_string(id_string):
 
 def create_random_island(id_string):
 	"""Creates a random island as sqlite db.
+	Islands are only generated once per id string, afterwards their tiles are read from
+	the RandomIslandCache.
+	@param id_string: random island id string
+	@return: sqlite db reader containing island
+	"""
+	ground = RandomIslandCache.get(id_string)
+	if ground is None:
+		ground = _generate_random_island_ground(id_string)
+		RandomIslandCache.put(id_string, ground)
+
+	# write values to db
+	map_db = DbReader(":memory:")
+	map_db("CREATE TABLE ground(x INTEGER NOT NULL, y INTEGER NOT NULL, ground_id INTEGER NOT NULL, action_id TEXT NOT NULL, rotation INTEGER NOT NULL)")
+	map_db("CREATE TABLE island_properties(name TEXT PRIMARY KEY NOT NULL, value TEXT NOT NULL)")
+	map_db("BEGIN TRANSACTION")
+	map_db.execute_many("INSERT INTO ground VALUES(?, ?, ?, ?, ?)", ground)
+	map_db("COMMIT")
+	return map_db
+
+def _generate_random_island_ground(id_string):
+	"""Generates the tiles of a random island.
 	It is rather primitive; it places shapes on the dict.
 	The coordinates of tiles will be 0 <= x < width and 0 <= y < height
 	@param id_string: random island id string
-	@return: sqlite db reader containing island
+	@return: list of ground rows (x, y, ground_id, action_id, rotation)
 	"""
 	# NOTE: the tilesystem will be redone soon, so constants indicating grounds are temporary
 	# here and will have to be changed anyways.
@@ -115,15 +137,12 @@ def create_random_island(id_string):
 				elif shape_coord in map_set:
 					map_set.discard(shape_coord)
 
-	# write values to db
-	map_db = DbReader(":memory:")
-	map_db("CREATE TABLE ground(x INTEGER NOT NULL, y INTEGER NOT NULL, ground_id INTEGER NOT NULL, action_id TEXT NOT NULL, rotation INTEGER NOT NULL)")
-	map_db("CREATE TABLE island_properties(name TEXT PRIMARY KEY NOT NULL, value TEXT NOT NULL)")
-	map_db("BEGIN TRANSACTION")
+	# rows of the ground table, in the order they have always been inserted
+	ground = []
 
 	# add grass tiles
 	for x, y in map_set:
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?)", x, y, *GROUND.DEFAULT_LAND)
+		ground.append((x, y) + GROUND.DEFAULT_LAND)
 
 	def fill_tiny_spaces(tile):
 		"""Fills 1 tile gulfs and straits with the specified tile
@@ -211,7 +230,7 @@ def create_random_island(id_string):
 			if to_fill:
 				for x, y in to_fill:
 					map_set.add((x, y))
-					map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?)", x, y, *tile)
+					ground.append((x, y) + tile)
 
 				old_size = len(edge_set)
 				edge_set = edge_set.difference(to_ignore).union(to_fill)
@@ -294,7 +313,7 @@ def create_random_island(id_string):
 				tile = GROUND.SAND_SOUTHEAST3
 
 		assert tile
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?)", x, y, *tile)
+		ground.append((x, y) + tile)
 	map_set = map_set.union(outline)
 
 	# add sand to shallow water tiles
@@ -348,7 +367,7 @@ def create_random_island(id_string):
 				tile = GROUND.COAST_SOUTHEAST3
 
 		assert tile
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?)", x, y, *tile)
+		ground.append((x, y) + tile)
 	map_set = map_set.union(outline)
 
 	# add shallow water to deep water tiles
@@ -402,10 +421,9 @@ def create_random_island(id_string):
 				tile = GROUND.DEEP_WATER_SOUTHEAST3
 
 		assert tile
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?)", x, y, *tile)
+		ground.append((x, y) + tile)
 
-	map_db("COMMIT")
-	return map_db
+	return ground
 
 def _simplify_seed(seed):
 	"""Return the simplified seed value. The goal of this is to make it easier for users to convey the seeds orally."""
@@ -0,0 +1,80 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import marshal
+import sqlite3
+import zlib
+
+from horizons.constants import PATHS
+from horizons.util.sqlitecache import SqliteCache
+
+
+class RandomIslandCache(SqliteCache):
+	"""Stores the generated tiles of random islands on disk, keyed by their id string.
+	The id string determines the island completely, so every island only has to be
+	generated once (see horizons.util.random_map.create_random_island).
+	"""
+	cache_filename = PATHS.RANDOM_ISLAND_CACHE_FILE
+	name = "random island cache"
+
+	# increase this when the island generation changes, the cached islands are discarded then
+	VERSION = 1
+
+	# number of islands that are kept, the least recently stored ones are deleted first
+	MAX_ISLANDS = 1000
+
+	@classmethod
+	def get(cls, id_string):
+		"""Returns the ground rows of the island with id_string or None if it isn't cached.
+		@return: list of tuples (x, y, ground_id, action_id, rotation) or None"""
+		if not cls._open():
+			return None
+		try:
+			data = cls.db("SELECT ground FROM island WHERE id = ? AND version = ?", id_string, cls.VERSION)
+			if not data:
+				return None
+			return marshal.loads(zlib.decompress(data[0][0]))
+		except (sqlite3.Error, zlib.error, ValueError, EOFError, TypeError) as e:
+			cls._handle_error(e)
+			return None
+
+	@classmethod
+	def put(cls, id_string, ground):
+		"""Stores the ground rows of the island with id_string.
+		@param ground: list of tuples (x, y, ground_id, action_id, rotation)"""
+		if not cls._open():
+			return
+		data = buffer(zlib.compress(marshal.dumps(ground)))
+		try:
+			cls.db("BEGIN TRANSACTION")
+			cls.db("INSERT OR REPLACE INTO island(id, version, ground) VALUES(?, ?, ?)", id_string, cls.VERSION, data)
+			cls.db("DELETE FROM island WHERE rowid <= (SELECT MAX(rowid) FROM island) - ?", cls.MAX_ISLANDS)
+			cls.db("COMMIT")
+		except sqlite3.Error as e:
+			cls._handle_error(e)
+
+	@classmethod
+	def _init_db(cls):
+		cls.db("CREATE TABLE IF NOT EXISTS island(id TEXT PRIMARY KEY NOT NULL, version INTEGER NOT NULL, ground BLOB NOT NULL)")
+
+	@classmethod
+	def _clear(cls):
+		cls.db("DELETE FROM island")
@@ -20,7 +20,10 @@
 # ###################################################
 
 import hashlib
+import logging
 import os.path
+import re
+import time
 from collections import defaultdict, deque
 
 from horizons.util.savegameupgrader import SavegameUpgrader
@@ -32,12 +35,18 @@ class SavegameAccessor(DbReader):
 	SavegameAccessor is the class used for loading saved games.
 
 	Frequent select queries are preloaded for faster access.
+	The queries are counted per table, the report is logged when the accessor is closed
+	(use --debug-module=util.savegameaccessor).
 	"""
 
+	log = logging.getLogger("util.savegameaccessor")
+
 	def __init__(self, dbfile):
 		self.upgrader = SavegameUpgrader(dbfile)
 		dbfile = self.upgrader.get_path()
+		self.query_stats = {} # {table: [queries, rows, seconds]}
 		super(SavegameAccessor, self).__init__(dbfile=dbfile)
+		self._tables = set(name for (name, ) in self("SELECT name FROM sqlite_master WHERE type = 'table'"))
 		self._load_building()
 		self._load_settlement()
 		self._load_concrete_object()
@@ -52,12 +61,45 @@ class SavegameAccessor(DbReader):
 		self._load_component()
 		self._load_storage_global_limit()
 		self._load_health()
+		self._load_collector()
+		self._load_settler()
+		self._load_remaining_ticks_of_month()
+		self._load_name()
+		self._load_ship_route()
+		self._load_ai_single_resource_manager()
 		self._hash = None
 
+	def __call__(self, command, *args):
+		start = time.time()
+		result = super(SavegameAccessor, self).__call__(command, *args)
+		stats = self.query_stats.setdefault(_get_query_table(command), [0, 0, 0.0])
+		stats[0] += 1
+		stats[1] += len(result)
+		stats[2] += time.time() - start
+		return result
+
 	def close(self):
+		if self.log.isEnabledFor(logging.DEBUG):
+			for line in self.get_query_report():
+				self.log.debug(line)
 		super(SavegameAccessor, self).close()
 		self.upgrader.close()
 
+	def get_query_report(self):
+		"""Returns the query statistics per table as list of lines, the slowest tables first"""
+		lines = ['%-45s %8s %8s %9s' % ('table', 'queries', 'rows', 'time')]
+		for table, (queries, rows, seconds) in sorted(self.query_stats.iteritems(), key=lambda item: -item[1][2]):
+			lines.append('%-45s %8d %8d %8.3fs' % (table, queries, rows, seconds))
+		total = [sum(stats[i] for stats in self.query_stats.itervalues()) for i in xrange(3)]
+		lines.append('%-45s %8d %8d %8.3fs' % ('total', total[0], total[1], total[2]))
+		return lines
+
+	def _select_all(self, table, columns):
+		"""Returns all rows of a table that is only contained in savegames, not in maps"""
+		if table not in self._tables:
+			return []
+		return self("SELECT %s FROM %s" % (columns, table))
+
 
 	def _load_building(self):
 		self._building = {}
@@ -175,12 +217,16 @@ class SavegameAccessor(DbReader):
 
 	def _load_unit(self):
 		self._unit = {}
-		for row in self("SELECT rowid, owner FROM unit"):
-			self._unit[int(row[0])] = int(row[1])
+		for row in self("SELECT rowid, x, y, owner FROM unit"):
+			self._unit[int(row[0])] = (row[1], row[2], int(row[3]))
 
-	def get_unit_owner(self, worldid):
+	def get_unit_row(self, worldid):
+		"""Returns (x, y, owner)"""
 		return self._unit[int(worldid)]
 
+	def get_unit_owner(self, worldid):
+		return self._unit[int(worldid)][2]
+
 
 	def _load_building_collector(self):
 		self._building_collector = {}
@@ -253,6 +299,78 @@ class SavegameAccessor(DbReader):
 	def get_health(self, owner):
 		return self._health[owner]
 
+
+	def _load_collector(self):
+		self._collector = {}
+		for row in self._select_all("collector", "rowid, state, remaining_ticks, start_hidden"):
+			self._collector[int(row[0])] = row[1:]
+
+		self._collector_job = {}
+		for row in self("SELECT rowid, object, resource, amount FROM collector_job"):
+			self._collector_job[int(row[0])] = row[1:]
+
+	def get_collector_row(self, worldid):
+		"""Returns (state, remaining_ticks, start_hidden)"""
+		return self._collector[int(worldid)]
+
+	def get_collector_job(self, worldid):
+		"""Returns (object, resource, amount) of the collector's job or None if it has none"""
+		return self._collector_job.get(int(worldid))
+
+
+	def _load_settler(self):
+		self._settler = {}
+		for row in self("SELECT rowid, inhabitants, last_tax_payed FROM settler"):
+			self._settler[int(row[0])] = row[1:]
+
+	def get_settler_row(self, worldid):
+		"""Returns (inhabitants, last_tax_payed)"""
+		return self._settler[int(worldid)]
+
+
+	def _load_remaining_ticks_of_month(self):
+		self._remaining_ticks_of_month = {}
+		for row in self._select_all("remaining_ticks_of_month", "rowid, ticks"):
+			self._remaining_ticks_of_month[int(row[0])] = row[1]
+
+	def get_remaining_ticks_of_month(self, worldid):
+		"""Returns the ticks until the object pays its running costs or None if they aren't saved"""
+		return self._remaining_ticks_of_month.get(int(worldid))
+
+
+	def _load_name(self):
+		self._name = {}
+		for row in self("SELECT rowid, name FROM name"):
+			self._name[int(row[0])] = row[1]
+
+	def get_name(self, worldid):
+		return self._name[int(worldid)]
+
+
+	def _load_ship_route(self):
+		self._ship_route = set(int(row[0]) for row in self._select_all("ship_route", "ship_id"))
+
+	def has_ship_route(self, worldid):
+		return int(worldid) in self._ship_route
+
+
+	def _load_ai_single_resource_manager(self):
+		self._ai_single_resource_manager = {}
+		for row in self._select_all("ai_single_resource_manager", "rowid, resource_id, building_id, low_priority, available, total"):
+			self._ai_single_resource_manager[int(row[0])] = row[1:]
+
+		self._ai_single_resource_manager_quota = defaultdict(list)
+		for row in self._select_all("ai_single_resource_manager_quota", "single_resource_manager, identifier, quota, priority"):
+			self._ai_single_resource_manager_quota[int(row[0])].append(row[1:])
+
+	def get_ai_single_resource_manager_row(self, worldid):
+		"""Returns (resource_id, building_id, low_priority, available, total)"""
+		return self._ai_single_resource_manager[int(worldid)]
+
+	def get_ai_single_resource_manager_quotas(self, worldid):
+		"""Returns list of (identifier, quota, priority)"""
+		return self._ai_single_resource_manager_quota.get(int(worldid), [])
+
 	# Random savegamefile related utility that i didn't know where to put
 
 	@classmethod
@@ -271,4 +389,13 @@ class SavegameAccessor(DbReader):
 		fd.close();
 		return filehash
 
+
+_table_regexp = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+`?(\w+)', re.IGNORECASE)
+
+@decorators.cachedfunction
+def _get_query_table(command):
+	"""Returns the (first) table that the sql command uses"""
+	match = _table_regexp.search(command)
+	return match.group(1) if match else 'other'
+
 decorators.bind_all(SavegameAccessor)
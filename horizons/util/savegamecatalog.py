@@ -0,0 +1,134 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import json
+import os
+import sqlite3
+import sys
+
+from horizons.constants import PATHS
+from horizons.util.sqlitecache import SqliteCache
+
+
+class SavegameCatalog(SqliteCache):
+	"""Stores the metadata of savegames on disk, so the savegames don't have to be opened
+	every time they are listed (see SavegameManager.get_cached_metadata).
+
+	An entry is valid as long as the modification time and size of the savegame file are
+	the same as when it was stored. All entries are read at once when the catalog is used
+	first, entries of files that don't exist any more are removed then.
+	"""
+	cache_filename = PATHS.SAVEGAME_CATALOG_FILE
+	name = "savegame catalog"
+
+	# increase this when the stored metadata changes, the catalog is discarded then
+	VERSION = 1
+
+	entries = None # {path: (mtime, size, metadata)}
+
+	@classmethod
+	def get(cls, path):
+		"""Returns the stored metadata of the savegame at path.
+		@return: dict or None if it isn't stored or the file has changed since then"""
+		if not cls._open():
+			return None
+		entry = cls.entries.get(cls._get_key(path))
+		if entry is None:
+			return None
+		try:
+			stat = os.stat(path)
+		except OSError: # deleted
+			return None
+		if (stat.st_mtime, stat.st_size) != entry[:2]:
+			return None
+		return entry[2].copy()
+
+	@classmethod
+	def put(cls, path, metadata):
+		"""Stores the metadata of the savegame at path.
+		@param metadata: dict of values that can be converted to json"""
+		if not cls._open():
+			return
+		try:
+			stat = os.stat(path)
+		except OSError: # deleted meanwhile
+			return
+		key = cls._get_key(path)
+		cls.entries[key] = (stat.st_mtime, stat.st_size, metadata.copy())
+		try:
+			cls.db("INSERT OR REPLACE INTO savegame(path, version, mtime, size, metadata) VALUES(?, ?, ?, ?, ?)",
+			       key, cls.VERSION, stat.st_mtime, stat.st_size, json.dumps(metadata))
+		except sqlite3.Error as e:
+			cls._handle_error(e)
+
+	@classmethod
+	def remove(cls, path):
+		"""Removes the entry of a savegame, e.g. after it has been deleted."""
+		key = cls._get_key(path)
+		if not cls._open() or key not in cls.entries:
+			return
+		del cls.entries[key]
+		try:
+			cls.db("DELETE FROM savegame WHERE path = ?", key)
+		except sqlite3.Error as e:
+			cls._handle_error(e)
+
+	@classmethod
+	def _get_key(cls, path):
+		"""Paths can be str or unicode (e.g. from glob), the entries are keyed by unicode paths"""
+		if isinstance(path, unicode):
+			return path
+		return path.decode(sys.getfilesystemencoding() or 'utf-8', 'replace')
+
+	@classmethod
+	def _init_db(cls):
+		cls.db("CREATE TABLE IF NOT EXISTS savegame(path TEXT PRIMARY KEY NOT NULL, version INTEGER NOT NULL, " +
+		       "mtime REAL NOT NULL, size INTEGER NOT NULL, metadata TEXT NOT NULL)")
+		cls._read_entries()
+
+	@classmethod
+	def _read_entries(cls):
+		cls.entries = {}
+		rows = cls.db("SELECT path, mtime, size, metadata FROM savegame WHERE version = ?", cls.VERSION)
+		missing = []
+		for path, mtime, size, metadata in rows:
+			path = path.decode('utf-8') # the DbReader returns str
+			if not os.path.exists(path):
+				missing.append(path)
+				continue
+			try:
+				cls.entries[path] = (mtime, size, json.loads(metadata))
+			except ValueError:
+				missing.append(path) # broken entry, the savegame is read again
+		cls.db("BEGIN TRANSACTION")
+		cls.db("DELETE FROM savegame WHERE version != ?", cls.VERSION)
+		cls.db.execute_many("DELETE FROM savegame WHERE path = ?", ((path, ) for path in missing))
+		cls.db("COMMIT")
+
+	@classmethod
+	def _clear(cls):
+		cls.entries = {}
+		cls.db("DELETE FROM savegame")
+
+	@classmethod
+	def close(cls):
+		super(SavegameCatalog, cls).close()
+		cls.entries = None
@@ -0,0 +1,84 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import sqlite3
+
+from horizons.util.dbreader import DbReader
+
+
+class SqliteCache(object):
+	"""Base class for caches that are kept in an sqlite file in the user dir
+	(see RandomIslandCache and SavegameCatalog). The caches only save work, so if the
+	file can't be used, the cache is disabled and the data is just computed every time.
+
+	Subclasses set cache_filename and name and implement _init_db and _clear.
+	"""
+	cache_filename = None
+	name = None # used in warnings
+
+	db = None
+
+	@classmethod
+	def _open(cls):
+		"""Opens the cache db if necessary.
+		@return: whether the cache can be used"""
+		if cls.db is None:
+			try:
+				cls.db = DbReader(cls.cache_filename)
+				cls._init_db()
+			except sqlite3.Error as e:
+				print "Warning: failed to open " + cls.cache_filename + ": " + unicode(e)
+				cls.db = False # don't try again
+		return bool(cls.db)
+
+	@classmethod
+	def _init_db(cls):
+		"""Creates the tables if they don't exist yet, called when the db is opened."""
+		raise NotImplementedError
+
+	@classmethod
+	def _clear(cls):
+		"""Discards all contents of the cache."""
+		raise NotImplementedError
+
+	@classmethod
+	def _handle_error(cls, e):
+		"""Called when accessing the cache failed.
+		The contents are only discarded if they are broken. Operational errors, e.g. when
+		the file is locked by another instance of the game, only make this access fail."""
+		try:
+			cls.db("ROLLBACK")
+		except sqlite3.Error:
+			pass # no transaction active
+		if isinstance(e, sqlite3.OperationalError):
+			print "Warning: failed to access " + cls.name + ": " + unicode(e)
+			return
+		print "Warning: " + cls.name + " is broken, clearing it: " + unicode(e)
+		try:
+			cls._clear()
+		except sqlite3.Error:
+			cls.db = False # unusable
+
+	@classmethod
+	def close(cls):
+		if cls.db:
+			cls.db.close()
+		cls.db = None
@@ -43,6 +43,8 @@ from horizons.ai.aiplayer import AIPlayer
 from horizons.entities import Entities
 from horizons.util import decorators, BuildingIndexer
 from horizons.util.dbreader import DbReader
+from horizons.util.incrementalsave import save_world_objects
+from horizons.util.phasetimer import PhaseTimer
 from horizons.util.uhdbaccessor import read_savegame_template
 from horizons.world.buildingowner import BuildingOwner
 from horizons.world.diplomacy import Diplomacy
@@ -54,6 +56,12 @@ from horizons.world.component.healthcomponent import HealthComponent
 from horizons.world.component.storagecomponent import StorageComponent
 from horizons.world.component.selectablecomponent import SelectableComponent
 from horizons.world.disaster.disastermanager import DisasterManager
+from horizons.world.pathfinding.pathfinding import GridFindPath, PathGrid
+from horizons.world.pathfinding.seagraph import SeaGraph
+from horizons.world.checkuphash import CheckupHash
+from horizons.world.groundmap import WaterGroundMap, IslandMap, FullGroundMap
+from horizons.world.unitgrid import UnitGrid
+from horizons.world.islandindex import IslandIndex
 import horizons.world.worldutils # keep like this to make origin visible
 
 class World(BuildingOwner, WorldObject):
@@ -88,6 +96,8 @@ class World(BuildingOwner, WorldObject):
 			assert isinstance(session, horizons.session.Session)
 		self.session = session
 		super(World, self).__init__(worldid=GAME.WORLD_WORLDID)
+		# objects report their changes here while they are loaded, so create it right away
+		self.checkup_hash = CheckupHash()
 
 	def end(self):
 		# destructor-like thing.
@@ -108,13 +118,19 @@ class World(BuildingOwner, WorldObject):
 		self.full_map = None
 		self.island_map = None
 		self.water = None
+		self.sea_graph = None
+		self.pathfinder = None
+		self.checkup_hash = None
 		self.ships = None
 		self.ship_map = None
+		self.ship_grid = None
 		self.fish_indexer = None
 		self.ground_units = None
+		self.ground_unit_grid = None
 		self.trader = None
 		self.pirate = None
 		self.islands = None
+		self.island_index = None
 		self.diplomacy = None
 		self.bullets = None
 
@@ -141,35 +157,47 @@ class World(BuildingOwner, WorldObject):
 		self.trader = None
 		self.pirate = None
 
-		self._load_players(savegame_db, force_player_id)
+		with PhaseTimer.phase("load players"):
+			self._load_players(savegame_db, force_player_id)
 
 		# all static data
-		self.load_raw_map(savegame_db)
+		with PhaseTimer.phase("load map"):
+			self.load_raw_map(savegame_db)
+		# used by all pathers, see horizons.world.pathfinding.pather
+		self.pathfinder = GridFindPath(PathGrid(self.min_x, self.min_y, self.max_x, self.max_y))
 
 		# load world buildings (e.g. fish)
-		for (building_worldid, building_typeid) in \
-		    savegame_db("SELECT rowid, type FROM building WHERE location = ?", self.worldid):
-			load_building(self.session, savegame_db, building_typeid, building_worldid)
-
-		# use a dict because it's directly supported by the pathfinding algo
-		self.water = dict.fromkeys(list(self.ground_map), 1.0)
-		self._init_water_bodies()
-		self.sea_number = self.water_body[(self.min_x, self.min_y)]
-
-		# assemble list of water and coastline for ship, that can drive through shallow water
-		# NOTE: this is rather a temporary fix to make the fisher be able to move
-		# since there are tile between coastline and deep sea, all non-constructible tiles
-		# are added to this list as well, which will contain a few too many
-		self.water_and_coastline = copy.copy(self.water)
-		for island in self.islands:
-			for coord, tile in island.ground_map.iteritems():
-				if 'coastline' in tile.classes or 'constructible' not in tile.classes:
-					self.water_and_coastline[coord] = 1.0
+		with PhaseTimer.phase("load world buildings"):
+			for (building_worldid, building_typeid) in \
+			    savegame_db("SELECT rowid, type FROM building WHERE location = ?", self.worldid):
+				load_building(self.session, savegame_db, building_typeid, building_worldid)
+
+		with PhaseTimer.phase("init water"):
+			# use a dict because it's directly supported by the pathfinding algo
+			self.water = dict.fromkeys(list(self.ground_map), 1.0)
+			self._init_water_bodies()
+			self.sea_number = self.water_body[(self.min_x, self.min_y)]
+			# used by ShipPather for long trips
+			self.sea_graph = SeaGraph(self.water)
+
+			# assemble list of water and coastline for ship, that can drive through shallow water
+			# NOTE: this is rather a temporary fix to make the fisher be able to move
+			# since there are tile between coastline and deep sea, all non-constructible tiles
+			# are added to this list as well, which will contain a few too many
+			self.water_and_coastline = copy.copy(self.water)
+			for island in self.islands:
+				for coord, tile in island.ground_map.iteritems():
+					if 'coastline' in tile.classes or 'constructible' not in tile.classes:
+						self.water_and_coastline[coord] = 1.0
 
 		# create ship position list. entries: ship_map[(x, y)] = ship
 		self.ship_map = {}
 		self.ground_unit_map = {}
 
+		# spatial indices of ships and ground units, see get_ships
+		self.ship_grid = UnitGrid()
+		self.ground_unit_grid = UnitGrid()
+
 		# create shiplist, which is currently used for saving ships
 		# and having at least one reference to them
 		self.ships = []
@@ -189,8 +217,9 @@ class World(BuildingOwner, WorldObject):
 				self.pirate = Pirate.load(self.session, savegame_db, pirate_data[0][0])
 
 		# load all units (we do it here cause all buildings are loaded by now)
-		for (worldid, typeid) in savegame_db("SELECT rowid, type FROM unit ORDER BY rowid"):
-			Entities.units[typeid].load(self.session, savegame_db, worldid)
+		with PhaseTimer.phase("load units"):
+			for (worldid, typeid) in savegame_db("SELECT rowid, type FROM unit ORDER BY rowid"):
+				Entities.units[typeid].load(self.session, savegame_db, worldid)
 
 		if self.session.is_game_loaded():
 			# let trader and pirate command it's ships. we have to do this here cause ships have to be
@@ -206,13 +235,15 @@ class World(BuildingOwner, WorldObject):
 
 			# load the AI players
 			# this has to be done here because otherwise the ships and other objects won't exist
-			for player in self.players:
-				if not isinstance(player, HumanPlayer):
-					player.finish_loading(savegame_db)
+			with PhaseTimer.phase("load ai players"):
+				for player in self.players:
+					if not isinstance(player, HumanPlayer):
+						player.finish_loading(savegame_db)
 
-		self._load_combat(savegame_db)
-		self._load_diplomacy(savegame_db)
-		self._load_disasters(savegame_db)
+		with PhaseTimer.phase("load combat, diplomacy and disasters"):
+			self._load_combat(savegame_db)
+			self._load_diplomacy(savegame_db)
+			self._load_disasters(savegame_db)
 
 		self.inited = True
 		"""TUTORIAL:
@@ -257,11 +288,15 @@ class World(BuildingOwner, WorldObject):
 			self.disaster_manager.load(savegame_db)
 
 	def load_raw_map(self, savegame_db, preview=False):
+		# the compact maps create tiles on access, which is only possible if they don't have to be drawn
+		compact = preview or self.session.compact_ground_maps
+
 		# load islands
 		self.islands = []
 		for (islandid,) in savegame_db("SELECT rowid + 1000 FROM island"):
-			island = Island(savegame_db, islandid, self.session, preview=preview)
+			island = Island(savegame_db, islandid, self.session, preview=preview, compact=compact)
 			self.islands.append(island)
+		self.island_index = IslandIndex(self.islands)
 
 		#calculate map dimensions
 		self.min_x, self.min_y, self.max_x, self.max_y = 0, 0, 0, 0
@@ -293,12 +328,24 @@ class World(BuildingOwner, WorldObject):
 				if not preview:
 					# we don't need no references, we don't need no mem control
 					default_grounds(self.session, x, y)
+				if compact:
+					continue
 				for x_offset in xrange(0, 10):
 					if x+x_offset < self.max_x and x+x_offset >= self.min_x:
 						for y_offset in xrange(0, 10):
 							if y+y_offset < self.max_y and y+y_offset >= self.min_y:
 								self.ground_map[(x+x_offset, y+y_offset)] = fake_tile_class(self.session, x, y)
 
+		if compact:
+			# same contents as the dicts below
+			self.ground_map = WaterGroundMap(self.session, self.min_x, self.min_y, self.max_x - 1, self.max_y - 1,
+			                                 self.min_x - border, self.min_y - border)
+			self.island_map = IslandMap(self.islands, self.min_x, self.min_y, self.max_x - 1, self.max_y - 1)
+			for coords in self.island_map:
+				self.ground_map.set_value(coords, 0)
+			self.full_map = FullGroundMap(self.ground_map, self.island_map)
+			return
+
 		# remove parts that are occupied by islands, create the island map and the full map
 		self.island_map = {}
 		self.full_map = copy.copy(self.ground_map)
@@ -536,6 +583,8 @@ class World(BuildingOwner, WorldObject):
 	def get_islands_in_radius(self, point, radius):
 		"""Returns all islands in a certain radius around a point.
 		@return set of islands in radius"""
+		if not hasattr(point, "get_surrounding"): # Point, see Island.get_surrounding_tiles
+			return set(self.island_index.get_islands_in_radius(point, radius))
 		islands = set()
 		for island in self.islands:
 			for tile in island.get_surrounding_tiles(point, radius):
@@ -555,7 +604,12 @@ class World(BuildingOwner, WorldObject):
 		warehouses = []
 		islands = []
 		if radius is not None and position is not None:
-			islands = self.get_islands_in_radius(position, radius)
+			if hasattr(position, "get_surrounding"):
+				islands = self.get_islands_in_radius(position, radius)
+			else:
+				# the closest tile of a warehouse in range is also an island tile in range,
+				# so the islands don't have to be checked tile by tile
+				islands = self.island_index.get_islands_near(position, radius)
 		else:
 			islands = self.islands
 
@@ -577,24 +631,14 @@ class World(BuildingOwner, WorldObject):
 		@return: List of ships.
 		"""
 		if position is not None and radius is not None:
-			circle = Circle(position, radius)
-			ships = []
-			for ship in self.ships:
-				if circle.contains(ship.position):
-					ships.append(ship)
-			return ships
+			return self.ship_grid.get_in_radius(position, radius)
 		else:
 			return self.ships
 
 	def get_ground_units(self, position=None, radius=None):
 		"""@see get_ships"""
 		if position is not None and radius is not None:
-			circle = Circle(position, radius)
-			units = []
-			for unit in self.ground_units:
-				if circle.contains(unit.position):
-					units.append(unit)
-			return units
+			return self.ground_unit_grid.get_in_radius(position, radius)
 		else:
 			return self.ground_units
 
@@ -645,12 +689,9 @@ class World(BuildingOwner, WorldObject):
 			self.trader.save(db)
 		if self.pirate is not None:
 			self.pirate.save(db)
-		for ship in self.ships:
-			ship.save(db)
-		for ground_unit in self.ground_units:
-			ground_unit.save(db)
-		for bullet in self.bullets:
-			bullet.save(db)
+		save_world_objects(db, self.ships)
+		save_world_objects(db, self.ground_units)
+		save_world_objects(db, self.bullets)
 		self.diplomacy.save(db)
 		Weapon.save_attacks(db)
 		self.disaster_manager.save(db)
@@ -659,13 +700,21 @@ class World(BuildingOwner, WorldObject):
 		"""Save the current map as map file + island files"""
 		worldutils.save_map(self, path, prefix)
 
-	def get_checkup_hash(self):
+	def get_checkup_hash(self, detailed=False):
 		"""Returns a collection of important game state values. Used to check if two mp games have diverged.
-		Not designed to be reliable."""
+		Not designed to be reliable.
+		@param detailed: return all values instead of the compact digest, this is useful for
+		                 finding out what has diverged, but much slower.
+		@return: tuple (rngvalue, digest per section of CheckupHash) or dict if detailed"""
+		# NOTE: the rng value must be drawn in both modes, else the games would diverge
+		rngvalue = self.session.random.random()
+		if not detailed:
+			return (rngvalue, ) + self.checkup_hash.get_digest()
+
 		# NOTE: don't include float values, they are represented differently in python 2.6 and 2.7
 		# and will differ at some insignificant place. Also make sure to handle them correctly in the game logic.
 		data = {
-			'rngvalue': self.session.random.random(),
+			'rngvalue': rngvalue,
 			'settlements': [],
 			'ships': [],
 		}
@@ -0,0 +1,100 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+class BuildabilityCache(object):
+	"""Knows for every building size which positions of a settlement can be built on
+	without looking at the tiles again (see Buildable.check_build).
+
+	For each size (width, height), every origin in the settlement is mapped to the state of
+	the rect of that size at the origin:
+	- FREE: all tiles are constructible tiles of the settlement without buildings
+	- TEARABLE: like FREE, but there are buildings that can be built upon (e.g. trees)
+	- BLOCKED: any other case, e.g. a tile is not constructible, occupied by a building
+	  that can't be built upon or not in the settlement
+	The states of a size are calculated when it is needed first and then updated by the
+	island whenever the buildability of a tile might have changed (see Island._register_change).
+
+	Units and buildings that have been ordered in multiplayer games but haven't been built
+	yet are not covered, they have to be checked separately.
+	"""
+
+	FREE, TEARABLE, BLOCKED = range(3) # ordered, the state of a rect is the worst one of its tiles
+
+	def __init__(self, settlement):
+		self.settlement = settlement
+		self._states = {} # {(width, height): {(x, y): state}}
+
+	def get_state(self, size, coords):
+		"""Returns the state of the rect of size at coords.
+		@param size: tuple (width, height)
+		@param coords: tuple (x, y), origin of the rect
+		@return: FREE, TEARABLE, BLOCKED or None if coords is not in the settlement"""
+		states = self._states.get(size)
+		if states is None:
+			states = self._states[size] = self._calculate_states(size)
+		return states.get(coords)
+
+	def update(self, x, y):
+		"""Updates the rects that contain the tile at (x, y) after it has been changed."""
+		ground_map = self.settlement.ground_map
+		for size, states in self._states.iteritems():
+			for dx in xrange(size[0]):
+				for dy in xrange(size[1]):
+					coords = (x - dx, y - dy)
+					if coords in ground_map:
+						states[coords] = self._get_rect_state(size, coords)
+
+	def _get_tile_state(self, coords):
+		tile = self.settlement.ground_map.get(coords)
+		if tile is None or 'constructible' not in tile.classes:
+			return self.BLOCKED
+		obj = tile.object
+		if obj is None:
+			return self.FREE
+		return self.TEARABLE if obj.buildable_upon else self.BLOCKED
+
+	def _get_rect_state(self, size, coords):
+		x, y = coords
+		state = self.FREE
+		for dx in xrange(size[0]):
+			for dy in xrange(size[1]):
+				state = max(state, self._get_tile_state((x + dx, y + dy)))
+				if state == self.BLOCKED:
+					return state
+		return state
+
+	def _calculate_states(self, size):
+		tile_states = dict( (coords, self._get_tile_state(coords)) for coords in self.settlement.ground_map )
+		if size == (1, 1):
+			return tile_states
+		blocked = self.BLOCKED
+		states = {}
+		for (x, y) in tile_states:
+			state = self.FREE
+			for dx in xrange(size[0]):
+				for dy in xrange(size[1]):
+					state = max(state, tile_states.get((x + dx, y + dy), blocked))
+					if state == blocked:
+						break
+				if state == blocked:
+					break
+			states[(x, y)] = state
+		return states
@@ -25,6 +25,7 @@ from horizons.util import Point, Rect, decorators, Circle, WorldObject
 from horizons.world.pathfinding.roadpathfinder import RoadPathFinder
 from horizons.constants import BUILDINGS
 from horizons.entities import Entities
+from horizons.world.buildability import BuildabilityCache
 
 class BuildableErrorTypes(object):
 	"""Killjoy class. Collection of reasons why you can't build."""
@@ -95,6 +96,10 @@ class Buildable(object):
 
 	irregular_conditions = False # whether all ground tiles have to fulfill the same conditions
 
+	# whether the island and building checks are the default ones, so that BuildabilityCache
+	# can tell whether they pass. Set to False when overriding _check_island or _check_buildings.
+	uses_buildability_cache = True
+
 	# INTERFACE
 
 	@classmethod
@@ -116,10 +121,15 @@ class Buildable(object):
 		problem = None
 		tearset = []
 		try:
-			island = cls._check_island(session, position)
-			# TODO: if the rotation changes here for non-quadratic buildings, wrong results will be returned
-			rotation = cls._check_rotation(session, position, rotation)
-			tearset = cls._check_buildings(session, position, island=island)
+			if cls._get_cached_buildability(session, position) == BuildabilityCache.FREE:
+				# constructible tiles of a settlement without buildings, nothing to tear
+				rotation = cls._check_rotation(session, position, rotation)
+				cls._check_builds_in_construction(session, position)
+			else:
+				island = cls._check_island(session, position)
+				# TODO: if the rotation changes here for non-quadratic buildings, wrong results will be returned
+				rotation = cls._check_rotation(session, position, rotation)
+				tearset = cls._check_buildings(session, position, island=island)
 			cls._check_units(session, position)
 			if check_settlement:
 				cls._check_settlement(session, position, ship=ship, issuer=issuer)
@@ -149,6 +159,19 @@ class Buildable(object):
 		@param check_settlement: bool, whether to check for settlement
 		@return bool, True for "is buildable" """
 		position = Point(tile.x, tile.y)
+		if not cls.irregular_conditions:
+			state = cls._get_cached_buildability(session, position)
+			if state == BuildabilityCache.BLOCKED:
+				return False
+			elif state == BuildabilityCache.FREE:
+				try:
+					if check_settlement:
+						cls._check_settlement(session, position, ship=ship)
+					cls._check_builds_in_construction(session, position)
+				except _NotBuildableError:
+					return False
+				return True
+
 		try:
 			cls._check_island(session, position, island)
 			if check_settlement:
@@ -170,6 +193,24 @@ class Buildable(object):
 
 	# PRIVATE PARTS
 
+	@classmethod
+	def _get_cached_buildability(cls, session, position):
+		"""Looks up position in the BuildabilityCache of the settlement at its origin.
+		@param position: Rect or Point
+		@return: BuildabilityCache state or None if it isn't known"""
+		if not cls.uses_buildability_cache:
+			return None
+		if position.__class__ is Rect:
+			coords = (position.left, position.top)
+			size = (position.right - position.left + 1, position.bottom - position.top + 1)
+		else:
+			coords = (position.x, position.y)
+			size = (1, 1)
+		tile = session.world.full_map.get(coords)
+		if tile is None or tile.settlement is None:
+			return None
+		return tile.settlement.buildability_cache.get_state(size, coords)
+
 	@classmethod
 	def _check_island(cls, session, position, island=None):
 		"""Check if there is an island and enough tiles.
@@ -231,14 +272,19 @@ class Buildable(object):
 				else:
 					# building is blocking the build
 					raise _NotBuildableError(BuildableErrorTypes.OTHER_BUILDING_THERE)
+		cls._check_builds_in_construction(session, position)
+		return tearset
+
+	@classmethod
+	def _check_builds_in_construction(cls, session, position):
+		"""Check if buildings that have been ordered, but not executed yet (multiplayer) are in the way"""
 		if hasattr(session.manager, 'get_builds_in_construction'):
 			builds_in_construction = session.manager.get_builds_in_construction()
 			for build in builds_in_construction:
 				(sizex, sizey) = Entities.buildings[build.building_class].size
 				for (neededx, neededy) in position.tuple_iter():
-					if neededx in range(build.x, build.x+sizex) and neededy in range(build.y, build.y+sizey):
+					if build.x <= neededx < build.x + sizex and build.y <= neededy < build.y + sizey:
 						raise _NotBuildableError(BuildableErrorTypes.OTHER_BUILDING_THERE)
-		return tearset
 
 	@classmethod
 	def _check_units(cls, session, position):
@@ -331,6 +377,7 @@ class BuildableLine(Buildable):
 class BuildableSingleOnCoast(BuildableSingle):
 	"""Buildings one can only build on coast, such as BoatBuilder, Fisher"""
 	irregular_conditions = True
+	uses_buildability_cache = False # different island check
 	@classmethod
 	def _check_island(cls, session, position, island=None):
 		# ground has to be either coastline or constructible, > 1 tile must be coastline
@@ -481,6 +528,7 @@ class BuildableSingleOnDeposit(BuildableSingle):
 	the buildingclass.
 	"""
 	irregular_conditions = True
+	uses_buildability_cache = False # different building check
 	@classmethod
 	def _check_buildings(cls, session, position, island=None):
 		"""Check if there are buildings blocking the build"""
@@ -106,6 +106,8 @@ class BasicBuilding(ComponentHolder, ConcreteObject):
 	def toggle_costs(self):
 		self.running_costs , self.running_costs_inactive = \
 				self.running_costs_inactive, self.running_costs
+		if self.settlement is not None:
+			self.session.world.checkup_hash.update_building(self)
 
 	def running_costs_active(self):
 		"""Returns whether the building currently payes the running costs for status 'active'"""
@@ -150,15 +152,13 @@ class BasicBuilding(ComponentHolder, ConcreteObject):
 
 		remaining_ticks_of_month = None
 		if self.has_running_costs:
-			db_data = db("SELECT ticks FROM remaining_ticks_of_month WHERE rowid=?", worldid)
-			if len(db_data) == 0:
+			remaining_ticks_of_month = db.get_remaining_ticks_of_month(worldid)
+			if remaining_ticks_of_month is None:
 				# this can happen when running costs are set when there were no before
 				# we shouldn't crash because of changes in yaml code, still it's suspicous
 				print 'WARNING: object %s of type %s does not know when to pay its rent.'
 				print 'Disregard this when loading old savegames or on running cost changes.'
 				remaining_ticks_of_month = 1
-			else:
-				remaining_ticks_of_month = db_data[0][0]
 
 		self.__init(remaining_ticks_of_month=remaining_ticks_of_month)
 
@@ -94,10 +94,8 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 
 	def load(self, db, worldid):
 		super(Settler, self).load(db, worldid)
-		self.inhabitants, last_tax_payed = \
-		    db("SELECT inhabitants, last_tax_payed FROM settler WHERE rowid=?", worldid)[0]
-		remaining_ticks = \
-		    db("SELECT ticks FROM remaining_ticks_of_month WHERE rowid=?", worldid)[0][0]
+		self.inhabitants, last_tax_payed = db.get_settler_row(worldid)
+		remaining_ticks = db.get_remaining_ticks_of_month(worldid)
 		self.__init(loading = True, last_tax_payed = last_tax_payed)
 		self._load_upgrade_data(db)
 		self.session.message_bus.broadcast(SettlerUpdate(self, self.level))
@@ -162,6 +160,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 		self.inhabitants_max = self.session.db.get_settler_inhabitants_max(self.level)
 		if self.inhabitants > self.inhabitants_max: # crop settlers at level down
 			self.inhabitants = self.inhabitants_max
+			self.session.world.checkup_hash.update_building(self)
 
 		# consumption:
 		# Settler productions are specified to be disabled by default in the db, so we can enable
@@ -213,6 +212,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 
 		self.settlement.owner.get_component(StorageComponent).inventory.alter(RES.GOLD_ID, real_taxes)
 		self.last_tax_payed = real_taxes
+		self.session.world.checkup_hash.update_building(self)
 
 		# decrease happiness http://wiki.unknown-horizons.org/w/Settler_taxing#Formulae
 		difference = 1.0 - self.settlement.tax_settings[self.level]
@@ -244,6 +244,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 			# see http://wiki.unknown-horizons.org/w/Supply_citizens_with_resources
 			self.get_component(Producer).alter_production_time( 6.0/7.0 * math.log( 1.5 * (self.inhabitants + 1.2) ) )
 			self.inhabitants += change
+			self.session.world.checkup_hash.update_building(self)
 			self.session.message_bus.broadcast(SettlerInhabitantsChanged(self, change))
 			self._changed()
 
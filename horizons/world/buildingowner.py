@@ -22,6 +22,7 @@
 
 from horizons.world.providerhandler import ProviderHandler
 from horizons.util import decorators, Point
+from horizons.util.incrementalsave import save_world_objects
 from horizons.util.shapes.radiusshape import RadiusRect
 
 """
@@ -137,8 +138,7 @@ class BuildingOwner(object):
 					yield provider
 
 	def save(self, db):
-		for building in self.buildings:
-			building.save(db)
+		save_world_objects(db, self.buildings)
 
 	def end(self):
 		if self.buildings is not None:
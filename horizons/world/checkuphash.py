@@ -0,0 +1,110 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from horizons.util.python.callback import Callback
+from horizons.world.component.storagecomponent import StorageComponent
+
+MASK = (1 << 64) - 1
+
+def mix(*values):
+	"""Returns a 64 bit hash of a sequence of ints.
+	Python's hash() can't be used here since it differs between 32 and 64 bit builds.
+	The result is nonlinear in every value, so moving an amount from one entry to another
+	changes the sum of the hashes."""
+	h = 0x9e3779b97f4a7c15
+	for value in values:
+		h = ((h ^ (value & MASK)) * 0x100000001b3) & MASK
+		h ^= h >> 29
+	h = (h * 0xbf58476d1ce4e5b9) & MASK
+	h ^= h >> 32
+	return h
+
+
+class CheckupHash(object):
+	"""Digest of the game state values that multiplayer clients compare to detect desyncs.
+
+	The digest is the sum of the hashes of single entries (a building, a settlement
+	inventory, a ship), so it doesn't depend on the order of changes. Objects report changes
+	by marking themselves dirty, only those entries are rehashed when the digest is requested.
+	The digest is split in sections, so a mismatch already hints at what has diverged.
+
+	NOTE: don't include float values, they are represented differently in python 2.6 and 2.7
+	and will differ at some insignificant place.
+	"""
+
+	BUILDINGS = 0
+	INVENTORIES = 1
+	SHIPS = 2
+	SECTIONS = (BUILDINGS, INVENTORIES, SHIPS)
+
+	def __init__(self):
+		self.digests = [0] * len(self.SECTIONS)
+		self._entries = {} # {(section, worldid): hash value currently included in the digest}
+		self._dirty = {} # {(section, worldid): object}
+
+	def update_building(self, building):
+		"""Notify that the inhabitants, running costs or taxes of a settlement building changed."""
+		self._dirty[(self.BUILDINGS, building.worldid)] = building
+
+	def remove_building(self, building):
+		self._remove((self.BUILDINGS, building.worldid))
+
+	def add_settlement(self, settlement):
+		"""Starts tracking the inventory of a settlement."""
+		inventory = settlement.get_component(StorageComponent).inventory
+		inventory.add_change_listener(Callback(self._inventory_changed, settlement))
+		self._inventory_changed(settlement)
+
+	def _inventory_changed(self, settlement):
+		self._dirty[(self.INVENTORIES, settlement.worldid)] = settlement
+
+	def update_ship(self, ship):
+		"""Notify that a ship has moved."""
+		self._dirty[(self.SHIPS, ship.worldid)] = ship
+
+	def remove_ship(self, ship):
+		self._remove((self.SHIPS, ship.worldid))
+
+	def _remove(self, key):
+		self._dirty.pop(key, None)
+		if key in self._entries:
+			self.digests[key[0]] = (self.digests[key[0]] - self._entries.pop(key)) & MASK
+
+	def _hash_entry(self, section, obj):
+		if section == self.BUILDINGS:
+			return mix(section, obj.worldid, obj.settlement.worldid, obj.inhabitants,
+			           obj.running_costs, getattr(obj, 'last_tax_payed', 0))
+		elif section == self.INVENTORIES:
+			# sum up the slots, empty ones are skipped since they can appear at any time
+			inventory = obj.get_component(StorageComponent).inventory
+			return sum(mix(section, obj.worldid, obj.owner.worldid, res, amount) \
+			           for res, amount in inventory if amount) & MASK
+		else:
+			return mix(section, obj.worldid, obj.owner.worldid, obj.position.x, obj.position.y)
+
+	def get_digest(self):
+		"""Returns the digest of the current state as tuple of one int per section."""
+		for key, obj in self._dirty.iteritems():
+			value = self._hash_entry(key[0], obj)
+			self.digests[key[0]] = (self.digests[key[0]] - self._entries.get(key, 0) + value) & MASK
+			self._entries[key] = value
+		self._dirty.clear()
+		return tuple(self.digests)
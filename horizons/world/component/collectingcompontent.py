@@ -20,9 +20,16 @@
 # ###################################################
 
 
+import operator
+
 from horizons.world.pathfinding.pathnodes import ConsumerBuildingPathNodes
 from horizons import entities
+from horizons.constants import COLLECTORS
+from horizons.scheduler import Scheduler
+from horizons.util import Callback
+from horizons.util.messaging.message import IslandBuildingsChanged, PickupReservationFreed
 from horizons.world.component import Component
+from horizons.world.component.storagecomponent import StorageComponent
 
 class CollectingComponent(Component):
 	"""The CollectingBuilding class represents a object that uses collectors
@@ -32,6 +39,14 @@ class CollectingComponent(Component):
 	Building class.
 
 	Base class for most producing/collecting buildings.
+
+	Job search:
+	Idle collectors don't search jobs on their own, but request one (see request_job).
+	At the end of the tick, the jobs for all collectors that requested one are searched
+	at once, so the job targets in range are only looked up once per tick.
+	Collectors that didn't find a job wait for a change of the inventory of a possible target
+	or of the home building, for freed reservations at a possible target and for buildings
+	in range being built or removed (see wait_for_job) instead of searching regularly.
 	"""
 
 	NAME = 'CollectingComponent'
@@ -50,6 +65,15 @@ class CollectingComponent(Component):
 		# list that holds the collectors that belong to this building.
 		self.__collectors = []
 
+		self.__job_requests = [] # collectors that search a job in the current tick
+		self.__job_targets = None # {key: targets} while dispatching, see get_job_targets
+
+		self.__waiting_collectors = [] # collectors waiting for a wakeup, see wait_for_job
+		self.__waiting_since = {} # {collector: tick of its last job search}
+		self.__waiting_res = None # needed resources when collectors started waiting
+		self.__home_inventory = None # inventory of this building, watched for wakeups
+		self.__watched_targets = {} # {target: its inventory}, watched for wakeups
+
 		self.path_nodes = ConsumerBuildingPathNodes(self.instance)
 
 	def create_collector(self, collectors):
@@ -67,6 +91,8 @@ class CollectingComponent(Component):
 
 
 	def remove(self):
+		self._stop_watching()
+		Scheduler().rem_all_classinst_calls(self)
 		# remove every non-ship collectors (those are independent)
 		for collector in self.__collectors[:]:
 			if not collector.is_ship:
@@ -101,6 +127,133 @@ class CollectingComponent(Component):
 
 	def remove_local_collector(self, collector):
 		self.__collectors.remove(collector)
+		if collector in self.__job_requests:
+			self.__job_requests.remove(collector)
+		self._stop_waiting(collector)
 
 	def get_local_collectors(self):
 		return self.__collectors
+
+	## JOB DISPATCHING
+	def request_job(self, collector):
+		"""Called by an idle collector (usually a local collector) to get a job in this tick.
+		The job search is done in collector.dispatch_job when the current tick is finished."""
+		self._stop_waiting(collector)
+		if not self.__job_requests:
+			Scheduler().add_new_object(self._dispatch_jobs, self, run_in=0)
+		self.__job_requests.append(collector)
+
+	def _dispatch_jobs(self):
+		requests = self.__job_requests
+		self.__job_requests = []
+		self.__job_targets = {}
+		for collector in requests:
+			# the collector could have been reassigned in the meantime
+			if collector.home_building is self.instance and collector.job is None:
+				collector.dispatch_job()
+		self.__job_targets = None
+
+	def get_job_targets(self, collector, reslist):
+		"""Returns the buildings in range of collector where it may pick up res of reslist,
+		ordered by worldid. While dispatching, the result is shared by similar collectors.
+		@param collector: BuildingCollector whose home building is this building
+		@param reslist: list of resource ids
+		@return: list of buildings"""
+		key = (collector.__class__, collector.id, collector.get_home_inventory(), tuple(reslist))
+		if self.__job_targets is not None and key in self.__job_targets:
+			return self.__job_targets[key]
+
+		targets = [ building for building in collector.get_buildings_in_range(reslist=reslist) \
+		            if collector.check_possible_job_target(building) ]
+		# the order of get_buildings_in_range differs from client to client, but for mp games
+		# the jobs must have the same ordering to ensure get_best_possible_job(..) returns the same result
+		targets.sort(key=operator.attrgetter('worldid'))
+		if self.__job_targets is not None:
+			self.__job_targets[key] = targets
+		return targets
+
+	def wait_for_job(self, collector, targets, last_search=None):
+		"""Called by collectors that haven't found a job. They are woken up by rescheduling
+		their search_job when the inventory of a target or of this building changes in a way
+		that could provide a job, when a reservation at a target is freed or when a building
+		in range is built or removed, at the earliest after COLLECTORS.DEFAULT_WAIT_TICKS.
+		@param collector: BuildingCollector that has a search_job call scheduled
+		@param targets: possible targets of the collector (see get_job_targets)
+		@param last_search: tick of the last job search of collector, defaults to the current tick"""
+		if collector in self.__waiting_collectors:
+			return
+		if not self.__waiting_collectors:
+			self.__waiting_res = set(self.instance.get_needed_resources())
+			self.__home_inventory = self.instance.get_component(StorageComponent).inventory
+			self.__home_inventory.add_change_listener(self._home_changed)
+			self.session.message_bus.subscribe_locally(IslandBuildingsChanged, self.instance.island, \
+			                                           self._island_buildings_changed)
+		self.__waiting_collectors.append(collector)
+		self.__waiting_since[collector] = Scheduler().cur_tick if last_search is None else last_search
+		for target in targets:
+			if target not in self.__watched_targets:
+				inventory = target.get_component(StorageComponent).inventory
+				inventory.add_change_listener(Callback(self._target_changed, target))
+				self.session.message_bus.subscribe_locally(PickupReservationFreed, target, \
+				                                           self._reservation_freed)
+				self.__watched_targets[target] = inventory
+
+	def get_waiting_collectors(self):
+		return self.__waiting_collectors
+
+	def _home_changed(self):
+		if set(self.instance.get_needed_resources()) - self.__waiting_res:
+			self._wake_collectors()
+
+	def _target_changed(self, target):
+		for res in self.__waiting_res:
+			if target.get_available_pickup_amount(res, None) > 0:
+				self._wake_collectors()
+				break
+
+	def _reservation_freed(self, message):
+		self._target_changed(message.sender)
+
+	def _island_buildings_changed(self, message):
+		# new or removed providers and roads in range can provide a job
+		if message.building.position.distance(self.instance.position) <= self.instance.radius:
+			self._wake_collectors()
+
+	def _wake_collectors(self):
+		collectors = self.__waiting_collectors
+		waiting_since = self.__waiting_since
+		self.__waiting_collectors = []
+		self.__waiting_since = {}
+		self._stop_watching()
+		for collector in collectors:
+			if collector.home_building is not self.instance or collector.job is not None:
+				continue
+			remaining_ticks = Scheduler().get_remaining_ticks(collector, collector.search_job, \
+			                                                  assert_present=False)
+			if remaining_ticks is None:
+				continue
+			# don't search more often than collectors used to poll
+			run_in = max(waiting_since[collector] + COLLECTORS.DEFAULT_WAIT_TICKS - Scheduler().cur_tick, 1)
+			if remaining_ticks > run_in:
+				Scheduler().rem_call(collector, collector.search_job)
+				Scheduler().add_new_object(collector.search_job, collector, run_in)
+
+	def _stop_waiting(self, collector):
+		if collector in self.__waiting_collectors:
+			self.__waiting_collectors.remove(collector)
+			del self.__waiting_since[collector]
+			if not self.__waiting_collectors:
+				self._stop_watching()
+
+	def _stop_watching(self):
+		if self.__home_inventory is not None:
+			self.__home_inventory.discard_change_listener(self._home_changed)
+			self.__home_inventory = None
+			self.__waiting_res = None
+			self.session.message_bus.unsubscribe_locally(IslandBuildingsChanged, self.instance.island, \
+			                                             self._island_buildings_changed)
+		for target, inventory in self.__watched_targets.iteritems():
+			inventory.discard_change_listener(Callback(self._target_changed, target))
+			self.session.message_bus.unsubscribe_locally(PickupReservationFreed, target, \
+			                                             self._reservation_freed)
+		self.__watched_targets = {}
@@ -0,0 +1,273 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Compact replacements for the ground map dicts of World and Island ({(x, y): tile}).
+
+Instead of one tile object per coordinate, only a small int is stored in a typed array
+that covers the bounding rect of the map. Tile objects are created on first access and
+kept afterwards, so changes to them (e.g. tile.object) persist. The maps support the
+read-only part of the dict interface that the rest of the code uses.
+
+Tiles that are never accessed don't cost more than the array entry, which matters for
+the sea of big maps. Island tiles create their view instance when they are created
+though, so these maps can only be used where nothing needs to be drawn
+(see Session.compact_ground_maps).
+"""
+
+from array import array
+
+from horizons.entities import Entities
+from horizons.util.shapes.point import Point
+
+
+class GroundMap(dict):
+	"""Dict-like map {(x, y): tile} backed by an array of ints.
+	Coordinates with value 0 are not part of the map. Subclasses create the tiles in
+	_create_tile().
+
+	The tiles that have been created are the actual dict contents, so looking them up
+	again is as fast as with a normal dict. Changing the map is only possible via set_value().
+	"""
+
+	# whether created tiles are kept, only subclasses that return existing objects don't need to
+	cache_tiles = True
+
+	def __init__(self, left, top, right, bottom, typecode='B'):
+		"""
+		@param left, top, right, bottom: borders of the covered area (inclusive)
+		@param typecode: typecode of the value array, see module array
+		"""
+		super(GroundMap, self).__init__()
+		self.left = left
+		self.top = top
+		self.width = right - left + 1
+		self.height = bottom - top + 1
+		self._values = array(typecode, [0]) * (self.width * self.height)
+		self._len = 0
+
+	def _offset(self, coords):
+		"""Returns the array index of coords or -1 if they are outside of the covered area"""
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return y * self.width + x
+		return -1
+
+	def set_value(self, coords, value):
+		"""Sets the value for coords, 0 removes them from the map"""
+		offset = self._offset(coords)
+		assert offset != -1, "%s is outside of %s" % (coords, self)
+		self._len += bool(value) - bool(self._values[offset])
+		self._values[offset] = value
+		dict.pop(self, coords, None)
+
+	def get_value(self, coords):
+		"""Returns the value for coords, 0 if they are not on the map"""
+		offset = self._offset(coords)
+		return self._values[offset] if offset != -1 else 0
+
+	def _create_tile(self, x, y, value):
+		raise NotImplementedError
+
+	def __missing__(self, coords):
+		# called by __getitem__ for tiles that haven't been created yet
+		value = self.get_value(coords)
+		if not value:
+			raise KeyError(coords)
+		tile = self._create_tile(coords[0], coords[1], value)
+		if self.cache_tiles:
+			dict.__setitem__(self, coords, tile)
+		return tile
+
+	def get(self, coords, default=None):
+		tile = dict.get(self, coords)
+		if tile is None:
+			if not self.get_value(coords):
+				return default
+			tile = self.__missing__(coords)
+		return tile
+
+	def __contains__(self, coords):
+		return dict.__contains__(self, coords) or bool(self.get_value(coords))
+
+	has_key = __contains__
+
+	def __setitem__(self, coords, tile):
+		raise TypeError("%s can only be changed with set_value()" % self.__class__.__name__)
+
+	__delitem__ = __setitem__
+
+	def __len__(self):
+		return self._len
+
+	def __nonzero__(self):
+		return self._len > 0
+
+	def iterkeys(self):
+		values = self._values
+		width = self.width
+		for y in xrange(self.height):
+			row = y * width
+			for x in xrange(width):
+				if values[row + x]:
+					yield (self.left + x, self.top + y)
+
+	def __iter__(self):
+		return self.iterkeys()
+
+	def keys(self):
+		return list(self.iterkeys())
+
+	def itervalues(self):
+		for coords in self.iterkeys():
+			yield self[coords]
+
+	def values(self):
+		return list(self.itervalues())
+
+	def iteritems(self):
+		for coords in self.iterkeys():
+			yield (coords, self[coords])
+
+	def items(self):
+		return list(self.iteritems())
+
+	def get_created_tiles(self):
+		"""Returns the number of tiles that have been created so far"""
+		return dict.__len__(self)
+
+	def __str__(self):
+		return "%s(%s, %s, %sx%s, %s tiles)" % (self.__class__.__name__, self.left, self.top,
+		                                        self.width, self.height, self._len)
+
+	__repr__ = __str__
+
+
+class IslandGroundMap(GroundMap):
+	"""Ground tiles of an island.
+	The values are indices into the list of the distinct (ground_id, action_id, rotation)
+	rows of the island, there are only a few of them."""
+
+	def __init__(self, session, origin, rows, preview=False):
+		"""
+		@param session: Session instance
+		@param origin: Point, position of the (0, 0) ground tile
+		@param rows: list of ground rows (x, y, ground_id, action_id, rotation), relative to origin
+		@param preview: flag, map preview mode
+		"""
+		xs = [row[0] for row in rows]
+		ys = [row[1] for row in rows]
+		super(IslandGroundMap, self).__init__(origin.x + min(xs), origin.y + min(ys),
+		                                      origin.x + max(xs), origin.y + max(ys), 'H')
+		self.session = session
+		self.preview = preview
+		self._kinds = [None] # index 0 means no tile
+		kind_indices = {}
+		for (rel_x, rel_y, ground_id, action_id, rotation) in rows:
+			kind = (ground_id, action_id, rotation)
+			if kind not in kind_indices:
+				kind_indices[kind] = len(self._kinds)
+				self._kinds.append(kind)
+			self.set_value((origin.x + rel_x, origin.y + rel_y), kind_indices[kind])
+
+	def _create_tile(self, x, y, value):
+		ground_id, action_id, rotation = self._kinds[value]
+		if not self.preview: # actual game, need actual tiles
+			ground = Entities.grounds[ground_id](self.session, x, y)
+			ground.act(action_id, rotation)
+		else:
+			ground = Point(x, y)
+			ground.classes = tuple()
+			ground.settlement = None
+		return ground
+
+
+class WaterGroundMap(GroundMap):
+	"""The sea of the world (World.ground_map): every coordinate of the world that isn't on an island.
+	The tiles are the same fake tiles that World.load_raw_map creates for its dicts."""
+
+	def __init__(self, session, left, top, right, bottom, block_left, block_top):
+		"""
+		@param left, top, right, bottom: borders of the world (inclusive)
+		@param block_left, block_top: origin of the grid of 10x10 blocks of water
+		"""
+		super(WaterGroundMap, self).__init__(left, top, right, bottom)
+		self.session = session
+		self._block_left = block_left
+		self._block_top = block_top
+		self._values = array('B', [1]) * (self.width * self.height)
+		self._len = len(self._values)
+
+	def _create_tile(self, x, y, value):
+		# all tiles of a block share its position, see load_raw_map
+		x -= (x - self._block_left) % 10
+		y -= (y - self._block_top) % 10
+		return Entities.grounds[-1](self.session, x, y)
+
+
+class IslandMap(GroundMap):
+	"""World.island_map: {(x, y): island}. The values are the island number + 1."""
+
+	cache_tiles = False
+
+	def __init__(self, islands, left, top, right, bottom):
+		super(IslandMap, self).__init__(left, top, right, bottom, 'H')
+		self.islands = islands
+		for number, island in enumerate(islands):
+			for coords in island.ground_map:
+				self.set_value(coords, number + 1)
+
+	def _create_tile(self, x, y, value):
+		return self.islands[value - 1]
+
+
+class FullGroundMap(GroundMap):
+	"""World.full_map: the island tiles and the sea, i.e. every coordinate of the world.
+	Only references the tiles of the other maps."""
+
+	def __init__(self, water_map, island_map):
+		# no super call with an array, every coordinate is on the map
+		dict.__init__(self)
+		self.left = water_map.left
+		self.top = water_map.top
+		self.width = water_map.width
+		self.height = water_map.height
+		self._len = self.width * self.height
+		self.water_map = water_map
+		self.island_map = island_map
+
+	def set_value(self, coords, value):
+		raise TypeError("%s can only be changed with the water map and the island map" % self.__class__.__name__)
+
+	def get_value(self, coords):
+		return int(self._offset(coords) != -1)
+
+	def iterkeys(self):
+		for y in xrange(self.top, self.top + self.height):
+			for x in xrange(self.left, self.left + self.width):
+				yield (x, y)
+
+	def _create_tile(self, x, y, value):
+		island = self.island_map.get((x, y))
+		if island is not None:
+			return island.ground_map[(x, y)]
+		return self.water_map[(x, y)]
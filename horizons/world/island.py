@@ -25,12 +25,13 @@ from horizons.entities import Entities
 from horizons.scheduler import Scheduler
 
 from horizons.util import WorldObject, Point, Rect, Circle, DbReader, random_map, BuildingIndexer
-from horizons.util.messaging.message import SettlementRangeChanged, NewSettlement
+from horizons.util.messaging.message import SettlementRangeChanged, NewSettlement, IslandBuildingsChanged
 from settlement import Settlement
 from horizons.world.pathfinding.pathnodes import IslandPathNodes
 from horizons.constants import BUILDINGS, RES, UNITS
 from horizons.scenario import CONDITIONS
 from horizons.world.buildingowner import BuildingOwner
+from horizons.world.groundmap import IslandGroundMap
 from horizons.gui.widgets.minimap import Minimap
 
 class Island(BuildingOwner, WorldObject):
@@ -64,12 +65,13 @@ class Island(BuildingOwner, WorldObject):
 	"""
 	log = logging.getLogger("world.island")
 
-	def __init__(self, db, islandid, session, preview=False):
+	def __init__(self, db, islandid, session, preview=False, compact=False):
 		"""
 		@param db: db instance with island table
 		@param islandid: id of island in that table
 		@param session: reference to Session instance
 		@param preview: flag, map preview mode
+		@param compact: flag, use a compact ground map (see horizons.world.groundmap)
 		"""
 		super(Island, self).__init__(worldid=islandid)
 
@@ -79,7 +81,7 @@ class Island(BuildingOwner, WorldObject):
 		self.session = session
 
 		x, y, filename = db("SELECT x, y, file FROM island WHERE rowid = ? - 1000", islandid)[0]
-		self.__init(Point(x, y), filename, preview=preview)
+		self.__init(Point(x, y), filename, preview=preview, compact=compact)
 
 		if not preview:
 			# create building indexers
@@ -91,6 +93,7 @@ class Island(BuildingOwner, WorldObject):
 		for (settlement_id,) in db("SELECT rowid FROM settlement WHERE island = ?", islandid):
 			settlement = Settlement.load(db, settlement_id, self.session, self)
 			self.settlements.append(settlement)
+			self.session.world.checkup_hash.add_settlement(settlement)
 
 		if not preview:
 			# load buildings
@@ -106,12 +109,13 @@ class Island(BuildingOwner, WorldObject):
 			return random_map.create_random_island(self.file)
 		return DbReader(self.file) # Create a new DbReader instance to load the maps file.
 
-	def __init(self, origin, filename, preview=False):
+	def __init(self, origin, filename, preview=False, compact=False):
 		"""
 		Load the actual island from a file
 		@param origin: Point
 		@param filename: String, filename of island db or random map id
 		@param preview: flag, map preview mode
+		@param compact: flag, use a compact ground map
 		"""
 		self.file = filename
 		self.origin = origin
@@ -123,18 +127,23 @@ class Island(BuildingOwner, WorldObject):
 		# NOTE: it contains tiles, that are not on the island!
 		self.rect = Rect(Point(p_x, p_y), width, height)
 
-		self.ground_map = {}
-		for (rel_x, rel_y, ground_id, action_id, rotation) in db("SELECT x, y, ground_id, action_id, rotation FROM ground"): # Load grounds
-			if not preview: # actual game, need actual tiles
-				ground = Entities.grounds[ground_id](self.session, self.origin.x + rel_x, self.origin.y + rel_y)
-				ground.act(action_id, rotation)
-			else:
-				ground = Point(self.origin.x + rel_x, self.origin.y + rel_y)
-				ground.classes = tuple()
-				ground.settlement = None
-			# These are important for pathfinding and building to check if the ground tile
-			# is blocked in any way.
-			self.ground_map[(ground.x, ground.y)] = ground
+		ground_rows = db("SELECT x, y, ground_id, action_id, rotation FROM ground") # Load grounds
+		if compact:
+			# tiles are created when they are accessed
+			self.ground_map = IslandGroundMap(self.session, self.origin, ground_rows, preview)
+		else:
+			self.ground_map = {}
+			for (rel_x, rel_y, ground_id, action_id, rotation) in ground_rows:
+				if not preview: # actual game, need actual tiles
+					ground = Entities.grounds[ground_id](self.session, self.origin.x + rel_x, self.origin.y + rel_y)
+					ground.act(action_id, rotation)
+				else:
+					ground = Point(self.origin.x + rel_x, self.origin.y + rel_y)
+					ground.classes = tuple()
+					ground.settlement = None
+				# These are important for pathfinding and building to check if the ground tile
+				# is blocked in any way.
+				self.ground_map[(ground.x, ground.y)] = ground
 
 		self._init_cache()
 
@@ -233,6 +242,7 @@ class Island(BuildingOwner, WorldObject):
 		@param load: whether it has been called during load"""
 		if settlement not in self.settlements:
 			self.settlements.append(settlement)
+			self.session.world.checkup_hash.add_settlement(settlement)
 		if not load:
 			self.assign_settlement(position, radius, settlement)
 		self.session.scenario_eventhandler.check_events(CONDITIONS.settlements_num_greater)
@@ -246,6 +256,7 @@ class Island(BuildingOwner, WorldObject):
 		@param settlement:
 		"""
 		settlement_tiles_changed = []
+		settlement_coords_changed = []
 		for coord in position.get_radius_coordinates(radius, include_self=True):
 			tile = self.get_tile_tuple(coord)
 			if tile is not None:
@@ -254,14 +265,9 @@ class Island(BuildingOwner, WorldObject):
 				if tile.settlement is None:
 					tile.settlement = settlement
 					settlement.ground_map[coord] = tile
-					Minimap.update(coord)
 					self._register_change(coord[0], coord[1])
 					settlement_tiles_changed.append(tile)
-
-					# notify all AI players when land ownership changes
-					for player in self.session.world.players:
-						if hasattr(player, 'on_settlement_expansion'):
-							player.on_settlement_expansion(settlement, coord)
+					settlement_coords_changed.append(coord)
 
 				building = tile.object
 				# found a new building, that is now in settlement radius
@@ -273,6 +279,13 @@ class Island(BuildingOwner, WorldObject):
 					settlement.add_building(building)
 
 		if settlement_tiles_changed:
+			Minimap.update_area(settlement_coords_changed)
+
+			# notify all AI players when land ownership changes
+			for player in self.session.world.players:
+				if hasattr(player, 'on_settlement_expansion'):
+					player.on_settlement_expansion(settlement, settlement_coords_changed)
+
 			self.session.message_bus.broadcast(SettlementRangeChanged(settlement, settlement_tiles_changed))
 
 
@@ -302,6 +315,9 @@ class Island(BuildingOwner, WorldObject):
 		if building.id == BUILDINGS.TREE_CLASS:
 			self.num_trees += 1
 
+		if not load:
+			self.session.message_bus.broadcast(IslandBuildingsChanged(self, building))
+
 		return building
 
 	def remove_building(self, building):
@@ -323,6 +339,8 @@ class Island(BuildingOwner, WorldObject):
 		if building.id == BUILDINGS.TREE_CLASS:
 			self.num_trees -= 1
 
+		self.session.message_bus.broadcast(IslandBuildingsChanged(self, building))
+
 	def get_building_index(self, resource_id):
 		if resource_id == RES.WILDANIMALFOOD_ID:
 			return self.building_indexers[BUILDINGS.TREE_CLASS]
@@ -400,6 +418,10 @@ class Island(BuildingOwner, WorldObject):
 
 	def _register_change(self, x, y):
 		""" registers the possible buildability change of a rectangle on this island """
+		tile = self.ground_map.get((x, y))
+		if tile is not None and tile.settlement is not None:
+			tile.settlement.buildability_cache.update(x, y)
+
 		self.last_change_id += 1
 		for (area_size_x, area_size_y), building_areas in self.last_changed.iteritems():
 			for dx in xrange(area_size_x):
@@ -0,0 +1,71 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+class IslandIndex(object):
+	"""Finds the islands near a point without probing their tiles (see World.get_islands_in_radius).
+
+	Islands are only checked tile by tile if their bounding rect is in range, and then only
+	the tiles of the circle that are inside the rect. Islands never change after the map has
+	been loaded and there are only a few of them, so a list of rects is all that is needed.
+	"""
+
+	def __init__(self, islands):
+		# the rect of an island contains all of its tiles, see World.load_raw_map
+		self._islands = [(island.rect.left, island.rect.top, island.rect.right, island.rect.bottom, island)
+		                 for island in islands]
+
+	def get_islands_near(self, point, radius):
+		"""Returns the islands whose bounding rect is within radius of point.
+		Every island with a tile in the radius is among them.
+		@param point: Point
+		@return: list of islands, in the order they have been passed to the constructor"""
+		x, y = point.x, point.y
+		radius_squared = radius ** 2
+		islands = []
+		for left, top, right, bottom, island in self._islands:
+			dx = max(left - x, 0, x - right)
+			dy = max(top - y, 0, y - bottom)
+			if dx * dx + dy * dy <= radius_squared:
+				islands.append(island)
+		return islands
+
+	def get_islands_in_radius(self, point, radius):
+		"""Returns the islands that have a tile within radius of point, like
+		Island.get_surrounding_tiles(point, radius) would find.
+		@param point: Point with integer coordinates
+		@return: list of islands"""
+		return [island for island in self.get_islands_near(point, radius)
+		        if self._has_tile_in_radius(island, point, radius)]
+
+	def _has_tile_in_radius(self, island, point, radius):
+		ground_map = island.ground_map
+		x, y = point.x, point.y
+		if (x, y) in ground_map:
+			return True
+		rect = island.rect
+		radius_squared = radius ** 2
+		# same coordinates as Circle.tuple_iter, restricted to the rect
+		for tile_x in xrange(max(x - radius, rect.left), min(x + radius, rect.right) + 1):
+			dx_squared = (tile_x - x) ** 2
+			for tile_y in xrange(max(y - radius, rect.top), min(y + radius, rect.bottom) + 1):
+				if dx_squared + (tile_y - y) ** 2 <= radius_squared and (tile_x, tile_y) in ground_map:
+					return True
+		return False
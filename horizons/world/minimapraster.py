@@ -0,0 +1,127 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from bisect import bisect_left, bisect_right
+
+
+class MinimapRaster(object):
+	"""The colors of the pixels of a minimap of a world (see Minimap._recalculate).
+
+	Every pixel shows the tile at the center of the area of the world it covers: the color
+	of the owner of its settlement, the island color or nothing for water. The colors of all
+	land pixels are kept, so the minimap can be drawn again (e.g. rotated) without looking
+	at the world, and after changes only the pixels of the changed area are calculated again.
+
+	Only the pixels inside the bounding rect of an island are checked against its ground map,
+	the water between the islands is never looked at.
+	Pixel coords are relative to the top left corner of the unrotated minimap.
+	"""
+
+	ISLAND_COLOR = (137, 117,  87) # islands without settlement
+
+	def __init__(self, world, width, height, island_color=ISLAND_COLOR):
+		"""
+		@param world: World object or fake thereof, with islands and map_dimensions
+		@param width, height: size of the minimap in pixels
+		@param island_color: (r, g, b) of islands without settlement
+		"""
+		self.world = world
+		self.width = width
+		self.height = height
+		self.island_color = island_color
+		self.pixels = {} # {(x, y): (r, g, b)} of the pixels that show land
+
+		pixel_per_coord_x = float(world.map_dimensions.width) / width
+		pixel_per_coord_y = float(world.map_dimensions.height) / height
+		half_x = int(pixel_per_coord_x / 2)
+		half_y = int(pixel_per_coord_y / 2)
+		# world coords of the center of the area of every column and row, ascending
+		self._column_coords = [int(x * pixel_per_coord_x) + world.min_x + half_x for x in xrange(width)]
+		self._row_coords = [int(y * pixel_per_coord_y) + world.min_y + half_y for y in xrange(height)]
+
+	def calculate(self):
+		"""Calculates the colors of all pixels.
+		@return: dict {(x, y): (r, g, b)} of the pixels that show land"""
+		self.pixels = self._calculate_rect(0, 0, self.width - 1, self.height - 1)
+		return self.pixels
+
+	def get_data(self):
+		"""Returns the calculated pixels like Minimap.dump_data, without rotation.
+		@return: list of (x, y, r, g, b) of the pixels that show land, ordered by x and y"""
+		return [ (x, y) + color for (x, y), color in sorted(self.pixels.iteritems()) ]
+
+	def update(self, left, top, right, bottom):
+		"""Calculates the pixels in a rect of the minimap again, e.g. after settlements have changed.
+		The borders are inclusive, the parts outside of the minimap are ignored.
+		@return: list of ((x, y), color) of the pixels whose color has changed,
+		         color is None if a pixel shows water now"""
+		left, top = max(left, 0), max(top, 0)
+		right, bottom = min(right, self.width - 1), min(bottom, self.height - 1)
+		pixels = self.pixels
+		new_pixels = self._calculate_rect(left, top, right, bottom)
+		changed = []
+		for x in xrange(left, right + 1):
+			for y in xrange(top, bottom + 1):
+				pixel = (x, y)
+				color = new_pixels.get(pixel)
+				if color != pixels.get(pixel):
+					changed.append((pixel, color))
+					if color is None:
+						del pixels[pixel]
+					else:
+						pixels[pixel] = color
+		return changed
+
+	def _calculate_rect(self, left, top, right, bottom):
+		pixels = {}
+		if left > right or top > bottom:
+			return pixels
+		column_coords = self._column_coords
+		row_coords = self._row_coords
+		island_color = self.island_color
+		owner_colors = {} # {settlement: color}, looking up the color of the owner is slow
+		for island in self.world.islands:
+			rect = island.rect
+			# the pixels of the rect that show tiles within the rect of the island
+			first_x = max(left, bisect_left(column_coords, rect.left))
+			last_x = min(right, bisect_right(column_coords, rect.right) - 1)
+			first_y = max(top, bisect_left(row_coords, rect.top))
+			last_y = min(bottom, bisect_right(row_coords, rect.bottom) - 1)
+			if first_x > last_x or first_y > last_y:
+				continue
+			get_tile = island.ground_map.get
+			rows = [(y, row_coords[y]) for y in xrange(first_y, last_y + 1)]
+			for x in xrange(first_x, last_x + 1):
+				coord_x = column_coords[x]
+				for y, coord_y in rows:
+					tile = get_tile((coord_x, coord_y))
+					if tile is None:
+						continue
+					settlement = tile.settlement
+					if settlement is None:
+						pixels[(x, y)] = island_color
+					else:
+						color = owner_colors.get(settlement)
+						if color is None:
+							color = owner_colors[settlement] = settlement.owner.color.to_tuple()
+						pixels[(x, y)] = color
+		return pixels
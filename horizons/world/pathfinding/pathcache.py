@@ -0,0 +1,142 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import logging
+
+from horizons.util import Point, Rect
+
+class PathCache(object):
+	"""Remembers paths found on a set of path nodes that only changes when buildings or roads change.
+	Used for paths on islands, where collectors search the same paths to their job targets
+	over and over again.
+
+	Entries are keyed by (kind, source, destination), where kind identifies the way the path was
+	searched (usually the pather class). Every entry is indexed by the coords it depends on,
+	so that a change of a tile only drops the paths running over it:
+	- invalidate(coords) has to be called when a tile stops being walkable for the cached paths
+	- clear() has to be called when a tile becomes walkable, since this can make any path shorter
+	  or make an impossible path possible
+
+	Cached paths are copied on the way in and out, since users of paths modify them.
+	"""
+	log = logging.getLogger("world.pathfinding")
+
+	# the cache is cleared when it gets bigger than this (number of entries)
+	MAX_SIZE = 10000
+
+	def __init__(self):
+		self.paths = {} # {key: path or None}
+		self.coords_of_key = {} # {key: [coords the entry depends on]}
+		self.keys_at_coords = {} # {(x, y): set(keys)}
+
+		# statistics, use them for profiling
+		self.hits = 0
+		self.misses = 0
+		self.invalidations = 0
+
+	def __len__(self):
+		return len(self.paths)
+
+	@classmethod
+	def get_area_key(cls, area):
+		"""Returns a hashable representation of a source or destination or None if it's not supported.
+		@param area: Rect, Point or BasicBuilding"""
+		if hasattr(area, 'position'):
+			area = area.position
+		if isinstance(area, Rect):
+			return (area.left, area.top, area.right, area.bottom)
+		if isinstance(area, Point):
+			return (area.x, area.y)
+		return None
+
+	def get_path(self, kind, source, destination, find_path):
+		"""Returns the path from source to destination, searches it only if it isn't known.
+		@param kind: hashable, identifies how find_path searches (e.g. the pather class)
+		@param source, destination: Rect, Point or BasicBuilding
+		@param find_path: callable, find_path(source, destination) returns a path or None
+		@return: list of coords as tuples or None if no path is found (see FindPath)"""
+		source_key = self.get_area_key(source)
+		destination_key = self.get_area_key(destination)
+		if source_key is None or destination_key is None:
+			return find_path(source, destination)
+
+		key = (kind, source_key, destination_key)
+		if key in self.paths:
+			self.hits += 1
+			path = self.paths[key]
+			return None if path is None else list(path)
+
+		self.misses += 1
+		path = find_path(source, destination)
+		self._add(key, source, destination, path)
+		return None if path is None else list(path)
+
+	def _add(self, key, source, destination, path):
+		if len(self.paths) >= self.MAX_SIZE:
+			self.log.debug("PathCache: size limit of %s reached, clearing", self.MAX_SIZE)
+			self.clear()
+
+		if hasattr(source, 'position'):
+			source = source.position
+		if hasattr(destination, 'position'):
+			destination = destination.position
+		dependencies = set(source.get_coordinates())
+		dependencies.update(destination.get_coordinates())
+		if path is not None:
+			dependencies.update(path)
+			path = tuple(path)
+
+		self.paths[key] = path
+		self.coords_of_key[key] = dependencies
+		keys_at_coords = self.keys_at_coords
+		for coords in dependencies:
+			if coords in keys_at_coords:
+				keys_at_coords[coords].add(key)
+			else:
+				keys_at_coords[coords] = set([key])
+
+	def invalidate(self, coords):
+		"""Drops all entries that depend on the tile at coords.
+		@param coords: tuple: (x, y)"""
+		keys = self.keys_at_coords.pop(coords, None)
+		if not keys:
+			return
+		keys_at_coords = self.keys_at_coords
+		for key in keys:
+			del self.paths[key]
+			for other_coords in self.coords_of_key.pop(key):
+				if other_coords != coords:
+					keys_at_coords[other_coords].discard(key)
+					if not keys_at_coords[other_coords]:
+						del keys_at_coords[other_coords]
+		self.invalidations += len(keys)
+
+	def clear(self):
+		"""Drops all entries"""
+		self.invalidations += len(self.paths)
+		self.paths.clear()
+		self.coords_of_key.clear()
+		self.keys_at_coords.clear()
+
+	def __str__(self):
+		return "PathCache(%d paths, %d hits, %d misses, %d invalidations)" % \
+		       (len(self.paths), self.hits, self.misses, self.invalidations)
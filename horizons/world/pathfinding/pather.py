@@ -25,7 +25,6 @@ import logging
 from horizons.util import Point, decorators
 
 from horizons.world.pathfinding import PathBlockedError
-from horizons.world.pathfinding.pathfinding import FindPath
 
 """
 In this file, you will find an interface to the pathfinding algorithm.
@@ -70,6 +69,20 @@ class AbstractPather(object):
 		Return value type must be supported by FindPath"""
 		return []
 
+	def _get_path_cache(self):
+		"""Returns the PathCache for the paths of this pather or None if they can't be cached.
+		Paths may only be cached if the path nodes are kept up to date by an IslandPathNodes
+		instance and there are no blocked coords."""
+		return None
+
+	def _find_path(self, source, destination):
+		"""Searches a path from source to destination
+		@return: path or None (see FindPath)"""
+		# to use a different pathfinding code, change World.pathfinder
+		return self.session.world.pathfinder(source, destination, self._get_path_nodes(),
+		                                     self._get_blocked_coords(), self.move_diagonal, \
+		                                     self.make_target_walkable)
+
 	def _check_for_obstacles(self, point):
 		"""Check if the path is unexpectedly blocked by e.g. a unit
 		@param point: tuple: (x, y)
@@ -103,10 +116,11 @@ class AbstractPather(object):
 			source = self._get_position()
 
 		# call algorithm
-		# to use a different pathfinding code, just change the following line
-		path = FindPath()(source, destination, self._get_path_nodes(),
-											self._get_blocked_coords(), self.move_diagonal, \
-											self.make_target_walkable)
+		path_cache = self._get_path_cache()
+		if path_cache is None:
+			path = self._find_path(source, destination)
+		else:
+			path = path_cache.get_path(self.__class__, source, destination, self._find_path)
 
 		if path is None:
 			return False
@@ -219,6 +233,18 @@ class ShipPather(AbstractPather):
 	def _get_blocked_coords(self):
 		return self.session.world.ship_map
 
+	def _find_path(self, source, destination):
+		world = self.session.world
+		path_nodes = world.sea_graph.get_path_nodes(source, destination)
+		if path_nodes is None:
+			return None
+		path = world.pathfinder(source, destination, path_nodes, self._get_blocked_coords(), \
+		                        self.move_diagonal, self.make_target_walkable)
+		if path is None and path_nodes is not world.water:
+			# the way through the regions can be blocked by other ships
+			path = super(ShipPather, self)._find_path(source, destination)
+		return path
+
 
 class FisherShipPather(ShipPather):
 	"""Can also drive through shallow water"""
@@ -229,6 +255,10 @@ class FisherShipPather(ShipPather):
 		# don't let fisher be blocked by other ships (#1023)
 		return []
 
+	def _find_path(self, source, destination):
+		# the sea graph only knows the tiles of World.water
+		return AbstractPather._find_path(self, source, destination)
+
 
 class BuildingCollectorPather(AbstractPather):
 	"""Pather for collectors, that move freely (without depending on roads)
@@ -250,6 +280,9 @@ class RoadPather(AbstractPather):
 	def _get_path_nodes(self):
 		return self.island.path_nodes.road_nodes
 
+	def _get_path_cache(self):
+		return self.island.path_nodes.path_cache
+
 
 class SoldierPather(AbstractPather):
 	"""Pather for units, that move absolutely freely (such as soldiers)
@@ -290,7 +323,9 @@ class StaticPather(object):
 		@param island: island to search path on
 		@param source, destination: Point or anything supported by FindPath
 		@return: list of tuples or None in case no path is found"""
-		return FindPath()(source, destination, island.path_nodes.road_nodes)
+		def find_path(source, destination):
+			return island.session.world.pathfinder(source, destination, island.path_nodes.road_nodes)
+		return island.path_nodes.path_cache.get_path(cls, source, destination, find_path)
 
 
 decorators.bind_all(AbstractPather)
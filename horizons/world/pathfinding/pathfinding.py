@@ -19,7 +19,11 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import itertools
 import logging
+import sys
+
+from heapq import heappush, heappop
 
 from horizons.util import Point, decorators
 
@@ -247,6 +251,137 @@ class FindPath(object):
 
 
 
+class PathGrid(object):
+	"""Node storage for GridFindPath, covering a rectangular area of the map.
+	Nodes are identified by the offset of their coords from the top left corner, so that the
+	data of a node can be stored in flat lists instead of dicts keyed by coord tuples.
+	The lists are reused for every search, a node belongs to the current search if its entry
+	in seen is the number of the current search.
+	There is a border of 1 tile around the area, so that neighbors never leave the lists.
+	"""
+	BORDER = sys.maxint # seen value of the border, so that its tiles are never visited
+
+	def __init__(self, min_x, min_y, max_x, max_y):
+		"""
+		@param min_x, min_y, max_x, max_y: borders of the covered area, all inclusive
+		"""
+		self.min_x, self.min_y, self.max_x, self.max_y = min_x, min_y, max_x, max_y
+		self.offset_x = min_x - 1
+		self.offset_y = min_y - 1
+		width = max_x - min_x + 3
+		self.stride = max_y - min_y + 3
+		size = width * self.stride
+		self.search = 0
+		self.seen = [0] * size
+		self.parent = [None] * size
+		self.dist = [0] * size
+		for x in xrange(width):
+			self.seen[x * self.stride] = self.seen[(x + 1) * self.stride - 1] = self.BORDER
+		for y in xrange(self.stride):
+			self.seen[y] = self.seen[size - self.stride + y] = self.BORDER
+
+	def contains(self, coords):
+		return self.min_x <= coords[0] <= self.max_x and self.min_y <= coords[1] <= self.max_y
+
+	def index(self, coords):
+		"""Returns the offset of coords. Coords of the same row are adjacent, so the offsets are
+		ordered like the coord tuples."""
+		return (coords[0] - self.offset_x) * self.stride + coords[1] - self.offset_y
+
+	def coords(self, index):
+		x, y = divmod(index, self.stride)
+		return (x + self.offset_x, y + self.offset_y)
+
+
+class GridFindPath(FindPath):
+	"""Same algorithm as FindPath, which returns exactly the same paths, but keeps the node data
+	in a PathGrid. Falls back to FindPath for searches that leave the grid's area.
+	"""
+
+	def __init__(self, grid):
+		"""
+		@param grid: PathGrid covering the area of path_nodes
+		"""
+		super(GridFindPath, self).__init__()
+		self.grid = grid
+
+	@decorators.make_constants()
+	def execute(self):
+		"""Executes algorithm"""
+		grid = self.grid
+		source_coords = self.source.get_coordinates()
+		dest_coords = set(self.destination.get_coordinates())
+		for coords in itertools.chain(source_coords, dest_coords):
+			if not grid.contains(coords):
+				return super(GridFindPath, self).execute()
+
+		path_nodes = self.path_nodes
+		blocked_coords = self.blocked_coords
+		destination = self.destination
+		distance_to_tuple = destination.distance_to_tuple
+		source_coords = set(source_coords)
+		if not self.make_target_walkable:
+			# restrict destination coords to walkable tiles, by default they are counted as walkable
+			dest_coords = set(coords for coords in dest_coords if coords in path_nodes)
+
+		grid.search += 1
+		search = grid.search
+		seen = grid.seen
+		parent = grid.parent
+		dist = grid.dist
+		stride = grid.stride
+		offset_x = grid.offset_x
+		offset_y = grid.offset_y
+
+		# the heap contains (estimated distance, node index), the index is ordered like the
+		# coords, so nodes are processed in the same order as in FindPath
+		heap = []
+		for coords in source_coords:
+			index = grid.index(coords)
+			seen[index] = search
+			parent[index] = None
+			dist[index] = 0
+			heappush(heap, (Point(*coords).distance(destination), index))
+
+		if self.diagonal:
+			neighbors = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+		else:
+			neighbors = ((-1, 0), (1, 0), (0, -1), (0, 1))
+		neighbors = [ (dx, dy, dx * stride + dy) for (dx, dy) in neighbors ]
+
+		while heap:
+			index = heappop(heap)[1]
+			x, y = divmod(index, stride)
+			x += offset_x
+			y += offset_y
+			cur_node_coords = (x, y)
+			dist_to_neighbor = dist[index] + path_nodes.get(cur_node_coords, 0)
+
+			for dx, dy, offset in neighbors:
+				neighbor_index = index + offset
+				if seen[neighbor_index] >= search:
+					# the neighbor is already known, the first path to it is never improved (see FindPath)
+					continue
+				neighbor_node = (x + dx, y + dy)
+				if (neighbor_node in path_nodes or neighbor_node in source_coords or \
+				    neighbor_node in dest_coords) and neighbor_node not in blocked_coords:
+					seen[neighbor_index] = search
+					parent[neighbor_index] = index
+					dist[neighbor_index] = dist_to_neighbor
+					heappush(heap, (distance_to_tuple(neighbor_node) + dist_to_neighbor, neighbor_index))
+
+			if cur_node_coords in dest_coords:
+				path = []
+				while index is not None:
+					path.append(grid.coords(index))
+					index = parent[index]
+				path.reverse()
+				return path
+
+		return None
+
+
+
 """
 def check_path(path, blocked_coords):
 	"" debug function to check if a path is valid ""
@@ -21,6 +21,8 @@
 
 import logging
 
+from horizons.world.pathfinding.pathcache import PathCache
+
 class PathNodes(object):
 	"""
 	Abstract class; used to derive list of path nodes from, which is used for pathfinding.
@@ -60,6 +62,7 @@ class IslandPathNodes(PathNodes):
 	reset_tile_walkablity has to be called when the terrain changes the walkability
 	(e.g. building construction, a flood, or whatever)
 	is_walkable rechecks the walkability status of a coordinate
+	self.path_cache: PathCache for paths on road_nodes, kept up to date by the methods above
 	"""
 	def __init__(self, island):
 		super(IslandPathNodes, self).__init__()
@@ -77,13 +80,18 @@ class IslandPathNodes(PathNodes):
 		# nodes where a real road is built on.
 		self.road_nodes = {}
 
+		self.path_cache = PathCache()
+
 	def register_road(self, road):
 		for i in road.position:
 			self.road_nodes[ (i.x, i.y) ] = self.NODE_DEFAULT_SPEED
+		# a new road can make any path shorter or possible
+		self.path_cache.clear()
 
 	def unregister_road(self, road):
 		for i in road.position:
 			del self.road_nodes[ (i.x, i.y) ]
+			self.path_cache.invalidate( (i.x, i.y) )
 
 	def is_road(self, x, y):
 		"""Return if there is a road on (x, y)"""
@@ -117,6 +125,8 @@ class IslandPathNodes(PathNodes):
 		You need to call this when a tile changes, e.g. when a building is built on it. this
 		is currently done in add/remove_building
 		@param coord: tuple: (x, y)"""
+		# paths starting or ending in a building on the tile aren't valid any more
+		self.path_cache.invalidate(coord)
 		actually_walkable = self.is_walkable(coord)
 		# TODO: this lookup on a list is O(n), use different data structure here
 		in_list = (coord in self.nodes)
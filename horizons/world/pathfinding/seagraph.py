@@ -0,0 +1,236 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import logging
+
+from collections import deque
+from heapq import heappush, heappop
+
+from horizons.util import Point
+
+class SeaRegion(object):
+	"""Connected water tiles of one cluster of the SeaGraph.
+	Interface:
+	self.id: (cluster x, cluster y, number in cluster), the order is used to break ties
+	self.nodes: {(x, y): speed} of the tiles of the region, like World.water
+	self.center: Point, tile of the region next to its centroid
+	self.neighbors: {region id: distance between the centers} of adjacent regions
+	"""
+	def __init__(self, region_id, coords_list):
+		self.id = region_id
+		self.nodes = dict.fromkeys(coords_list, 1.0)
+		x = float(sum(coords[0] for coords in coords_list)) / len(coords_list)
+		y = float(sum(coords[1] for coords in coords_list)) / len(coords_list)
+		centroid = Point(x, y)
+		self.center = Point(*min(coords_list, key=lambda coords: (centroid.distance(coords), coords)))
+		self.neighbors = {}
+
+	def distance(self, other):
+		return self.center.distance(other.center)
+
+	def __lt__(self, other):
+		return self.id < other.id
+
+	def __str__(self):
+		return "SeaRegion(%s, %d tiles)" % (self.id, len(self.nodes))
+
+
+class SeaGraph(object):
+	"""Hierarchical abstraction of the water of the world, used to speed up long ship trips.
+
+	The world is divided into square clusters of CLUSTER_SIZE tiles. The connected water tiles
+	of a cluster form a SeaRegion; regions that touch (also diagonally, like ships move) are
+	neighbors. A long trip is first searched in this graph of regions, then the real path is
+	searched on the tiles of the regions on the way only (see get_path_nodes).
+
+	Since the regions are exactly as connected as the tiles, a trip that is impossible in
+	the graph is impossible on the tiles.
+
+	update() has to be called when the walkability of water tiles changes.
+	"""
+	log = logging.getLogger("world.pathfinding")
+
+	CLUSTER_SIZE = 16
+
+	# searches from source to destination closer than this use all water directly
+	MIN_DISTANCE = 2 * CLUSTER_SIZE
+
+	NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+	def __init__(self, water):
+		"""
+		@param water: {(x, y): speed}, World.water
+		"""
+		self.water = water
+		self.region_of = {} # {(x, y): SeaRegion}
+		self.regions = {} # {region id: SeaRegion}
+
+		clusters = {}
+		for coords in water:
+			cluster = self.get_cluster(coords)
+			if cluster in clusters:
+				clusters[cluster].append(coords)
+			else:
+				clusters[cluster] = [coords]
+
+		for cluster in sorted(clusters):
+			self._init_cluster(cluster, clusters[cluster])
+		for region in self.regions.itervalues():
+			self._connect(region)
+
+	def get_cluster(self, coords):
+		"""Returns the cluster of a tile as (cluster x, cluster y)"""
+		return (coords[0] // self.CLUSTER_SIZE, coords[1] // self.CLUSTER_SIZE)
+
+	def _init_cluster(self, cluster, coords_list):
+		"""Creates the regions of the water tiles in coords_list, which make up a cluster"""
+		offsets = self.NEIGHBOR_OFFSETS
+		remaining = set(coords_list)
+		number = 0
+		for start in sorted(coords_list):
+			if start not in remaining:
+				continue
+			remaining.remove(start)
+			region_coords = [start]
+			queue = deque([start])
+			while queue:
+				x, y = queue.popleft()
+				for dx, dy in offsets:
+					coords = (x + dx, y + dy)
+					if coords in remaining:
+						remaining.remove(coords)
+						region_coords.append(coords)
+						queue.append(coords)
+
+			region = SeaRegion((cluster[0], cluster[1], number), region_coords)
+			number += 1
+			self.regions[region.id] = region
+			for coords in region_coords:
+				self.region_of[coords] = region
+
+	def _connect(self, region):
+		"""Adds the neighbors of region, and region as their neighbor"""
+		region_of = self.region_of
+		offsets = self.NEIGHBOR_OFFSETS
+		cluster = region.id[:2]
+		size = self.CLUSTER_SIZE
+		for (x, y) in region.nodes:
+			if 0 < x % size < size - 1 and 0 < y % size < size - 1:
+				continue # not at the border of the cluster
+			for dx, dy in offsets:
+				other = region_of.get((x + dx, y + dy))
+				if other is not None and other.id[:2] != cluster and other.id not in region.neighbors:
+					distance = region.distance(other)
+					region.neighbors[other.id] = distance
+					other.neighbors[region.id] = distance
+
+	def update(self, coords_list):
+		"""Rebuilds the clusters containing coords_list after changes of self.water there.
+		@param coords_list: iterable of tuples, tiles that have been added to or removed from water"""
+		size = self.CLUSTER_SIZE
+		for cluster in sorted(set(self.get_cluster(coords) for coords in coords_list)):
+			left, top = cluster[0] * size, cluster[1] * size
+			# remove old regions
+			for region in [ region for region in self.regions.itervalues() if region.id[:2] == cluster ]:
+				for neighbor_id in region.neighbors:
+					del self.regions[neighbor_id].neighbors[region.id]
+				for coords in region.nodes:
+					del self.region_of[coords]
+				del self.regions[region.id]
+
+			water_coords = [ (x, y) for x in xrange(left, left + size) for y in xrange(top, top + size) \
+			                 if (x, y) in self.water ]
+			self._init_cluster(cluster, water_coords)
+			for region in self.regions.values():
+				if region.id[:2] == cluster:
+					self._connect(region)
+
+	def get_path_nodes(self, source, destination):
+		"""Returns path nodes for a ship path search from source to destination.
+		For long trips these are the tiles of the regions on the way, else all water.
+		@param source, destination: Rect, Point or BasicBuilding
+		@return: dict {(x, y): speed} or None if there is no way to the destination"""
+		if hasattr(source, 'position'):
+			source = source.position
+		if hasattr(destination, 'position'):
+			destination = destination.position
+
+		source_regions = set()
+		for coords in source.get_coordinates():
+			region = self.region_of.get(coords)
+			if region is None:
+				return self.water # e.g. ship at the coast, just search everywhere
+			source_regions.add(region)
+
+		dest_regions = set()
+		for coords in destination.get_coordinates():
+			region = self.region_of.get(coords)
+			if region is not None:
+				dest_regions.add(region)
+		if not dest_regions:
+			return None # ships can only reach water
+
+		if min(destination.distance(region.center) for region in source_regions) < self.MIN_DISTANCE:
+			return self.water
+
+		way = self._search(source_regions, dest_regions, destination)
+		if way is None:
+			return None
+		nodes = {}
+		for region in way:
+			nodes.update(region.nodes)
+		return nodes
+
+	def _search(self, source_regions, dest_regions, destination):
+		"""A* in the graph of regions
+		@return: list of regions from a source to a destination region or None"""
+		regions = self.regions
+		parent = {}
+		distance_to = {}
+		checked = set()
+		heap = []
+		for region in sorted(source_regions):
+			parent[region] = None
+			distance_to[region] = 0
+			heappush(heap, (destination.distance(region.center), region))
+
+		while heap:
+			region = heappop(heap)[1]
+			if region in checked:
+				continue # found again with a shorter distance before
+			checked.add(region)
+			if region in dest_regions:
+				way = []
+				while region is not None:
+					way.append(region)
+					region = parent[region]
+				return way
+			distance = distance_to[region]
+			# neighbors are keyed by id, so they are iterated in the same order in every game
+			for neighbor_id, step in region.neighbors.iteritems():
+				neighbor = regions[neighbor_id]
+				neighbor_distance = distance + step
+				if neighbor not in distance_to or neighbor_distance < distance_to[neighbor]:
+					parent[neighbor] = region
+					distance_to[neighbor] = neighbor_distance
+					heappush(heap, (neighbor_distance + destination.distance(neighbor.center), neighbor))
+		return None
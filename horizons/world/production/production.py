@@ -26,7 +26,7 @@ import copy
 from collections import defaultdict, deque
 
 from horizons.util.changelistener import metaChangeListenerDecorator, ChangeListener
-from horizons.constants import PRODUCTION
+from horizons.constants import PRODUCTION, RES
 from horizons.world.production.productionline import ProductionLine
 
 from horizons.scheduler import Scheduler
@@ -48,10 +48,8 @@ class Production(ChangeListener):
 	can be observed via ChangeListener interface."""
 	log = logging.getLogger('world.production')
 
-	# optimisation:
 	# the special resource gold is only stored in the player's inventory.
-	# If productions want to use it, they will observer every change of it, which results in
-	# a lot calls. Therefore, this is not done by default but only for few subclasses that actually need it.
+	# Productions of subclasses that set this take the gold they consume from there.
 	USES_GOLD = False
 
 	## INIT/DESTRUCT
@@ -88,6 +86,7 @@ class Production(ChangeListener):
 		self._pause_remaining_ticks = None # only used in pause()
 		self._pause_old_state = pause_old_state # only used in pause()
 		self._creation_tick = creation_tick
+		self._listened_res = [] # [(inventory, res)], see _add_listeners()
 
 		assert isinstance(prod_id, int)
 		self._prod_line = ProductionLine(id=prod_id, data=prod_data)
@@ -345,9 +344,7 @@ class Production(ChangeListener):
 		elif self._check_available_res():
 			# we have space in our inventory and needed res are available
 			# stop listening for res
-			self.inventory.remove_change_listener(self._check_inventory)
-			if self.__class__.USES_GOLD:
-				self.owner_inventory.remove_change_listener(self._check_inventory)
+			self._remove_listeners()
 			self._start_production()
 		else:
 			# we have space in our inventory, but needed res are missing
@@ -382,16 +379,35 @@ class Production(ChangeListener):
 			self._check_inventory()
 
 	def _add_listeners(self):
-		# don't set call_listener_now to true, adding/removing changelisteners wouldn't be atomic any more
-		self.inventory.add_change_listener(self._check_inventory)
-		if self.__class__.USES_GOLD:
-			self.owner_inventory.add_change_listener(self._check_inventory)
+		"""Makes _check_inventory get called when one of the res that we wait for becomes
+		available or the space for the produced res changes.
+		Only the res of the production line are observed, not the whole inventory, since
+		an inventory (especially the settlement's and the player's) changes all the time."""
+		# don't call _check_inventory here, adding/removing listeners wouldn't be atomic any more
+		self._remove_listeners() # thresholds may have changed
+		for res, threshold in self._get_needed_res_thresholds().iteritems():
+			self._listened_res.append( (self._get_res_inventory(res), res) )
+			self._get_res_inventory(res).add_resource_listener(res, self._check_inventory, threshold)
+		for res in self._prod_line.produced_res:
+			self._listened_res.append( (self.inventory, res) )
+			self.inventory.add_resource_listener(res, self._check_inventory)
 
 	def _remove_listeners(self):
-		# depending on state, a check_inventory listener might be active
-		self.inventory.discard_change_listener(self._check_inventory)
-		if self.__class__.USES_GOLD:
-			self.owner_inventory.discard_change_listener(self._check_inventory)
+		# depending on state, check_inventory listeners might be active
+		for inventory, res in self._listened_res:
+			inventory.discard_resource_listener(res, self._check_inventory)
+		self._listened_res = []
+
+	def _get_needed_res_thresholds(self):
+		"""Returns the amounts of the consumed res, at which _check_available_res can change.
+		@return: dict {res: amount}"""
+		return dict( (res, -amount) for res, amount in self._prod_line.consumed_res.iteritems() )
+
+	def _get_res_inventory(self, res):
+		"""Returns the inventory that res is taken from"""
+		if res == RES.GOLD_ID and self.__class__.USES_GOLD:
+			return self.owner_inventory
+		return self.inventory
 
 	def _give_produced_res(self):
 		"""Put produces goods to the inventory"""
@@ -496,6 +512,10 @@ class ProgressProduction(Production):
 				return True
 		return False
 
+	def _get_needed_res_thresholds(self):
+		# any amount is enough to start
+		return dict.fromkeys(self._prod_line.consumed_res, 1)
+
 	def _remove_res_to_expend(self):
 		"""Takes as many res as there are and returns sum of amount of res taken."""
 		taken = 0
@@ -67,6 +67,10 @@ class UnitProduction(ChangingProduction):
 				return True
 		return False
 
+	def _get_needed_res_thresholds(self):
+		# any amount is enough to continue
+		return dict.fromkeys(self._prod_line.consumed_res, 1)
+
 	def _remove_res_to_expend(self, return_without_gold=False):
 		"""Takes as many res as there are and returns sum of amount of res taken.
 		@param return_without_gold: return not an integer but a tuple, where the second value is without gold"""
@@ -98,9 +102,7 @@ class UnitProduction(ChangingProduction):
 		# check if there were res
 		if removed_res == 0:
 			# watch inventory for new res
-			self.inventory.add_change_listener(self._check_inventory)
-			if self.__class__.USES_GOLD:
-				self.owner_inventory.add_change_listener(self._check_inventory)
+			self._add_listeners()
 			self._state = PRODUCTION.STATES.waiting_for_res
 			self._changed()
 			return
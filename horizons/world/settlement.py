@@ -31,6 +31,7 @@ from horizons.util.shapes.rect import Rect
 from horizons.util.messaging.message import UpgradePermissionsChanged
 from horizons.util.changelistener import ChangeListener
 from horizons.world.componentholder import ComponentHolder
+from horizons.world.buildability import BuildabilityCache
 from horizons.world.component.tradepostcomponent import TradePostComponent
 from horizons.world.production.producer import Producer
 from horizons.world.resourcehandler import ResourceHandler
@@ -68,6 +69,7 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		self.produced_res = defaultdict(lambda : 0) # dictionary of all resources, produced at this settlement
 		self.buildings_by_id = defaultdict(list)
 		self.warehouse = None # this is set later in the same tick by the warehouse itself or load() here
+		self.buildability_cache = BuildabilityCache(self)
 		self.upgrade_permissions = upgrade_permissions
 		self.tax_settings = tax_settings
 
@@ -225,6 +227,7 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		if hasattr(self.owner, 'add_building'):
 			# notify interested players of added building
 			self.owner.add_building(building)
+		self.session.world.checkup_hash.update_building(building)
 
 	def remove_building(self, building):
 		"""Properly removes a building from the settlement"""
@@ -235,6 +238,7 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		if hasattr(self.owner, 'remove_building'):
 			# notify interested players of removed building
 			self.owner.remove_building(building)
+		self.session.world.checkup_hash.remove_building(building)
 
 	def count_buildings(self, id):
 		"""Returns the number of buildings in the settlement that are of the given type."""
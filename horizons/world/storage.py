@@ -44,16 +44,21 @@ import copy
 from collections import defaultdict
 
 from horizons.util import ChangeListener
+from horizons.util.python.weakmethod import WeakMethod
 
 class GenericStorage(ChangeListener):
 	"""The GenericStorage represents a storage for buildings/units/players/etc. for storing
 	resources. The GenericStorage is the general form and is mostly used as baseclass to
 	derive storages with special function from it. Normally there should be no need to
 	use the GenericStorage. Rather use a specialized version that is suitable for the job.
+
+	Besides the change listeners, which are called on every change, there are resource
+	listeners that only observe a single resource (see add_resource_listener()).
 	"""
 	def __init__(self):
 		super(GenericStorage, self).__init__()
 		self._storage = defaultdict(lambda : 0)
+		self._resource_listeners = {} # {res: [ [WeakMethod, threshold] ]}
 
 	def save(self, db, ownerid):
 		for slot in self._storage.iteritems():
@@ -73,21 +78,107 @@ class GenericStorage(ChangeListener):
 		@param amount: int amount that is to be changed. Can be negative to remove resources.
 		@return: int - amount that did not fit or was not available, depending on context.
 		"""
+		old_amount = self._storage[res]
 		self._storage[res] += amount
 		self._changed()
+		if res in self._resource_listeners:
+			self._resource_changed(res, old_amount)
 		return 0
 
 	def reset(self, res):
 		"""Resets a resource slot to zero, removing all it's contents."""
 		if res in self._storage:
+			old_amount = self._storage[res]
 			self._storage[res] = 0
 			self._changed()
+			if res in self._resource_listeners:
+				self._resource_changed(res, old_amount)
 
 	def reset_all(self):
 		"""Removes every resource from this inventory"""
+		old_amounts = dict(self._storage)
 		for res in self._storage:
 			self._storage[res] = 0
 		self._changed()
+		for res, old_amount in old_amounts.iteritems():
+			if res in self._resource_listeners:
+				self._resource_changed(res, old_amount)
+
+	## Resource listeners
+	def add_resource_listener(self, res, listener, threshold=None):
+		"""Calls listener when the amount of res changes.
+		Productions waiting for a resource only care about whether there is enough of it,
+		which is what the threshold is for: if it is given, listener is only called when the
+		amount crosses it, i.e. changes from below threshold to at least threshold or vice versa.
+		Listeners without threshold are also called when the free space for res changes
+		(see get_free_space_for()).
+		Adding a listener for res again just updates its threshold.
+		@param res: int res id
+		@param listener: callable, only weakly referenced
+		@param threshold: int or None
+		"""
+		assert callable(listener)
+		listener = WeakMethod(listener)
+		entries = self._resource_listeners.setdefault(res, [])
+		for entry in entries:
+			if entry[0] == listener:
+				entry[1] = threshold
+				return
+		entries.append([listener, threshold])
+
+	def remove_resource_listener(self, res, listener):
+		entries = self._resource_listeners.get(res, [])
+		for i, entry in enumerate(entries):
+			if entry[0] == listener:
+				entry[0] = None # mark it, in case the listeners of res are being called right now
+				del entries[i]
+				if not entries:
+					del self._resource_listeners[res]
+				return
+		raise ValueError("Tried to remove %s, which doesn't listen to res %s at %s" % (listener, res, self))
+
+	def has_resource_listener(self, res, listener):
+		return res in self._resource_listeners and \
+		       any(entry[0] == listener for entry in self._resource_listeners[res])
+
+	def discard_resource_listener(self, res, listener):
+		"""Remove listener for res if it's there"""
+		if self.has_resource_listener(res, listener):
+			self.remove_resource_listener(res, listener)
+
+	def clear_change_listeners(self):
+		super(GenericStorage, self).clear_change_listeners()
+		self._resource_listeners = {}
+
+	def _resource_changed(self, res, old_amount):
+		"""Calls the listeners of res that are affected by a change from old_amount to the current amount"""
+		new_amount = self[res]
+		if new_amount == old_amount:
+			return
+		for entry in self._resource_listeners[res][:]:
+			threshold = entry[1]
+			if threshold is None or (old_amount < threshold) != (new_amount < threshold):
+				self._call_resource_listener(entry)
+
+	def _space_changed(self, res=None):
+		"""Calls the listeners without threshold, whose free space may have changed without
+		a change of the amount of their res (e.g. limit changes).
+		@param res: only notify the listeners of this res, None for all"""
+		for r in ([res] if res is not None else self._resource_listeners.keys()):
+			for entry in self._resource_listeners.get(r, [])[:]:
+				if entry[1] is None:
+					self._call_resource_listener(entry)
+
+	def _call_resource_listener(self, entry):
+		if entry[0] is None:
+			return # removed by a listener that has been called before
+		try:
+			entry[0]()
+		except ReferenceError, e:
+			# see ChangeListener
+			print 'Warning: the dead are listening to', self, ': ', e
+			import traceback
+			traceback.print_stack()
 
 	def get_limit(self, res=None):
 		"""Returns the current limit of the storage. Please not that this value can have
@@ -171,6 +262,7 @@ class SizedSpecializedStorage(SpecializedStorage):
 		super(SizedSpecializedStorage, self).add_resource_slot(res)
 		assert size >= 0
 		self.__slot_limits[res] = size
+		self._space_changed(res)
 
 	def change_resource_slot_size(self, res, size_diff):
 		"""Changes the amount that can be stored of a certain res slot.
@@ -179,6 +271,7 @@ class SizedSpecializedStorage(SpecializedStorage):
 		@param size_diff: difference to new slot size"""
 		self.__slot_limits[res] += size_diff
 		assert self.__slot_limits[res] >= 0
+		self._space_changed(res)
 
 	def save(self, db, ownerid):
 		super(SizedSpecializedStorage, self).save(db, ownerid)
@@ -217,10 +310,16 @@ class GlobalLimitStorage(GenericStorage):
 		if self.limit < 0:
 			self.limit = 0
 		# remove res that don't fit anymore
+		old_amounts = {}
 		for res, amount in self._storage.iteritems():
 			if amount > self.limit:
+				old_amounts[res] = amount
 				self._storage[res] = self.limit
 		self._changed()
+		for res, old_amount in old_amounts.iteritems():
+			if res in self._resource_listeners:
+				self._resource_changed(res, old_amount)
+		self._space_changed()
 
 	def get_limit(self, res=None):
 		return self.limit
@@ -238,7 +337,11 @@ class TotalStorage(GlobalLimitStorage):
 
 	def alter(self, res, amount):
 		check =  max(0, amount + self.get_sum_of_stored_resources() - self.limit)
-		return check + super(TotalStorage, self).alter(res, amount - check)
+		ret = check + super(TotalStorage, self).alter(res, amount - check)
+		if amount != check and self._resource_listeners:
+			# the free space is shared, so it changed for every res
+			self._space_changed()
+		return ret
 
 	def get_free_space_for(self, res):
 		return self.limit - self.get_sum_of_stored_resources()
@@ -261,7 +261,7 @@ class TradeRoute(ChangeListener):
 	@classmethod
 	def has_route(self, db, worldid):
 		"""Check if a savegame contains route information for a certain ship"""
-		return len(db("SELECT * FROM ship_route WHERE ship_id = ?", worldid)) != 0
+		return db.has_ship_route(worldid)
 
 	def load(self, db):
 		enabled, self.current_waypoint, self.wait_at_load, self.wait_at_unload = \
@@ -0,0 +1,97 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+class UnitGrid(object):
+	"""Spatial index of units for radius queries (see World.get_ships).
+
+	The map is divided into square cells, every cell knows the units whose position is in it.
+	A query only has to check the units in the cells that overlap the circle, so it takes time
+	proportional to the number of units nearby instead of all units.
+
+	Units have to call update() whenever their position changes (see Ship._move_tick).
+	Query results are in the order in which the units have been added, like the unit lists
+	of the world, since callers pick e.g. the first of several equally close enemies.
+	"""
+
+	CELL_SIZE = 16
+
+	def __init__(self):
+		self._cells = {} # {(cell x, cell y): {unit: number}}
+		self._units = {} # {unit: (cell, number)}
+		self._next_number = 0 # numbers give the order of the units
+
+	def _get_cell(self, point):
+		return (point.x // self.CELL_SIZE, point.y // self.CELL_SIZE)
+
+	def add(self, unit):
+		assert unit not in self._units
+		cell = self._get_cell(unit.position)
+		number = self._next_number
+		self._next_number += 1
+		self._units[unit] = (cell, number)
+		self._cells.setdefault(cell, {})[unit] = number
+
+	def remove(self, unit):
+		cell, number = self._units.pop(unit)
+		units = self._cells[cell]
+		del units[unit]
+		if not units:
+			del self._cells[cell]
+
+	def update(self, unit):
+		"""Moves unit to the cell of its current position"""
+		entry = self._units.get(unit)
+		if entry is None: # not in the index, e.g. already removed
+			return
+		old_cell, number = entry
+		cell = self._get_cell(unit.position)
+		if cell == old_cell:
+			return
+		units = self._cells[old_cell]
+		del units[unit]
+		if not units:
+			del self._cells[old_cell]
+		self._units[unit] = (cell, number)
+		self._cells.setdefault(cell, {})[unit] = number
+
+	def get_in_radius(self, position, radius):
+		"""Returns the units whose position is within radius of position (like Circle.contains).
+		@param position: Point
+		@return: list of units"""
+		size = self.CELL_SIZE
+		cells = self._cells
+		found = []
+		for cell_x in xrange(int((position.x - radius) // size), int((position.x + radius) // size) + 1):
+			for cell_y in xrange(int((position.y - radius) // size), int((position.y + radius) // size) + 1):
+				units = cells.get((cell_x, cell_y))
+				if units is None:
+					continue
+				for unit, number in units.iteritems():
+					if unit.position.distance_to_point(position) <= radius:
+						found.append((number, unit))
+		found.sort()
+		return [unit for number, unit in found]
+
+	def __len__(self):
+		return len(self._units)
+
+	def __contains__(self, unit):
+		return unit in self._units
@@ -281,6 +281,7 @@ class FarmAnimal(CollectorAnimal, BuildingCollector):
 	"""
 	job_ordering = JobList.order_by.random
 	grazingTime = 2
+	wait_for_wakeup = False # animals aren't local collectors of their home building
 
 	def __init__(self, home_building, start_hidden=False, **kwargs):
 		super(FarmAnimal, self).__init__(home_building = home_building, \
@@ -105,7 +105,7 @@ class AnimalCollector(BuildingCollector):
 		return self.home_building.animals
 
 	@decorators.make_constants()
-	def check_possible_job_target_for(self, target, res):
+	def check_possible_job_target_for(self, target, res, registered_amounts=None):
 		# An animal can only be collected by one collector.
 		# Since a collector only retrieves one type of res, and
 		# an animal might produce more than one, two collectors
@@ -121,7 +121,7 @@ class AnimalCollector(BuildingCollector):
 		if target.has_collectors():
 			return None
 		else:
-			return super(AnimalCollector, self).check_possible_job_target_for(target, res)
+			return super(AnimalCollector, self).check_possible_job_target_for(target, res, registered_amounts)
 
 	def stop_animal(self):
 		"""Tell animal to stop at the next occasion"""
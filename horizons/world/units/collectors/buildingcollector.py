@@ -43,6 +43,9 @@ class BuildingCollector(Collector):
 	"""
 	job_ordering = JobList.order_by.fewest_available_and_distance
 	pather_class = BuildingCollectorPather
+	# whether to wait for a wakeup by the home building instead of searching again regularly
+	# when there's no job, see CollectingComponent.wait_for_job
+	wait_for_wakeup = True
 
 	def __init__(self, home_building, **kwargs):
 		kwargs['x'] = home_building.position.origin.x
@@ -109,7 +112,15 @@ class BuildingCollector(Collector):
 
 	def apply_state(self, state, remaining_ticks = None):
 		super(BuildingCollector, self).apply_state(state, remaining_ticks)
-		if state == self.states.moving_home:
+		if state == self.states.idle and remaining_ticks > COLLECTORS.DEFAULT_WAIT_TICKS:
+			# only collectors that found no job search that late (see handle_no_possible_job),
+			# so this one was waiting for a wakeup
+			collecting = None if self.home_building is None else \
+			             self.home_building.get_component(CollectingComponent)
+			if collecting is not None and self.wait_for_wakeup:
+				last_search = Scheduler().cur_tick + remaining_ticks - COLLECTORS.MAX_WAIT_TICKS
+				self._wait_for_job(collecting, last_search)
+		elif state == self.states.moving_home:
 			# collector is on its way home
 			self.add_move_callback(self.reached_home)
 			self.add_blocked_callback(self.handle_path_home_blocked)
@@ -146,24 +157,39 @@ class BuildingCollector(Collector):
 			return None
 
 		jobs = JobList(self, self.job_ordering)
-		# iterate all building that provide one of the resources
-		for building in self.get_buildings_in_range(reslist=collectable_res):
-			if self.check_possible_job_target(building): # check if we can pickup here on principle
-				for res in collectable_res:
-					# check if we can get res here now
-					job = self.check_possible_job_target_for(building, res)
-					if job is not None:
-						jobs.append(job)
-
-		# TODO: find out why order of  self.get_buildings_in_range(..) and therefor order of jobs differs from client to client
-		# TODO: find out why WindAnimal.get_job(..) doesn't have this problem
-		# for MP-Games the jobs must have the same ordering to ensure get_best_possible_job(..) returns the same result
-		jobs.sort(key=lambda job: job.object.worldid)
+		registered_amounts = self.get_registered_amounts()
+		# iterate all building that provide one of the resources and where we can pickup on principle
+		for building in self.get_job_targets(collectable_res):
+			for res in collectable_res:
+				# check if we can get res here now
+				job = self.check_possible_job_target_for(building, res, registered_amounts)
+				if job is not None:
+					jobs.append(job)
 
 		return self.get_best_possible_job(jobs)
 
+	def get_job_targets(self, reslist):
+		"""Returns the buildings in range where we may pick up res of reslist, ordered by worldid."""
+		collecting = self.home_building.get_component(CollectingComponent)
+		if collecting is not None:
+			return collecting.get_job_targets(self, reslist)
+		targets = [ building for building in self.get_buildings_in_range(reslist=reslist) \
+		            if self.check_possible_job_target(building) ]
+		targets.sort(key=lambda building: building.worldid)
+		return targets
+
 	def search_job(self):
 		self._clean_job_history_log()
+		collecting = None if self.home_building is None else \
+		             self.home_building.get_component(CollectingComponent)
+		if collecting is not None:
+			# the home building searches jobs for all its collectors at once
+			collecting.request_job(self)
+		else:
+			super(BuildingCollector, self).search_job()
+
+	def dispatch_job(self):
+		"""Called by the CollectingComponent of the home building to search a job now"""
 		super(BuildingCollector, self).search_job()
 
 	def _clean_job_history_log(self):
@@ -173,11 +199,27 @@ class BuildingCollector(Collector):
 			self._job_history.popleft()
 
 	def handle_no_possible_job(self):
-		super(BuildingCollector, self).handle_no_possible_job()
+		collecting = None if self.home_building is None else \
+		             self.home_building.get_component(CollectingComponent)
+		if collecting is not None and self.wait_for_wakeup:
+			# wait for a change that could provide a job. Changes without a wakeup, like roads
+			# built out of range, are noticed when searching again after a while.
+			self.log.debug("%s: found no possible job, waiting", self)
+			Scheduler().add_new_object(self.search_job, self, COLLECTORS.MAX_WAIT_TICKS)
+			self._wait_for_job(collecting, Scheduler().cur_tick)
+		else:
+			super(BuildingCollector, self).handle_no_possible_job()
 		# only append a new element if it is different from the last one
 		if not self._job_history or abs(self._job_history[-1][1]) > 1e-9:
 			self._job_history.append((Scheduler().cur_tick, 0))
 
+	def _wait_for_job(self, collecting, last_search):
+		"""Registers at the CollectingComponent of the home building to be woken up
+		when a job could be possible, see CollectingComponent.wait_for_job"""
+		collectable_res = self.get_collectable_res()
+		targets = self.get_job_targets(collectable_res) if collectable_res else []
+		collecting.wait_for_job(self, targets, last_search)
+
 	def begin_current_job(self, job_location = None):
 		super(BuildingCollector, self).begin_current_job(job_location)
 		max_amount = min(self.get_component(StorageComponent).inventory.get_limit(self.job.res), self.job.object.get_component(StorageComponent).inventory.get_limit(self.job.res))
@@ -333,6 +375,7 @@ class FisherShipCollector(BuildingCollector):
 
 class DisasterRecoveryCollector(StorageCollector):
 	"""Collects disasters such as fire or pestilence."""
+	wait_for_wakeup = False # disasters don't change inventories
 	def finish_working(self, collector_already_home=False):
 		super(DisasterRecoveryCollector, self).finish_working(collector_already_home=collector_already_home)
 		building = self.job.object
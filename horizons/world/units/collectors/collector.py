@@ -26,6 +26,7 @@ from horizons.scheduler import Scheduler
 
 from horizons.world.pathfinding import PathBlockedError
 from horizons.util import WorldObject, decorators, Callback
+from horizons.util.messaging.message import PickupReservationFreed
 from horizons.ext.enum import Enum
 from horizons.world.units.unit import Unit
 from horizons.constants import COLLECTORS
@@ -148,15 +149,12 @@ class Collector(Unit):
 		super(Collector, self).load(db, worldid)
 
 		# load collector properties
-		state_id, remaining_ticks, start_hidden = \
-		        db("SELECT state, remaining_ticks, start_hidden FROM collector \
-		            WHERE rowid = ?", worldid)[0]
+		state_id, remaining_ticks, start_hidden = db.get_collector_row(worldid)
 		self.__init(self.states[state_id], start_hidden)
 
 		# load job
-		job_db = db("SELECT object, resource, amount FROM collector_job WHERE rowid = ?", worldid)
-		if(len(job_db) > 0):
-			job_db = job_db[0]
+		job_db = db.get_collector_job(worldid)
+		if job_db is not None:
 			# create job with worldid of object as object. This is used to defer the target resolution,
 			# which might not have been loaded
 			self.job = Job(job_db[0], job_db[1], job_db[2])
@@ -255,12 +253,22 @@ class Collector(Unit):
 
 		return True
 
+	def get_registered_amounts(self):
+		"""Returns the amounts of resources that colleague collectors are getting.
+		@return: dict {res: amount}"""
+		amounts = {}
+		for collector in self.get_colleague_collectors():
+			if collector.job is not None:
+				amounts[collector.job.res] = amounts.get(collector.job.res, 0) + collector.job.amount
+		return amounts
+
 	@decorators.make_constants()
-	def check_possible_job_target_for(self, target, res):
+	def check_possible_job_target_for(self, target, res, registered_amounts=None):
 		"""Checks out if we could get res from target.
 		Does _not_ check for anything else (e.g. if we are able to walk there).
 		@param target: possible target. buildings are supported, support for more can be added.
 		@param res: resource id
+		@param registered_amounts: return value of get_registered_amounts, pass it when checking many targets
 		@return: instance of Job or None, if we can't collect anything
 		"""
 		res_amount = target.get_available_pickup_amount(res, self)
@@ -270,10 +278,9 @@ class Collector(Unit):
 
 		# check if other collectors get this resource, because our inventory could
 		# get full if they arrive.
-		total_registered_amount_consumer = sum([ collector.job.amount for collector in \
-		                                         self.get_colleague_collectors() if \
-		                                         collector.job is not None and \
-		                                         collector.job.res == res ])
+		if registered_amounts is None:
+			registered_amounts = self.get_registered_amounts()
+		total_registered_amount_consumer = registered_amounts.get(res, 0)
 
 		inventory = self.get_home_inventory()
 
@@ -414,6 +421,7 @@ class Collector(Unit):
 				# in the moving_home state, the job object still exists,
 				# but the collector is already deregistered
 				self.job.object.remove_incoming_collector(self)
+				self.session.message_bus.broadcast(PickupReservationFreed(self.job.object))
 			# clean up depending on state
 			if self.state == self.states.working:
 				removed_calls = Scheduler().rem_call(self, self.finish_working)
@@ -309,7 +309,7 @@ class MovingObject(ComponentHolder, ConcreteObject):
 
 	def load(self, db, worldid):
 		super(MovingObject, self).load(db, worldid)
-		x, y = db("SELECT x, y FROM unit WHERE rowid = ?", worldid)[0]
+		x, y = db.get_unit_row(worldid)[:2]
 		self.__init(x, y)
 		path_loaded = self.path.load(db, worldid)
 		if path_loaded:
@@ -67,6 +67,8 @@ class Ship(Unit):
 	def __init(self):
 		# register ship in world
 		self.session.world.ships.append(self)
+		self.session.world.ship_grid.add(self)
+		self.session.world.checkup_hash.update_ship(self)
 		if self.in_ship_map:
 			self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
 
@@ -75,6 +77,8 @@ class Ship(Unit):
 
 	def remove(self):
 		self.session.world.ships.remove(self)
+		self.session.world.ship_grid.remove(self)
+		self.session.world.checkup_hash.remove_ship(self)
 		if self.session.view.has_change_listener(self.draw_health):
 			self.session.view.remove_change_listener(self.draw_health)
 		if self.in_ship_map:
@@ -101,6 +105,9 @@ class Ship(Unit):
 					self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
 				raise
 
+		self.session.world.ship_grid.update(self)
+		self.session.world.checkup_hash.update_ship(self)
+
 		if self.in_ship_map:
 			# save current and next position for ship, since it will be between them
 			self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
@@ -168,7 +168,7 @@ class Unit(MovingObject):
 	def load(self, db, worldid):
 		super(Unit, self).load(db, worldid)
 
-		x, y, owner_id = db("SELECT x, y, owner FROM unit WHERE rowid = ?", worldid)[0]
+		x, y, owner_id = db.get_unit_row(worldid)
 		if (owner_id == 0):
 			owner = None
 		else:
@@ -37,31 +37,13 @@ except ImportError:
 	sys.exit(1)
 
 
-from horizons.ext.dummy import Dummy
-
-
 def mock_fife_and_gui():
 	"""
-	Using a custom import hook, we catch all imports of fife, horizons.gui and enet
-	and provide a dummy module. Unfortunately horizons.gui has to be mocked too,
-	pychan will fail otherwise (isinstance checks that Dummy fails, metaclass
-	errors - pretty bad stuff).
+	The tests run without engine and gui, see run_uh.setup_headless.
 	"""
-	class Importer(object):
-
-		def find_module(self, fullname, path=None):
-			if fullname.startswith('fife') or \
-			   fullname.startswith('horizons.gui') or \
-			   fullname.startswith('enet'):
-				return self
-
-			return None
-
-		def load_module(self, name):
-			mod = sys.modules.setdefault(name, Dummy())
-			return mod
+	from run_uh import setup_headless
+	setup_headless()
 
-	sys.meta_path = [Importer()]
 
 def setup_horizons():
 	"""
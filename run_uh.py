@@ -180,8 +180,16 @@ def get_option_parser():
 	                     help="Create an multiplayer game with default settings.")
 	dev_group.add_option("--join-mp-game", action="store_true", dest="join_mp_game", \
 	                     help="Join first multiplayer game.")
+	dev_group.add_option("--headless", dest="headless", action="store_true", default=False, \
+	                     help="Run the game without engine and gui as fast as possible and print the ticks per second. Requires --ticks and a map option.")
+	dev_group.add_option("--ticks", dest="ticks", metavar="<ticks>", type="int", \
+	                     help="Number of ticks to run in headless mode.")
 	dev_group.add_option("--interactive-shell", action="store_true", dest="interactive_shell",
 	                     help="Starts an IPython kernel. Connect to the shell with: ipython console --existing")
+	dev_group.add_option("--startup-report", dest="startup_report", metavar="<filename>", \
+	                     help="Write the duration of the startup and loading phases to <filename> on exit: as JSON if it ends with .json, else as a tree. Use - for stdout.")
+	dev_group.add_option("--profile-scheduler", dest="profile_scheduler", metavar="<filename>", \
+	                     help="Measure the scheduled callbacks and write them to <filename> on exit: as CSV if it ends with .csv, else for development/print_profile_output.py. Prints the tick durations.")
 	p.add_option_group(dev_group)
 
 	return p
@@ -223,6 +231,8 @@ def exithandler(exitcode, signum, frame):
 	sys.exit(exitcode)
 
 def main():
+	start_time = time.time()
+
 	# abort silently on signal
 	signal.signal(signal.SIGINT, functools.partial(exithandler, 130))
 	signal.signal(signal.SIGTERM, functools.partial(exithandler, 1))
@@ -239,8 +249,12 @@ def main():
 	options = get_option_parser().parse_args()[0]
 	setup_debugging(options)
 
-	# NOTE: this might cause a program restart
-	init_environment()
+	if options.headless:
+		gettext.install('', unicode=True)
+		setup_headless()
+	else:
+		# NOTE: this might cause a program restart
+		init_environment()
 
 	# test if required libs can be found or display specific error message
 	try:
@@ -254,6 +268,14 @@ def main():
 
 	#start UH
 	import horizons.main
+	if options.startup_report:
+		from horizons.util.phasetimer import PhaseTimer
+		PhaseTimer.enable(start_time)
+		PhaseTimer.mark('modules imported')
+	if options.profile_scheduler:
+		from horizons.scheduler import Scheduler
+		from horizons.schedulerprofiler import SchedulerProfiler
+		Scheduler.profiler = SchedulerProfiler()
 	ret = True
 	if not options.profile:
 		# start normal
@@ -275,6 +297,13 @@ def main():
 		profile.runctx('horizons.main.start(options)', globals(), locals(), outfilename)
 		print('Program ended. Profiling output: %s' % outfilename)
 
+	if options.startup_report:
+		PhaseTimer.write_report(options.startup_report)
+	if options.profile_scheduler:
+		print(Scheduler.profiler.format_summary())
+		Scheduler.profiler.write(options.profile_scheduler)
+		print('Scheduler profile: %s' % options.profile_scheduler)
+
 	if logfile:
 		logfile.close()
 	if ret:
@@ -375,6 +404,31 @@ def setup_fife(args):
 			args.remove(arg)
 
 
+def setup_headless():
+	"""Replaces fife, enet and horizons.gui with dummy modules, so the game can run without them.
+	Unfortunately horizons.gui has to be mocked too, pychan will fail otherwise (isinstance
+	checks that Dummy fails, metaclass errors - pretty bad stuff).
+	Using a custom import hook, we catch all imports of these modules and provide a dummy.
+	"""
+	from horizons.ext.dummy import Dummy
+
+	class Importer(object):
+
+		def find_module(self, fullname, path=None):
+			if fullname.startswith('fife') or \
+			   fullname.startswith('horizons.gui') or \
+			   fullname.startswith('enet'):
+				return self
+
+			return None
+
+		def load_module(self, name):
+			mod = sys.modules.setdefault(name, Dummy())
+			return mod
+
+	sys.meta_path = [Importer()]
+
+
 def init_environment():
 	"""Sets up everything. Use in any program that requires access to FIFE and uh modules.
 	It will parse sys.args, so this var has to contain only valid uh options."""
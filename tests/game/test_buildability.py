@@ -0,0 +1,74 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import mock
+
+from horizons.command.building import Build, Tear
+from horizons.constants import BUILDINGS
+from horizons.entities import Entities
+from horizons.util import Point
+from horizons.world.building.buildable import Buildable
+
+from tests.game import game_test, settle
+
+
+def check_all(s, settlement):
+	"""Returns the results of check_build and is_tile_buildable for a few building classes
+	at every position of the settlement."""
+	results = []
+	for building_id in (BUILDINGS.TREE_CLASS, BUILDINGS.TRAIL_CLASS, BUILDINGS.LUMBERJACK_CLASS,
+	                    BUILDINGS.RESIDENTIAL_CLASS, BUILDINGS.FISHERMAN_CLASS):
+		cls = Entities.buildings[building_id]
+		for coords in sorted(settlement.ground_map):
+			for rotation in (45, 135):
+				build = cls.check_build(s, Point(*coords), rotation=rotation)
+				results.append((building_id, coords, rotation, build.buildable, build.problem, sorted(build.tearset)))
+			tile = settlement.ground_map[coords]
+			results.append((building_id, coords, cls.is_tile_buildable(s, tile, None)))
+	return results
+
+def assert_same_as_uncached(s, settlement):
+	cached = check_all(s, settlement)
+	with mock.patch.object(Buildable, '_get_cached_buildability', classmethod(lambda cls, session, position: None)):
+		uncached = check_all(s, settlement)
+	assert cached == uncached
+	return cached
+
+
+@game_test
+def test_buildability_cache(s, p):
+	"""The buildability cache must not change the results of the build checks."""
+	settlement, island = settle(s)
+	assert_same_as_uncached(s, settlement)
+
+	# changes after the cache has been calculated: buildings, trees that can be built upon, expansion
+	assert Build(BUILDINGS.LUMBERJACK_CLASS, 30, 30, island, settlement=settlement)(p)
+	for x in xrange(25, 30):
+		assert Build(BUILDINGS.TREE_CLASS, x, 35, island, settlement=settlement)(p)
+		assert Build(BUILDINGS.TRAIL_CLASS, x, 28, island, settlement=settlement)(p)
+	tent = Build(BUILDINGS.STORAGE_CLASS, 37, 30, island, settlement=settlement)(p)
+	assert tent
+	results = assert_same_as_uncached(s, settlement)
+	assert [r for r in results if len(r) == 3 and r[2]] # something is still buildable
+
+	Tear(tent)(p)
+	Tear(island.ground_map[(26, 35)].object)(p)
+	assert_same_as_uncached(s, settlement)
@@ -0,0 +1,81 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from horizons.command.building import Build
+from horizons.command.unit import CreateUnit
+from horizons.constants import BUILDINGS, RES, UNITS
+from horizons.world.checkuphash import CheckupHash
+from horizons.world.component.storagecomponent import StorageComponent
+
+from tests.game import game_test, settle
+
+
+def rebuild_digest(world):
+	"""Returns the digest of a CheckupHash that has seen the current state only."""
+	checkup_hash = CheckupHash()
+	for settlement in world.settlements:
+		checkup_hash.add_settlement(settlement)
+		for building in settlement.buildings:
+			checkup_hash.update_building(building)
+	for ship in world.ships:
+		checkup_hash.update_ship(ship)
+	return checkup_hash.get_digest()
+
+
+@game_test
+def test_incremental_digest(s, p):
+	"""
+	The incrementally updated digest equals the digest of the final state.
+	"""
+	settlement, island = settle(s)
+	for x in xrange(25, 35, 2):
+		assert Build(BUILDINGS.RESIDENTIAL_CLASS, x, 30, island, settlement=settlement)(p)
+	ship_position = s.world.get_random_possible_ship_position()
+	ship = CreateUnit(p.worldid, UNITS.PLAYER_SHIP_CLASS, ship_position.x, ship_position.y)(issuer=p)
+	s.world.get_checkup_hash()
+
+	ship.move(s.world.get_random_possible_ship_position())
+	s.run(seconds=60)
+	assert s.world.checkup_hash.get_digest() == rebuild_digest(s.world)
+
+	ship.remove()
+	assert s.world.checkup_hash.get_digest() == rebuild_digest(s.world)
+
+
+@game_test
+def test_digest_changes(s, p):
+	"""
+	Moving amounts between the slots of an inventory changes the digest, undoing it restores it.
+	"""
+	settlement, island = settle(s)
+	inventory = settlement.get_component(StorageComponent).inventory
+	inventory.alter(RES.TOOLS_ID, -5)
+	inventory.alter(RES.BOARDS_ID, -5)
+	digest = s.world.checkup_hash.get_digest()
+
+	inventory.alter(RES.TOOLS_ID, 5)
+	inventory.alter(RES.BOARDS_ID, -5)
+	assert s.world.checkup_hash.get_digest() != digest
+
+	inventory.alter(RES.BOARDS_ID, 5)
+	inventory.alter(RES.TOOLS_ID, -5)
+	assert s.world.checkup_hash.get_digest() == digest
@@ -0,0 +1,100 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from horizons.command.building import Build
+from horizons.constants import BUILDINGS, COLLECTORS, RES
+from horizons.scheduler import Scheduler
+from horizons.world.component.collectingcompontent import CollectingComponent
+from horizons.world.component.storagecomponent import StorageComponent
+
+from tests.game import game_test, settle
+
+
+@game_test
+def test_job_search_once_per_tick(s, p):
+	"""
+	Collectors of a building that search a job in the same tick share the lookup of targets.
+	"""
+	settlement, island = settle(s)
+	farm = Build(BUILDINGS.FARM_CLASS, 30, 30, island, settlement=settlement)(p)
+	collectors = farm.get_component(CollectingComponent).get_local_collectors()
+	assert len(collectors) > 1
+
+	lookups = []
+	def count_lookups(collector):
+		get_buildings_in_range = collector.get_buildings_in_range
+		def wrapper(*args, **kwargs):
+			lookups.append(collector)
+			return get_buildings_in_range(*args, **kwargs)
+		collector.get_buildings_in_range = wrapper
+	for collector in collectors:
+		count_lookups(collector)
+		Scheduler().rem_call(collector, collector.search_job)
+		Scheduler().add_new_object(collector.search_job, collector, 1)
+
+	s.run()
+	assert len(lookups) == 1
+
+
+@game_test
+def test_wakeup_on_target_change(s, p):
+	"""
+	Collectors without a job are woken up when a possible target produces something,
+	instead of waiting for their next regular job search.
+	"""
+	settlement, island = settle(s)
+	farm = Build(BUILDINGS.FARM_CLASS, 30, 30, island, settlement=settlement)(p)
+	collecting = farm.get_component(CollectingComponent)
+	pasture = Build(BUILDINGS.PASTURE_CLASS, 27, 30, island, settlement=settlement)(p)
+	assert pasture
+
+	s.run(seconds=2)
+	assert collecting.get_waiting_collectors()
+
+	# wait until the pasture produced something
+	pasture_inventory = pasture.get_component(StorageComponent).inventory
+	while not pasture_inventory[RES.LAMB_WOOL_ID]:
+		s.run()
+	assert not collecting.get_waiting_collectors()
+
+	s.run(COLLECTORS.DEFAULT_WAIT_TICKS)
+	assert [collector for collector in collecting.get_local_collectors() if collector.job is not None]
+
+
+@game_test
+def test_wakeup_on_new_building(s, p):
+	"""
+	Collectors without a job are woken up when a building is built in range.
+	"""
+	settlement, island = settle(s)
+	farm = Build(BUILDINGS.FARM_CLASS, 30, 30, island, settlement=settlement)(p)
+	collecting = farm.get_component(CollectingComponent)
+
+	s.run(seconds=2)
+	waiting = list(collecting.get_waiting_collectors())
+	assert waiting
+
+	assert Build(BUILDINGS.PASTURE_CLASS, 27, 30, island, settlement=settlement)(p)
+	assert not collecting.get_waiting_collectors()
+	for collector in waiting:
+		remaining_ticks = Scheduler().get_remaining_ticks(collector, collector.search_job)
+		assert remaining_ticks <= COLLECTORS.DEFAULT_WAIT_TICKS
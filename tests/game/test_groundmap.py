@@ -0,0 +1,49 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import mock
+
+from horizons.command.building import Build
+from horizons.constants import BUILDINGS
+from horizons.world.groundmap import GroundMap
+
+from tests.game import game_test, new_session, settle, SPTestSession
+
+
+@game_test(manual_session=True)
+@mock.patch.object(SPTestSession, 'compact_ground_maps', True)
+def test_compact_ground_maps():
+	"""
+	A game can be played with the compact ground maps.
+	"""
+	session, player = new_session()
+	assert isinstance(session.world.ground_map, GroundMap)
+	assert isinstance(session.world.full_map, GroundMap)
+
+	settlement, island = settle(session)
+	assert isinstance(island.ground_map, GroundMap)
+	lj = Build(BUILDINGS.LUMBERJACK_CLASS, 30, 30, island, settlement=settlement)(player)
+	assert lj
+	assert session.world.get_tile(lj.position.origin).object is lj
+	assert session.world.full_map[(30, 30)] is island.ground_map[(30, 30)]
+
+	session.run(seconds=30)
+	session.end()
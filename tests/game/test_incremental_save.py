@@ -0,0 +1,175 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import errno
+import os
+import shutil
+import tempfile
+from collections import Counter
+
+import mock
+
+from horizons.command.building import Build, Tear
+from horizons.constants import BUILDINGS
+from horizons.util import DbReader, WorldObject
+from horizons.scheduler import Scheduler
+from horizons.util.incrementalsave import IncrementalSaver
+from horizons.world.production.producer import Producer
+
+from tests.game import game_test, new_session, settle, load_session, _dbreader_convert_dummy_objects
+
+
+def save(session, savegame, incremental):
+	"""Saves like SPTestSession.save, but allows incremental saves."""
+	with mock.patch('horizons.session.SavegameManager'):
+		with _dbreader_convert_dummy_objects():
+			assert session._do_save(savegame, incremental=incremental)
+
+def get_rows(savegame, ignored_tables=('concrete_object', )):
+	"""Returns {table: Counter of rows}, the action runtimes aren't updated incrementally."""
+	db = DbReader(savegame)
+	rows = {}
+	for (table, ) in db("SELECT name FROM sqlite_master WHERE type = 'table'"):
+		if table not in ignored_tables:
+			rows[table] = Counter(db("SELECT * FROM %s" % table))
+	db.close()
+	return rows
+
+
+@game_test(manual_session=True)
+def test_incremental_save():
+	"""
+	An incremental savegame contains the same as a full one and can be loaded.
+	"""
+	session, player = new_session()
+	settlement, island = settle(session)
+	trees = [Build(BUILDINGS.TREE_CLASS, x, 29, island, settlement=settlement)(player) for x in [29, 30, 31, 32]]
+	assert all(trees)
+	lumberjack = Build(BUILDINGS.LUMBERJACK_CLASS, 30, 30, island, settlement=settlement)(player)
+	session.run(seconds=10)
+
+	directory = tempfile.mkdtemp()
+	full = os.path.join(directory, 'full.sqlite')
+	incremental = os.path.join(directory, 'incremental.sqlite')
+	save(session, os.path.join(directory, 'first.sqlite'), False)
+
+	# change a few things
+	Tear(trees[0])(player)
+	hut = Build(BUILDINGS.RESIDENTIAL_CLASS, 25, 25, island, settlement=settlement)(player)
+	assert hut
+	session.run(seconds=20)
+
+	save(session, incremental, True)
+	assert session.incremental_saver.incremental_saves == 1
+	assert 0 < session.incremental_saver.written_objects < session.incremental_saver.saved_objects
+
+	saver = session.incremental_saver
+	session.incremental_saver = IncrementalSaver()
+	save(session, full, False)
+	session.incremental_saver = saver
+	assert get_rows(incremental) == get_rows(full)
+
+	lumberjack_id = lumberjack.worldid
+	hut_id = hut.worldid
+	session.end(keep_map=True)
+	session = load_session(incremental)
+	assert WorldObject.get_object_by_id(lumberjack_id).has_component(Producer)
+	assert WorldObject.get_object_by_id(hut_id)
+	session.run(seconds=20)
+	session.end()
+	shutil.rmtree(directory)
+
+
+@game_test(manual_session=True)
+def test_incremental_save_without_base():
+	"""
+	If the last savegame can't be copied, a full savegame is written instead.
+	"""
+	session, player = new_session()
+	settlement, island = settle(session)
+	assert Build(BUILDINGS.LUMBERJACK_CLASS, 30, 30, island, settlement=settlement)(player)
+	session.run(seconds=10)
+
+	directory = tempfile.mkdtemp()
+	first = os.path.join(directory, 'first.sqlite')
+	second = os.path.join(directory, 'second.sqlite')
+	save(session, first, False)
+
+	disk_full = IOError(errno.ENOSPC, 'No space left on device')
+	with mock.patch('horizons.session.shutil.copyfile', side_effect=disk_full):
+		with mock.patch.object(session.gui, 'show_error_popup') as show_error_popup:
+			save(session, second, True)
+			assert not show_error_popup.called
+	assert session.incremental_saver.incremental_saves == 0
+
+	session.end(keep_map=True)
+	session = load_session(second)
+	session.run(seconds=10)
+	session.end()
+	shutil.rmtree(directory)
+
+
+@game_test(manual_session=True)
+def test_background_save():
+	"""
+	A savegame written in the background contains the state when it was started.
+	"""
+	session, player = new_session()
+	settlement, island = settle(session)
+	assert Build(BUILDINGS.LUMBERJACK_CLASS, 30, 30, island, settlement=settlement)(player)
+	for x in [29, 30, 31, 32]:
+		assert Build(BUILDINGS.TREE_CLASS, x, 29, island, settlement=settlement)(player)
+	session.run(seconds=10)
+
+	directory = tempfile.mkdtemp()
+	foreground = os.path.join(directory, 'foreground.sqlite')
+	background = os.path.join(directory, 'background.sqlite')
+	callback = mock.Mock()
+	with mock.patch('horizons.session.SavegameManager'):
+		with _dbreader_convert_dummy_objects():
+			assert session._do_save(foreground)
+			assert session._do_save(background, callback=callback)
+			session.run(seconds=10) # the game continues while the savegame is written
+			session.wait_for_background_save()
+
+	callback.assert_called_once_with(True)
+	assert session.save_stall_time is not None and session.save_write_time is not None
+	assert get_rows(foreground, ('concrete_object', 'metadata')) == get_rows(background, ('concrete_object', 'metadata'))
+
+	session.end()
+	shutil.rmtree(directory)
+
+
+@game_test
+def test_no_background_save_during_tick(s, p):
+	"""
+	Background saves can't be started during a tick, the snapshot wouldn't be consistent.
+	"""
+	errors = []
+	def save_during_tick():
+		try:
+			s._do_save(os.path.join(tempfile.gettempdir(), 'never_written.sqlite'), callback=mock.Mock())
+		except AssertionError as e:
+			errors.append(e)
+	Scheduler().add_new_object(save_during_tick, None, 1)
+	s.run(2)
+	assert len(errors) == 1
+	assert not Scheduler().in_tick
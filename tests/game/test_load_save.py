@@ -19,6 +19,7 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import json
 import os
 import tempfile
 
@@ -26,7 +27,9 @@ from horizons.command.building import Build
 from horizons.command.production import ToggleActive
 from horizons.command.unit import CreateUnit
 from horizons.constants import BUILDINGS, PRODUCTION, UNITS, COLLECTORS, RES
-from horizons.util import WorldObject, Point
+from horizons.savegamemanager import SavegameManager
+from horizons.util import DbReader, WorldObject, Point
+from horizons.world.minimapraster import MinimapRaster
 from horizons.world.production.producer import Producer
 from horizons.world.component.collectingcompontent import CollectingComponent
 from horizons.world.component.storagecomponent import StorageComponent
@@ -215,3 +218,60 @@ def test_settler_save_load():
 
 	# tile will contain ruin in case of failure
 	assert tile.object.id == BUILDINGS.RESIDENTIAL_CLASS
+
+
+@game_test(manual_session=True)
+def test_waiting_collectors_save_load():
+	"""Collectors that wait for a wakeup keep waiting after save/load"""
+	session, player = new_session()
+	settlement, island = settle(session)
+
+	farm = Build(BUILDINGS.FARM_CLASS, 30, 30, island, settlement=settlement)(player)
+	farm_worldid = farm.worldid
+	pasture = Build(BUILDINGS.PASTURE_CLASS, 27, 30, island, settlement=settlement)(player)
+	pasture_worldid = pasture.worldid
+	del farm, pasture # invalid after save/load
+
+	session.run(seconds=2)
+	waiting = len(WorldObject.get_object_by_id(farm_worldid).get_component(CollectingComponent).get_waiting_collectors())
+	assert waiting
+
+	session = saveload(session)
+	session.run()
+	collecting = WorldObject.get_object_by_id(farm_worldid).get_component(CollectingComponent)
+	assert len(collecting.get_waiting_collectors()) == waiting
+
+	# they are still woken up when the pasture produced something
+	pasture_inventory = WorldObject.get_object_by_id(pasture_worldid).get_component(StorageComponent).inventory
+	while not pasture_inventory[RES.LAMB_WOOL_ID]:
+		session.run()
+	assert not collecting.get_waiting_collectors()
+
+	session.run(COLLECTORS.DEFAULT_WAIT_TICKS)
+	assert [collector for collector in collecting.get_local_collectors() if collector.job is not None]
+
+	session.end()
+
+
+@game_test
+def test_minimap_preview(s, p):
+	"""
+	The minimap that is stored for the map preview shows the islands and settlements
+	"""
+	fd, filename = tempfile.mkstemp()
+	os.close(fd)
+	db = DbReader(filename)
+	db("CREATE TABLE metadata_blob (name TEXT NOT NULL, value BLOB)")
+
+	def get_colors():
+		SavegameManager.write_minimap_data(db, s.world)
+		data = json.loads(SavegameManager.get_minimap_data(filename, SavegameManager.minimap_preview_size))
+		return set(tuple(pixel[2:]) for pixel in data)
+
+	assert get_colors() == set([MinimapRaster.ISLAND_COLOR])
+	settle(s) # the whole island
+	assert get_colors() == set([p.color.to_tuple()])
+	assert SavegameManager.get_minimap_data(filename, (10, 10)) is None
+
+	db.close()
+	os.unlink(filename)
@@ -0,0 +1,52 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import mock
+
+from horizons.command.building import Build
+from horizons.constants import BUILDINGS
+
+from tests.game import game_test, settle
+
+
+@game_test(ai_players=1)
+def test_expansion_callbacks(s, p):
+	"""Players and the minimap are notified once per expansion, with all new coordinates."""
+	ai = [player for player in s.world.players if player is not p][0]
+
+	with mock.patch('horizons.world.island.Minimap') as minimap:
+		update_area = minimap.update_area
+		settlement, island = settle(s)
+		assert update_area.call_count == 1
+		assert len(ai.settlement_expansions) == 1
+		coords, expanded_settlement = ai.settlement_expansions[0]
+		assert expanded_settlement is settlement
+		assert sorted(coords) == sorted(settlement.ground_map)
+		assert sorted(update_area.call_args[0][0]) == sorted(coords)
+
+		# the island of the test map is covered completely already, nothing to notify
+		assert Build(BUILDINGS.STORAGE_CLASS, 37, 28, island, settlement=settlement)(p)
+		assert update_area.call_count == 1
+		assert len(ai.settlement_expansions) == 1
+
+	# the ai processes the batches like single coordinates before
+	ai.handle_enemy_expansions()
+	assert ai.settlement_expansions == []
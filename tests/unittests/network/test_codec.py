@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import cPickle
+from unittest import TestCase
+
+from horizons.command.building import Build
+from horizons.command.misc import Chat
+from horizons.command.unit import Act
+from horizons.manager import CommandPacket, CheckupHashPacket
+from horizons.network.packets import codec, unserialize, client
+
+
+class Dummy(object):
+	def __init__(self, worldid):
+		self.worldid = worldid
+
+
+class TestCodec(TestCase):
+
+	def roundtrip(self, packets):
+		return codec.decode(codec.encode(packets))
+
+	def test_empty_tick(self):
+		data = codec.encode([CommandPacket(123456, 1, [])])
+		self.assertTrue(len(data) <= 12)
+		packet, = codec.decode(data)
+		self.assertEqual(packet.__class__, CommandPacket)
+		self.assertEqual((packet.tick, packet.player_id, packet.commandlist), (123456, 1, []))
+
+	def test_commands(self):
+		commands = [Build(7, 12, 300, Dummy(1001), settlement=Dummy(1002), tearset=set([5, 3])),
+		            Act(Dummy(2000), 17, -3), Chat(u'h\xe4llo')]
+		checkup_hash = (0.123456789, 2**64 - 1, 0, 42)
+		packets = self.roundtrip([CommandPacket(10, 3, commands), CheckupHashPacket(8, 3, checkup_hash)])
+
+		self.assertEqual([p.__class__ for p in packets], [CommandPacket, CheckupHashPacket])
+		self.assertEqual([p.tick for p in packets], [10, 8])
+		self.assertEqual(packets[1].checkup_hash, checkup_hash)
+		for original, decoded in zip(commands, packets[0].commandlist):
+			self.assertEqual(decoded.__class__, original.__class__)
+			self.assertEqual(decoded.__dict__, original.__dict__)
+		self.assertEqual(packets[0].commandlist[1].args, (17, -3))
+
+	def test_smaller_than_pickle(self):
+		packets = [CommandPacket(10, 3, [Act(Dummy(2000), 17, 3)]), CheckupHashPacket(8, 3, (0.5, 1, 2, 3))]
+		pickled = cPickle.dumps(client.game_data(packets), 2)
+		self.assertTrue(len(codec.encode(packets)) < len(pickled) / 4)
+
+	def test_unserialize(self):
+		packet = unserialize(codec.encode([CommandPacket(1, 2, [])]))
+		self.assertTrue(isinstance(packet, client.game_data))
+		self.assertEqual(packet.data[0].tick, 1)
+
+	def test_unknown_class(self):
+		self.assertRaises(codec.CodecError, codec.encode, [CommandPacket(1, 2, [Dummy(3)])])
+
+	def test_invalid_messages(self):
+		data = codec.encode([CommandPacket(1, 2, [Chat(u'hi')])])
+		self.assertRaises(codec.CodecError, codec.decode, data[:-1])
+		self.assertRaises(codec.CodecError, codec.decode, data + '\x00')
+		self.assertRaises(codec.CodecError, codec.decode, data[:1] + '\x7f' + data[2:])
+		self.assertRaises(codec.CodecError, codec.decode, data[:2] + '\x00\x00' + data[4:])
+
+		# lists nested too deeply
+		nested = [CommandPacket(1, 2, [])]
+		for i in xrange(codec.MAX_DEPTH + 1):
+			nested[0].commandlist = [nested[0].commandlist]
+		self.assertRaises(codec.CodecError, codec.decode, codec.encode(nested))
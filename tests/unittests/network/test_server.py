@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+
+from horizons.network.common import Game
+from horizons.network.packets.client import cmd_creategame
+from horizons.network.server import GameIndex
+
+
+class Creator(object):
+	def __init__(self, name):
+		self.name = name
+		self.sid = name
+		self.game = None
+
+
+class TestGameIndex(TestCase):
+
+	def setUp(self):
+		self.changed = []
+		self.index = GameIndex(self.changed.append)
+
+	def create(self, version, mapname, maxplayers):
+		game = Game(cmd_creategame(version, mapname, maxplayers, u'p', u'game'), Creator(u'p'))
+		self.index.add(game)
+		return game
+
+	def test_find_joinable(self):
+		a = self.create(u'1', u'map1', 2)
+		b = self.create(u'1', u'map2', 4)
+		c = self.create(u'2', u'map1', 2)
+		self.assertEqual(self.index.find_joinable(), [a, b, c])
+		self.assertEqual(self.index.find_joinable(u'1'), [a, b])
+		self.assertEqual(self.index.find_joinable(mapname=u'map1'), [a, c])
+		self.assertEqual(self.index.find_joinable(u'2', u'map1', 2), [c])
+		self.assertEqual(self.index.find_joinable(u'2', u'map2'), [])
+		self.assertEqual(self.index.find_joinable(u'3'), [])
+
+	def test_update(self):
+		a = self.create(u'1', u'map1', 2)
+		b = self.create(u'1', u'map1', 2)
+		a.add_player(Creator(u'q'))
+		self.index.update(a)
+		self.assertEqual(self.index.find_joinable(), [b])
+		self.assertEqual(self.changed, [a, b, a])
+
+		a.remove_player(a.players[1])
+		self.index.update(a)
+		b.state = Game.State.Running
+		self.index.update(b)
+		self.assertEqual(self.index.find_joinable(u'1', u'map1'), [a])
+		self.assertEqual(self.index.count(Game.State.Running), 1)
+
+	def test_get_and_remove(self):
+		a = self.create(u'1', u'map1', 2)
+		self.assertTrue(self.index.get(a.uuid, u'1') is a)
+		self.assertTrue(self.index.get(a.uuid, u'2') is None)
+
+		self.index.remove(a)
+		self.assertTrue(self.index.get(a.uuid, u'1') is None)
+		self.assertEqual(self.index.find_joinable(), [])
+		self.assertEqual(len(self.index), 0)
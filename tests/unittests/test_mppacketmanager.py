@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+
+import mock
+
+from horizons.manager import MPPacketmanager, CommandPacket
+
+
+class TestMPPacketmanager(TestCase):
+
+	def setUp(self):
+		self.mpmanager = mock.Mock()
+		self.mpmanager.get_player_count.return_value = 2
+		self.manager = MPPacketmanager(self.mpmanager)
+
+	def test_buckets(self):
+		a = CommandPacket(5, 1, [])
+		b = CommandPacket(6, 1, [])
+		c = CommandPacket(5, 2, [])
+		for packet in (a, b, c):
+			self.manager.add_packet(packet)
+
+		self.assertTrue(self.manager.is_tick_ready(5))
+		self.assertFalse(self.manager.is_tick_ready(6))
+		self.assertEqual(self.manager.get_packets_for_tick(5, remove_returned_commands=False), [a, c])
+		self.assertEqual(self.manager.get_packets_from_player(1), [a, b])
+		self.assertEqual(self.manager.backlog, 3)
+
+		self.assertEqual(self.manager.get_packets_for_tick(5), [a, c])
+		self.assertEqual(self.manager.get_packets_for_tick(5), [])
+		self.assertEqual(self.manager.get_packets_from_player(1), [b])
+		self.assertEqual(self.manager.get_statistics()['backlog'], 1)
+		self.assertEqual(self.manager.get_statistics()['max_backlog'], 3)
+
+	def test_duplicate_player_packets(self):
+		self.manager.add_packet(CommandPacket(5, 1, []))
+		self.manager.add_packet(CommandPacket(5, 1, []))
+		self.assertFalse(self.manager.is_tick_ready(5))
+
+	def test_wait_times(self):
+		self.manager.add_packet(CommandPacket(5, 1, []))
+		self.assertFalse(self.manager.is_tick_ready(5))
+		self.assertFalse(self.manager.is_tick_ready(5))
+		self.assertEqual(self.manager.get_statistics()['waiting_tick'], 5)
+
+		self.manager.add_packet(CommandPacket(5, 2, []))
+		self.assertTrue(self.manager.is_tick_ready(5))
+		statistics = self.manager.get_statistics()
+		self.assertEqual(statistics['recent_waits'], 1)
+		self.assertEqual(statistics['waiting_tick'], None)
+		self.assertTrue(statistics['max_wait'] >= 0)
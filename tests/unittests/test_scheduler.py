@@ -21,17 +21,21 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+from random import Random
 from unittest import TestCase
 from mock import Mock
 
 from horizons.scheduler import Scheduler
+from horizons.util import Callback
 
 class TestScheduler(TestCase):
 
+	engine = 'dict'
+
 	def setUp(self):
 		self.callback = Mock()
 		self.timer = Mock()
-		Scheduler.create_instance(self.timer)
+		Scheduler.create_instance(self.timer, engine=self.engine)
 		self.scheduler = Scheduler()
 		self.timer.reset_mock()
 
@@ -41,7 +45,7 @@ class TestScheduler(TestCase):
 	def test_create_then_register_with_timer(self):
 		# create a new scheduler but do not reset timer mock
 		Scheduler.destroy_instance()
-		Scheduler.create_instance(self.timer)
+		Scheduler.create_instance(self.timer, engine=self.engine)
 		self.scheduler = Scheduler()
 		self.timer.add_call.assert_called_once_with(self.scheduler.tick)
 
@@ -218,3 +222,100 @@ class TestScheduler(TestCase):
 		self.assertEqual(2, self.scheduler.get_remaining_ticks(instance, self.callback))
 		self.scheduler.tick(Scheduler.FIRST_TICK_ID+2)
 		self.assertEqual(1, self.scheduler.get_remaining_ticks(instance, self.callback))
+
+	def test_remove_call_within_same_tick(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		callback2 = Mock()
+		def remove_callback():
+			self.scheduler.rem_call(instance, callback2)
+		self.callback.side_effect = remove_callback
+
+		self.scheduler.add_new_object(self.callback, instance, run_in=1)
+		self.scheduler.add_new_object(callback2, instance, run_in=1)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.callback.assert_called_once_with()
+		self.assertFalse(callback2.called)
+
+	def test_remove_additional_call(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		self.scheduler.add_new_object(self.callback, instance, run_in=0)
+		self.assertEqual(1, self.scheduler.rem_call(instance, self.callback))
+		self.scheduler.before_ticking()
+		self.assertFalse(self.callback.called)
+
+	def test_reschedule_removed_object(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		self.scheduler.add_new_object(self.callback, instance, run_in=1)
+		for callback_obj in self.scheduler.get_classinst_calls(instance):
+			self.scheduler.rem_object(callback_obj)
+			callback_obj.run_in += 1
+			self.scheduler.add_object(callback_obj)
+
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.assertFalse(self.callback.called)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID+1)
+		self.callback.assert_called_once_with()
+
+
+class TestHeapScheduler(TestScheduler):
+
+	engine = 'heap'
+
+	def test_compact_while_ticking(self):
+		# the first callback of a tick cancels so many calls of the same tick that the
+		# cancelled entries are dropped while the tick is executed
+		self.scheduler.before_ticking()
+		schedule = self.scheduler.schedule
+		cancelled = [Mock() for i in xrange(2500)]
+		def cancel():
+			for instance in cancelled:
+				self.scheduler.rem_all_classinst_calls(instance)
+		self.scheduler.add_new_object(cancel, Mock(), run_in=1)
+		for instance in cancelled:
+			self.scheduler.add_new_object(self.callback, instance, run_in=1)
+		for i in xrange(499):
+			self.scheduler.add_new_object(self.callback, Mock(), run_in=1)
+		self.scheduler.add_new_object(self.callback, Mock(), run_in=2)
+
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.assertEqual(self.callback.call_count, 499)
+		self.assertEqual(len(schedule), 1)
+		self.assertEqual((schedule.size, schedule.cancelled), (1, 0))
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID+1)
+		self.assertEqual(self.callback.call_count, 500)
+		self.assertEqual((len(schedule), schedule.size, schedule.cancelled), (0, 0, 0))
+
+
+class TestSchedulerEnginesOrder(TestCase):
+	"""All engines must execute callbacks in exactly the same order."""
+
+	def run_engine(self, engine):
+		rng = Random(42)
+		timer = Mock()
+		Scheduler.create_instance(timer, engine=engine)
+		scheduler = Scheduler()
+		executed = []
+		instances = [Mock() for i in xrange(10)]
+		callbacks = [Callback(executed.append, i) for i in xrange(50)]
+
+		scheduler.before_ticking()
+		for tick in xrange(Scheduler.FIRST_TICK_ID, 200):
+			for i in xrange(20):
+				loops = rng.choice([1, 1, 2, 5, -1])
+				scheduler.add_new_object(rng.choice(callbacks), rng.choice(instances),
+				                         run_in=rng.randint(1, 30), loops=loops,
+				                         loop_interval=rng.randint(1, 10))
+			if tick % 7 == 0:
+				scheduler.rem_call(rng.choice(instances), rng.choice(callbacks))
+			if tick % 23 == 0:
+				scheduler.rem_all_classinst_calls(rng.choice(instances))
+			scheduler.tick(tick)
+
+		Scheduler.destroy_instance()
+		return executed
+
+	def test_same_order(self):
+		self.assertEqual(self.run_engine('dict'), self.run_engine('heap'))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import csv
+import os
+import pstats
+import tempfile
+import time
+from unittest import TestCase
+from mock import Mock
+
+from horizons.scheduler import Scheduler
+from horizons.schedulerprofiler import SchedulerProfiler
+from horizons.util import Callback
+
+
+class Thing(object):
+	def __init__(self):
+		self.calls = 0
+
+	def work(self):
+		self.calls += 1
+
+	def sleep(self, seconds):
+		time.sleep(seconds)
+
+
+class TestSchedulerProfiler(TestCase):
+
+	def setUp(self):
+		Scheduler.create_instance(Mock(), engine='dict')
+		self.scheduler = Scheduler()
+		self.profiler = Scheduler.profiler = SchedulerProfiler(budget=0.005)
+		self.scheduler.before_ticking()
+
+	def tearDown(self):
+		Scheduler.profiler = None
+		Scheduler.destroy_instance()
+
+	def run_ticks(self, ticks):
+		for i in xrange(ticks):
+			self.scheduler.tick(self.scheduler.cur_tick + 1)
+
+	def test_callbacks(self):
+		thing = Thing()
+		self.scheduler.add_new_object(thing.work, thing, run_in=1, loops=-1)
+		self.scheduler.add_new_object(Callback(thing.work), thing, run_in=2)
+		self.run_ticks(5)
+		self.assertEqual(thing.calls, 6)
+		# the Callback is counted as the method it calls
+		calls, seconds, max_seconds = self.profiler.callbacks[('Thing', Thing.work.im_func)]
+		self.assertEqual(calls, 6)
+		self.assertEqual(self.profiler.ticks, 5)
+		self.assertEqual(sum(self.profiler.histogram), 5)
+
+	def test_budget(self):
+		thing = Thing()
+		self.scheduler.add_new_object(Callback(thing.sleep, 0.01), thing, run_in=2)
+		self.run_ticks(3)
+		self.assertEqual(self.profiler.ticks_over_budget, 1)
+		seconds, tick_id, key, callback_seconds = self.profiler.slow_ticks[0]
+		self.assertEqual(tick_id, Scheduler.FIRST_TICK_ID + 1)
+		self.assertEqual(key, ('Thing', Thing.sleep.im_func))
+		self.assertTrue(seconds >= callback_seconds >= 0.01)
+		self.assertTrue('Thing.sleep' in self.profiler.format_summary())
+
+	def test_write(self):
+		thing = Thing()
+		self.scheduler.add_new_object(thing.work, thing, run_in=1, loops=3)
+		self.run_ticks(3)
+		handle, filename = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			self.profiler.write_csv(filename)
+			with open(filename, 'rb') as f:
+				rows = list(csv.reader(f))
+			self.assertEqual(rows[1][:2], ['Thing', 'work'])
+			self.assertEqual(rows[1][3], '3')
+
+			self.profiler.write_stats(filename)
+			stats = pstats.Stats(filename)
+			self.assertEqual([key[2] for key in stats.stats], ['Thing.work'])
+			self.assertEqual(stats.total_calls, 3)
+		finally:
+			os.remove(filename)
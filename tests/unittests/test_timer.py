@@ -26,6 +26,7 @@ import horizons.main
 from unittest import TestCase
 from mock import Mock, MagicMock, patch
 
+from horizons.headless import HeadlessTimer
 from horizons.timer import Timer
 from horizons.scheduler import Scheduler
 from horizons.constants import GAME_SPEED
@@ -173,3 +174,23 @@ class TestTimer(TestCase):
 		self.timer.add_test(self.test)
 		self.timer.check_tick()
 		self.assertFalse(self.callback.called)
+
+
+class TestHeadlessTimer(TestCase):
+
+	def setUp(self):
+		self.callback = Mock()
+		self.timer = HeadlessTimer()
+		self.timer.add_call(self.callback)
+
+	def test_run_ticks_without_waiting(self):
+		self.assertEqual(3, self.timer.run(3))
+		self.assertEqual([((TestTimer.TICK_START + i, ), {}) for i in xrange(3)],
+		                 self.callback.call_args_list)
+
+	def test_run_stops_on_test_func_skip(self):
+		test = Mock()
+		test.side_effect = lambda tick: Timer.TEST_SKIP if tick == TestTimer.TICK_START + 2 else Timer.TEST_PASS
+		self.timer.add_test(test)
+		self.assertEqual(2, self.timer.run(5))
+		self.assertEqual(2, self.callback.call_count)
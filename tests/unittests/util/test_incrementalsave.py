@@ -0,0 +1,111 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from horizons.util.dbreader import DbReader
+from horizons.util.incrementalsave import IncrementalSaver, SaveSnapshot, save_world_objects
+
+
+class Thing(object):
+	"""Minimal object with a save method."""
+	def __init__(self, worldid, value):
+		self.worldid = worldid
+		self.value = value
+		self.saves = 0
+
+	def save(self, db):
+		self.saves += 1
+		db("INSERT INTO thing(rowid, value) VALUES(?, ?)", self.worldid, self.value)
+		db("INSERT INTO thing_part(thing, value) VALUES(?, ?)", self.worldid, self.value * 2)
+		db("INSERT INTO concrete_object(id, action_runtime) VALUES(?, ?)", self.worldid, self.saves)
+
+
+class IncrementalSaverTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.saver = IncrementalSaver()
+		self.counter = 0
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def save(self, things, incremental=True):
+		"""Saves like Session._write_savegame, returns the savegame's rows"""
+		self.counter += 1
+		savegame = os.path.join(self.directory, 'save%d.sqlite' % self.counter)
+		base = self.saver.get_base_savegame() if incremental else None
+		if base is not None:
+			shutil.copyfile(base, savegame)
+		db = DbReader(savegame)
+		if base is None:
+			db.execute_script("CREATE TABLE thing(value INTEGER); CREATE TABLE thing_part(thing INTEGER, value INTEGER); " \
+			                  "CREATE TABLE concrete_object(id INTEGER, action_runtime INTEGER); CREATE TABLE other(value INTEGER);")
+		snapshot = SaveSnapshot()
+		snapshot("INSERT INTO other(value) VALUES(?)", self.counter)
+		save_world_objects(snapshot, things)
+		db("BEGIN")
+		self.saver.write(db, snapshot, base is not None)
+		db("COMMIT")
+		rows = (sorted(db("SELECT rowid, value FROM thing")), sorted(db("SELECT thing, value FROM thing_part")),
+		        sorted(db("SELECT id FROM concrete_object")), db("SELECT value FROM other"))
+		db.close()
+		self.saver.finish(savegame)
+		return rows
+
+	def test_unchanged_objects_are_kept(self):
+		things = [Thing(1, 10), Thing(2, 20)]
+		self.save(things)
+		things[1].value = 21
+		rows = self.save(things)
+		self.assertEqual(self.saver.incremental_saves, 1)
+		self.assertEqual(self.saver.written_objects, 1)
+		self.assertEqual(rows, ([(1, 10), (2, 21)], [(1, 20), (2, 42)], [(1, ), (2, )], [(2, )]))
+
+	def test_new_and_removed_objects(self):
+		things = [Thing(1, 10), Thing(2, 20)]
+		self.save(things)
+		rows = self.save([things[0], Thing(3, 30)])
+		self.assertEqual(self.saver.written_objects, 1)
+		self.assertEqual(rows, ([(1, 10), (3, 30)], [(1, 20), (3, 60)], [(1, ), (3, )], [(2, )]))
+
+	def test_full_saves(self):
+		things = [Thing(1, 10)]
+		self.save(things)
+		for i in xrange(IncrementalSaver.FULL_SAVE_INTERVAL - 1):
+			self.save(things)
+			self.assertEqual(self.saver.incremental_saves, i + 1)
+		self.save(things) # periodic full save
+		self.assertEqual(self.saver.incremental_saves, 0)
+		self.assertEqual(self.saver.written_objects, 1)
+
+		# base savegame changed by someone else
+		self.save(things)
+		base = self.saver.get_base_savegame()
+		db = DbReader(base)
+		db("INSERT INTO other(value) VALUES(0)")
+		db.close()
+		os.utime(base, (0, 0))
+		self.assertEqual(self.saver.get_base_savegame(), None)
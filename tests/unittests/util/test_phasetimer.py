@@ -0,0 +1,93 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import json
+import threading
+import unittest
+
+from horizons.util.phasetimer import PhaseTimer
+
+
+class PhaseTimerTest(unittest.TestCase):
+
+	def setUp(self):
+		PhaseTimer.enable()
+
+	def tearDown(self):
+		PhaseTimer.disable()
+
+	def test_nesting(self):
+		with PhaseTimer.phase("a"):
+			with PhaseTimer.phase("b"):
+				pass
+			with PhaseTimer.phase("c"):
+				pass
+		with PhaseTimer.phase("d"):
+			pass
+		phases = PhaseTimer.get_report()['phases']
+		self.assertEqual([phase['name'] for phase in phases], ['a', 'd'])
+		self.assertEqual([phase['name'] for phase in phases[0]['children']], ['b', 'c'])
+		self.assertTrue(phases[0]['duration'] >= phases[0]['children'][0]['duration'])
+
+	def test_exception(self):
+		def fail():
+			with PhaseTimer.phase("a"):
+				raise ValueError()
+		self.assertRaises(ValueError, fail)
+		with PhaseTimer.phase("b"):
+			pass
+		self.assertEqual([phase.name for phase in PhaseTimer.phases], ['a', 'b'])
+		self.assertNotEqual(PhaseTimer.phases[0].duration, None)
+
+	def test_timed(self):
+		@PhaseTimer.timed("f")
+		def f(x):
+			return x + 1
+		with PhaseTimer.phase("a"):
+			self.assertEqual(f(1), 2)
+		self.assertEqual(PhaseTimer.phases[0].children[0].name, 'f')
+
+	def test_thread(self):
+		def run():
+			with PhaseTimer.phase("b"):
+				pass
+		with PhaseTimer.phase("a"):
+			thread = threading.Thread(target=run, name="worker")
+			thread.start()
+			thread.join()
+		self.assertEqual([phase.name for phase in PhaseTimer.phases], ['a', 'b [worker]'])
+
+	def test_disabled(self):
+		PhaseTimer.disable()
+		with PhaseTimer.phase("a"):
+			pass
+		PhaseTimer.mark("b")
+		self.assertEqual(PhaseTimer.phases, [])
+		self.assertEqual(PhaseTimer.milestones, [])
+
+	def test_report(self):
+		with PhaseTimer.phase("a"):
+			PhaseTimer.mark("b")
+		report = json.loads(json.dumps(PhaseTimer.get_report()))
+		self.assertEqual(report['milestones'][0]['name'], 'b')
+		tree = PhaseTimer.format_report()
+		self.assertTrue('  a\n' in tree)
+		self.assertTrue(tree.endswith('  b'))
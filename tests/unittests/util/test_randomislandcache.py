@@ -0,0 +1,70 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import tempfile
+import unittest
+
+from horizons.util import random_map
+from horizons.util.randomislandcache import RandomIslandCache
+
+
+class RandomIslandCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		RandomIslandCache.close()
+		self.old_filename = RandomIslandCache.cache_filename
+		handle, RandomIslandCache.cache_filename = tempfile.mkstemp()
+		os.close(handle)
+
+	def tearDown(self):
+		RandomIslandCache.close()
+		os.remove(RandomIslandCache.cache_filename)
+		RandomIslandCache.cache_filename = self.old_filename
+
+	def test_put_get(self):
+		ground = [(1, 2, 3, 'straight', 45), (2, 2, 3, 'straight', 45)]
+		self.assertEqual(RandomIslandCache.get('random:2:40:40:1'), None)
+		RandomIslandCache.put('random:2:40:40:1', ground)
+		self.assertEqual(RandomIslandCache.get('random:2:40:40:1'), ground)
+		# survives reopening
+		RandomIslandCache.close()
+		self.assertEqual(RandomIslandCache.get('random:2:40:40:1'), ground)
+
+	def test_version(self):
+		RandomIslandCache.put('random:2:40:40:1', [(1, 2, 3, 'straight', 45)])
+		RandomIslandCache.VERSION += 1
+		try:
+			self.assertEqual(RandomIslandCache.get('random:2:40:40:1'), None)
+		finally:
+			RandomIslandCache.VERSION -= 1
+
+	def test_broken_entry(self):
+		RandomIslandCache.put('random:2:40:40:1', [(1, 2, 3, 'straight', 45)])
+		RandomIslandCache.db("UPDATE island SET ground = ?", buffer('garbage'))
+		self.assertEqual(RandomIslandCache.get('random:2:40:40:1'), None)
+
+	def test_create_random_island(self):
+		id_string = 'random:2:30:25:1234'
+		query = "SELECT x, y, ground_id, action_id, rotation FROM ground"
+		generated = random_map.create_random_island(id_string)(query)
+		self.assertTrue(RandomIslandCache.get(id_string))
+		self.assertEqual(random_map.create_random_island(id_string)(query), generated)
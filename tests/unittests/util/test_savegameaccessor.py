@@ -0,0 +1,86 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import tempfile
+import unittest
+
+from horizons.util import DbReader, SavegameAccessor
+from horizons.util.uhdbaccessor import read_savegame_template
+
+
+class SavegameAccessorTest(unittest.TestCase):
+
+	def setUp(self):
+		handle, self.filename = tempfile.mkstemp(suffix='.sqlite')
+		os.close(handle)
+		db = DbReader(self.filename)
+		read_savegame_template(db)
+		db("INSERT INTO unit(rowid, type, x, y, owner) VALUES(?, ?, ?, ?, ?)", 5, 1000001, 10, 11, 2)
+		db("INSERT INTO unit(rowid, type, x, y, owner) VALUES(?, ?, ?, ?, ?)", 6, 1000002, 12, 13, 2)
+		db("INSERT INTO collector(rowid, state, remaining_ticks, start_hidden) VALUES(?, ?, ?, ?)", 5, 1, 20, 0)
+		db("INSERT INTO collector_job(rowid, object, resource, amount) VALUES(?, ?, ?, ?)", 5, 7, 4, 3)
+		db("INSERT INTO remaining_ticks_of_month(rowid, ticks) VALUES(?, ?)", 7, 42)
+		db("INSERT INTO name(rowid, name) VALUES(?, ?)", 6, 'Bob')
+		db("INSERT INTO ai_single_resource_manager_quota(single_resource_manager, identifier, quota, priority) VALUES(?, ?, ?, ?)", 8, 'a', 1.5, 0)
+		db("INSERT INTO ai_single_resource_manager_quota(single_resource_manager, identifier, quota, priority) VALUES(?, ?, ?, ?)", 8, 'b', 2.5, 1)
+		db.close()
+
+	def tearDown(self):
+		os.remove(self.filename)
+
+	def test_prefetched_rows(self):
+		db = SavegameAccessor(self.filename)
+		self.assertEqual(db.get_unit_row(5), (10, 11, 2))
+		self.assertEqual(db.get_unit_owner(6), 2)
+		self.assertEqual(db.get_collector_row(5), (1, 20, 0))
+		self.assertEqual(db.get_collector_job(5), (7, 4, 3))
+		self.assertEqual(db.get_collector_job(6), None)
+		self.assertEqual(db.get_remaining_ticks_of_month(7), 42)
+		self.assertEqual(db.get_remaining_ticks_of_month(5), None)
+		self.assertEqual(db.get_name(6), 'Bob')
+		self.assertFalse(db.has_ship_route(5))
+		self.assertEqual(db.get_ai_single_resource_manager_quotas(8), [('a', 1.5, 0), ('b', 2.5, 1)])
+		self.assertEqual(db.get_ai_single_resource_manager_quotas(9), [])
+		db.close()
+
+	def test_missing_tables(self):
+		# maps don't contain all tables of savegames
+		db = DbReader(self.filename)
+		db("DROP TABLE collector")
+		db("DROP TABLE remaining_ticks_of_month")
+		db.close()
+		db = SavegameAccessor(self.filename)
+		self.assertEqual(db.get_remaining_ticks_of_month(7), None)
+		self.assertEqual(db.get_collector_job(5), (7, 4, 3))
+		db.close()
+
+	def test_query_stats(self):
+		db = SavegameAccessor(self.filename)
+		queries, rows, seconds = db.query_stats['unit']
+		self.assertEqual((queries, rows), (1, 2))
+		db("SELECT x FROM unit WHERE rowid = ?", 5)
+		db("SELECT x FROM `unit` WHERE rowid = ?", 7)
+		self.assertEqual(db.query_stats['unit'][:2], [3, 3])
+		report = db.get_query_report()
+		self.assertTrue(any(line.startswith('unit ') for line in report))
+		self.assertTrue(report[-1].startswith('total'))
+		db.close()
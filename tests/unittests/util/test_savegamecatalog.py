@@ -0,0 +1,113 @@
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import mock
+
+from horizons.savegamemanager import SavegameManager
+from horizons.util import DbReader
+from horizons.util.savegamecatalog import SavegameCatalog
+
+
+class SavegameCatalogTest(unittest.TestCase):
+
+	def setUp(self):
+		SavegameCatalog.close()
+		self.old_filename = SavegameCatalog.cache_filename
+		handle, SavegameCatalog.cache_filename = tempfile.mkstemp()
+		os.close(handle)
+		handle, self.savegame = tempfile.mkstemp(suffix='.sqlite')
+		os.close(handle)
+
+	def tearDown(self):
+		SavegameCatalog.close()
+		os.remove(SavegameCatalog.cache_filename)
+		SavegameCatalog.cache_filename = self.old_filename
+		if os.path.exists(self.savegame):
+			os.remove(self.savegame)
+
+	def test_put_get(self):
+		metadata = {'timestamp': 1234.5, 'savecounter': 3}
+		self.assertEqual(SavegameCatalog.get(self.savegame), None)
+		SavegameCatalog.put(self.savegame, metadata)
+		self.assertEqual(SavegameCatalog.get(self.savegame), metadata)
+		# survives reopening
+		SavegameCatalog.close()
+		self.assertEqual(SavegameCatalog.get(self.savegame), metadata)
+
+	def test_changed_file(self):
+		SavegameCatalog.put(self.savegame, {'timestamp': 1234.5})
+		with open(self.savegame, 'w') as f:
+			f.write('changed')
+		self.assertEqual(SavegameCatalog.get(self.savegame), None)
+
+	def test_removed_file(self):
+		SavegameCatalog.put(self.savegame, {'timestamp': 1234.5})
+		os.remove(self.savegame)
+		self.assertEqual(SavegameCatalog.get(self.savegame), None)
+		# the entry is removed when the catalog is read again
+		SavegameCatalog.close()
+		self.assertEqual(SavegameCatalog.get(self.savegame), None)
+		self.assertEqual(SavegameCatalog.db("SELECT COUNT(*) FROM savegame")[0][0], 0)
+
+	def test_locked_catalog(self):
+		metadata = {'timestamp': 1234.5}
+		SavegameCatalog.put(self.savegame, metadata)
+		SavegameCatalog.db("PRAGMA busy_timeout = 0") # fail immediately
+		# another instance of the game is writing to the catalog
+		other = DbReader(SavegameCatalog.cache_filename)
+		other("BEGIN EXCLUSIVE")
+		try:
+			SavegameCatalog.put(self.savegame, {'timestamp': 2345.6})
+		finally:
+			other("ROLLBACK")
+			other.close()
+		# only storing the new metadata failed, the catalog is still used and not cleared
+		self.assertEqual(SavegameCatalog.get(self.savegame), {'timestamp': 2345.6})
+		SavegameCatalog.close()
+		self.assertEqual(SavegameCatalog.get(self.savegame), metadata)
+
+	def test_broken_catalog(self):
+		SavegameCatalog.put(self.savegame, {'timestamp': 1234.5})
+		SavegameCatalog._handle_error(sqlite3.DatabaseError("database disk image is malformed"))
+		self.assertEqual(SavegameCatalog.get(self.savegame), None)
+		SavegameCatalog.close()
+		self.assertEqual(SavegameCatalog.get(self.savegame), None)
+
+	def test_cached_metadata(self):
+		db = DbReader(self.savegame)
+		db("CREATE TABLE metadata (name TEXT NOT NULL, value TEXT NOT NULL)")
+		timestamp = 1234.5
+		db("INSERT INTO metadata(name, value) VALUES(?, ?)", 'timestamp', timestamp)
+		db("INSERT INTO metadata(name, value) VALUES(?, ?)", 'savecounter', 7)
+		db.close()
+
+		metadata = SavegameManager.get_cached_metadata(self.savegame)
+		self.assertEqual(metadata, {'timestamp': timestamp, 'savecounter': 7, 'savegamerev': 0})
+		# the savegame isn't opened again
+		SavegameCatalog.close()
+		with mock.patch.object(SavegameManager, 'get_metadata') as get_metadata:
+			self.assertEqual(SavegameManager.get_cached_metadata(self.savegame), metadata)
+			self.assertFalse(get_metadata.called)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+
+
+from unittest import TestCase
+
+from horizons.world.groundmap import GroundMap, IslandMap, FullGroundMap
+
+
+class Tile(object):
+	def __init__(self, x, y, value):
+		self.x, self.y, self.value = x, y, value
+
+class ValueMap(GroundMap):
+	def __init__(self, *args):
+		super(ValueMap, self).__init__(*args)
+		self.created = 0
+
+	def _create_tile(self, x, y, value):
+		self.created += 1
+		return Tile(x, y, value)
+
+class Island(object):
+	def __init__(self, coords):
+		self.ground_map = dict( (c, Tile(c[0], c[1], 1)) for c in coords )
+
+
+class TestGroundMap(TestCase):
+
+	def setUp(self):
+		self.map = ValueMap(-2, 3, 2, 5)
+		self.map.set_value((-2, 3), 1)
+		self.map.set_value((0, 4), 2)
+		self.map.set_value((2, 5), 3)
+
+	def test_dict_interface(self):
+		m = self.map
+		self.assertEqual(len(m), 3)
+		self.assertTrue((0, 4) in m)
+		self.assertFalse((1, 4) in m)
+		self.assertFalse((10, 4) in m)
+		self.assertEqual(m[(0, 4)].value, 2)
+		self.assertRaises(KeyError, lambda: m[(1, 4)])
+		self.assertRaises(KeyError, lambda: m[(10, 4)])
+		self.assertEqual(m.get((1, 4)), None)
+		self.assertEqual(m.get((2, 5)).value, 3)
+		self.assertEqual(sorted(m), [(-2, 3), (0, 4), (2, 5)])
+		self.assertEqual(sorted(m.keys()), [(-2, 3), (0, 4), (2, 5)])
+		self.assertEqual(sorted(t.value for t in m.itervalues()), [1, 2, 3])
+		self.assertEqual(sorted((c, t.value) for c, t in m.iteritems()), [((-2, 3), 1), ((0, 4), 2), ((2, 5), 3)])
+
+	def test_tiles_are_kept(self):
+		m = self.map
+		self.assertEqual(m.created, 0)
+		tile = m[(0, 4)]
+		tile.object = 'building'
+		self.assertTrue(m[(0, 4)] is tile)
+		self.assertTrue(m.get((0, 4)) is tile)
+		self.assertEqual(m.created, 1)
+		self.assertEqual(m.get_created_tiles(), 1)
+
+	def test_set_value(self):
+		m = self.map
+		m[(0, 4)]
+		m.set_value((0, 4), 0)
+		self.assertFalse((0, 4) in m)
+		self.assertEqual(len(m), 2)
+		m.set_value((1, 4), 5)
+		self.assertEqual(m[(1, 4)].value, 5)
+		self.assertEqual(len(m), 3)
+		self.assertRaises(TypeError, m.__setitem__, (1, 4), Tile(1, 4, 1))
+
+
+class TestWorldMaps(TestCase):
+
+	def test_island_and_full_map(self):
+		islands = [Island([(0, 0), (1, 0)]), Island([(3, 3)])]
+		island_map = IslandMap(islands, 0, 0, 3, 3)
+		water_map = ValueMap(0, 0, 3, 3)
+		for x in xrange(4):
+			for y in xrange(4):
+				if (x, y) not in island_map:
+					water_map.set_value((x, y), 1)
+		full_map = FullGroundMap(water_map, island_map)
+
+		self.assertTrue(island_map[(1, 0)] is islands[0])
+		self.assertTrue(island_map.get((3, 3)) is islands[1])
+		self.assertEqual(island_map.get((2, 2)), None)
+		self.assertEqual(len(island_map), 3)
+		self.assertEqual(len(water_map), 13)
+
+		self.assertEqual(len(full_map), 16)
+		self.assertEqual(len(list(full_map)), 16)
+		self.assertTrue(full_map[(0, 0)] is islands[0].ground_map[(0, 0)])
+		self.assertTrue(full_map[(2, 2)] is water_map[(2, 2)])
+		self.assertEqual(full_map.get((4, 4)), None)
+		self.assertRaises(TypeError, full_map.set_value, (2, 2), 1)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+
+
+
+import random
+from unittest import TestCase
+
+from horizons.util import Point, Rect, Circle
+from horizons.world.islandindex import IslandIndex
+
+
+class Island(object):
+	def __init__(self, coords):
+		self.ground_map = dict.fromkeys(coords)
+		xs = [c[0] for c in coords]
+		ys = [c[1] for c in coords]
+		self.rect = Rect.init_from_borders(min(xs), min(ys), max(xs) + 1, max(ys) + 1)
+
+
+class TestIslandIndex(TestCase):
+
+	def setUp(self):
+		rand = random.Random(3)
+		self.islands = []
+		for left, top in ((0, 0), (30, 5), (10, 40)):
+			# ragged islands with holes in their rect
+			coords = [(left + x, top + y) for x in xrange(15) for y in xrange(12) if rand.random() < 0.6]
+			self.islands.append(Island(coords))
+		self.index = IslandIndex(self.islands)
+
+	def brute_force(self, point, radius):
+		coords = list(Circle(point, radius).tuple_iter())
+		return [island for island in self.islands if any(c in island.ground_map for c in coords)]
+
+	def test_islands_in_radius(self):
+		for x in xrange(-10, 60, 3):
+			for y in xrange(-10, 65, 3):
+				for radius in (0, 1, 4, 9):
+					point = Point(x, y)
+					self.assertEqual(self.index.get_islands_in_radius(point, radius), self.brute_force(point, radius))
+
+	def test_islands_near(self):
+		self.assertEqual(self.index.get_islands_near(Point(100, 100), 10), [])
+		self.assertEqual(self.index.get_islands_near(Point(22, 3), 10), self.islands[:2])
+		for x in xrange(-10, 60, 5):
+			for y in xrange(-10, 65, 5):
+				near = self.index.get_islands_near(Point(x, y), 6)
+				for island in self.brute_force(Point(x, y), 6):
+					self.assertTrue(island in near)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+
+
+
+from unittest import TestCase
+
+from horizons.util import Rect
+from horizons.world.minimapraster import MinimapRaster
+
+
+class Tile(object):
+	def __init__(self):
+		self.settlement = None
+
+class Color(object):
+	def __init__(self, rgb):
+		self.rgb = rgb
+	def to_tuple(self):
+		return self.rgb
+
+class Player(object):
+	def __init__(self, rgb):
+		self.color = Color(rgb)
+
+class Settlement(object):
+	def __init__(self, rgb):
+		self.owner = Player(rgb)
+
+class Island(object):
+	def __init__(self, left, top, width, height):
+		self.ground_map = dict(((x, y), Tile()) for x in xrange(left, left + width)
+		                                        for y in xrange(top, top + height))
+		self.rect = Rect.init_from_topleft_and_size(left, top, width, height)
+
+class World(object):
+	def __init__(self, islands):
+		self.islands = islands
+		self.min_x = self.min_y = 0
+		self.map_dimensions = Rect.init_from_topleft_and_size(0, 0, 100, 80)
+
+
+ISLAND = (1, 2, 3)
+
+class TestMinimapRaster(TestCase):
+
+	def setUp(self):
+		self.islands = [Island(10, 10, 20, 15), Island(50, 40, 30, 30)]
+		self.world = World(self.islands)
+
+	def brute_force(self, raster):
+		"""Like the pixel by pixel loop of the old Minimap._recalculate"""
+		ratio_x = 100.0 / raster.width
+		ratio_y = 80.0 / raster.height
+		pixels = {}
+		for x in xrange(raster.width):
+			for y in xrange(raster.height):
+				coords = (int(x * ratio_x) + int(ratio_x / 2), int(y * ratio_y) + int(ratio_y / 2))
+				for island in self.islands:
+					if coords in island.ground_map:
+						settlement = island.ground_map[coords].settlement
+						pixels[(x, y)] = ISLAND if settlement is None else settlement.owner.color.to_tuple()
+		return pixels
+
+	def test_calculate(self):
+		for width, height in ((100, 80), (50, 40), (37, 53), (200, 160)):
+			raster = MinimapRaster(self.world, width, height, ISLAND)
+			self.assertEqual(raster.calculate(), self.brute_force(raster))
+			self.assertEqual(raster.pixels, raster.calculate())
+
+	def test_update(self):
+		raster = MinimapRaster(self.world, 50, 40, ISLAND)
+		raster.calculate()
+		self.assertEqual(raster.update(0, 0, 49, 39), [])
+
+		settlement = Settlement((255, 0, 0))
+		for x in xrange(50, 60):
+			for y in xrange(40, 50):
+				self.islands[1].ground_map[(x, y)].settlement = settlement
+		# only part of the changed area
+		changed = raster.update(20, 20, 27, 22)
+		self.assertEqual(sorted(changed), [((x, y), (255, 0, 0)) for x in xrange(25, 28) for y in xrange(20, 23)])
+		self.assertNotEqual(raster.pixels, self.brute_force(raster))
+		# the rest, parts outside of the minimap are ignored
+		changed = raster.update(20, 20, 100, 100)
+		self.assertEqual(len(changed), 5 * 5 - 3 * 3)
+		self.assertEqual(raster.pixels, self.brute_force(raster))
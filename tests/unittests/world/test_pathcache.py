@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+
+from horizons.util import Point, Rect
+from horizons.world.pathfinding.pathcache import PathCache
+from horizons.world.pathfinding.pathfinding import FindPath
+
+
+class TestPathCache(TestCase):
+
+	def setUp(self):
+		# a road from (0, 0) to (9, 0)
+		self.nodes = dict( ((x, 0), 1.0) for x in xrange(10) )
+		self.cache = PathCache()
+		self.searches = 0
+
+	def find_path(self, source, destination):
+		self.searches += 1
+		return FindPath()(source, destination, self.nodes)
+
+	def get_path(self, source, destination, kind='road'):
+		return self.cache.get_path(kind, source, destination, self.find_path)
+
+	def test_hit(self):
+		path = self.get_path(Point(0, 0), Rect.init_from_borders(9, 0, 9, 1))
+		self.assertEqual(len(path), 10)
+		self.assertEqual(path, self.get_path(Point(0, 0), Rect.init_from_borders(9, 0, 9, 1)))
+		self.assertEqual(self.searches, 1)
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+	def test_returns_copies(self):
+		path = self.get_path(Point(0, 0), Point(9, 0))
+		del path[2:]
+		self.assertEqual(len(self.get_path(Point(0, 0), Point(9, 0))), 10)
+
+	def test_keys(self):
+		self.get_path(Point(0, 0), Point(9, 0))
+		self.get_path(Point(0, 0), Point(8, 0))
+		self.get_path(Point(0, 0), Point(9, 0), kind='other')
+		self.assertEqual(self.searches, 3)
+		self.assertEqual(len(self.cache), 3)
+
+	def test_invalidate_on_path(self):
+		self.get_path(Point(0, 0), Point(9, 0))
+		self.get_path(Point(0, 0), Point(3, 0))
+		del self.nodes[(5, 0)]
+		self.cache.invalidate((5, 0))
+		self.assertEqual(len(self.cache), 1)
+		self.assertEqual(self.get_path(Point(0, 0), Point(9, 0)), None)
+		self.assertEqual(len(self.get_path(Point(0, 0), Point(3, 0))), 4)
+		self.assertEqual(self.searches, 3)
+		self.assertEqual(self.cache.invalidations, 1)
+
+	def test_invalidate_destination(self):
+		self.assertEqual(self.get_path(Point(0, 0), Point(5, 3)), None)
+		self.cache.invalidate((5, 3))
+		self.assertEqual(len(self.cache), 0)
+		self.assertEqual(self.cache.keys_at_coords, {})
+
+	def test_clear(self):
+		self.assertEqual(self.get_path(Point(0, 0), Point(5, 2)), None)
+		self.nodes[(5, 1)] = 1.0
+		self.cache.clear()
+		self.assertEqual(len(self.get_path(Point(0, 0), Point(5, 2))), 8)
+
+	def test_unsupported_area(self):
+		paths = []
+		self.cache.get_path('road', Point(0, 0), (9, 0), lambda source, dest: paths.append(dest))
+		self.assertEqual(paths, [(9, 0)])
+		self.assertEqual(len(self.cache), 0)
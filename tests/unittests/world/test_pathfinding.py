@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from random import Random
+from unittest import TestCase
+
+from horizons.util import Point, Rect
+from horizons.world.pathfinding.pathfinding import FindPath, GridFindPath, PathGrid
+
+
+class TestGridFindPath(TestCase):
+
+	def setUp(self):
+		rng = Random(2)
+		# 30x20 map with some obstacles
+		self.nodes = dict( ((x, y), 1.0) for x in xrange(30) for y in xrange(20) if rng.random() > 0.3 )
+		self.coords = sorted(self.nodes)
+		self.rng = rng
+		self.pathfinder = GridFindPath(PathGrid(0, 0, 29, 19))
+
+	def assert_same_path(self, source, destination, blocked=(), diagonal=False, make_target_walkable=True):
+		expected = FindPath()(source, destination, self.nodes, list(blocked), diagonal, make_target_walkable)
+		path = self.pathfinder(source, destination, self.nodes, list(blocked), diagonal, make_target_walkable)
+		self.assertEqual(expected, path)
+		return path
+
+	def test_same_paths(self):
+		found = 0
+		for i in xrange(100):
+			source = Point(*self.rng.choice(self.coords))
+			destination = Point(*self.rng.choice(self.coords))
+			for diagonal in (False, True):
+				if self.assert_same_path(source, destination, diagonal=diagonal) is not None:
+					found += 1
+		self.assertTrue(found > 0)
+
+	def test_rect_destination_not_walkable(self):
+		for i in xrange(20):
+			source = Point(*self.rng.choice(self.coords))
+			x, y = self.rng.choice(self.coords)
+			destination = Rect.init_from_topleft_and_size(x, y, 2, 2)
+			self.assert_same_path(source, destination, diagonal=True, make_target_walkable=False)
+
+	def test_blocked_coords(self):
+		blocked = self.rng.sample(self.coords, 50)
+		for i in xrange(20):
+			source = Point(*self.rng.choice(self.coords))
+			destination = Point(*self.rng.choice(self.coords))
+			self.assert_same_path(source, destination, blocked, diagonal=True)
+
+	def test_no_path_leaves_grid(self):
+		self.nodes = dict( ((x, 0), 1.0) for x in xrange(30) )
+		path = self.pathfinder(Point(0, 0), Point(29, 0), self.nodes)
+		self.assertEqual([(x, 0) for x in xrange(30)], path)
+		self.assertEqual(None, self.pathfinder(Point(0, 0), Point(29, 1), self.nodes, [], False, False))
+
+	def test_fall_back_outside_of_grid(self):
+		self.nodes[(30, 5)] = 1.0
+		self.nodes[(31, 5)] = 1.0
+		self.assert_same_path(Point(29, 5), Point(31, 5), diagonal=True)
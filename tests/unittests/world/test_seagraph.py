@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from random import Random
+from unittest import TestCase
+
+from horizons.util import Point, Rect
+from horizons.world.pathfinding.pathfinding import FindPath
+from horizons.world.pathfinding.seagraph import SeaGraph
+
+
+class TestSeaGraph(TestCase):
+
+	def setUp(self):
+		# 100x60 sea with a wall at x = 50, which has a gap at y = 30
+		self.water = dict( ((x, y), 1.0) for x in xrange(100) for y in xrange(60) \
+		                   if x != 50 or y == 30 )
+		self.graph = SeaGraph(self.water)
+
+	def find_path(self, source, destination):
+		path_nodes = self.graph.get_path_nodes(source, destination)
+		if path_nodes is None:
+			return None
+		return FindPath()(source, destination, path_nodes, [], True, False)
+
+	def test_regions(self):
+		# clusters at the wall have a region on each side, only the one with the gap has one
+		self.assertEqual(len(self.graph.region_of), len(self.water))
+		size = SeaGraph.CLUSTER_SIZE
+		clusters = set(self.graph.get_cluster(coords) for coords in self.water)
+		wall_clusters = len([ cluster for cluster in clusters if cluster[0] == 50 // size ])
+		self.assertEqual(len(self.graph.regions), len(clusters) + wall_clusters - 1)
+
+	def test_long_trip(self):
+		path_nodes = self.graph.get_path_nodes(Point(2, 2), Point(97, 57))
+		self.assertTrue(len(path_nodes) < len(self.water))
+		path = self.find_path(Point(2, 2), Point(97, 57))
+		self.assertTrue((50, 30) in path)
+		self.assertEqual(path[0], (2, 2))
+		self.assertEqual(path[-1], (97, 57))
+
+	def test_short_trip(self):
+		self.assertTrue(self.graph.get_path_nodes(Point(2, 2), Point(5, 5)) is self.water)
+
+	def test_same_reachability(self):
+		rng = Random(1)
+		# add two lakes of one tile
+		for coords in ((20, 20), (80, 40)):
+			for neighbor in Rect.init_from_borders(coords[0] - 1, coords[1] - 1, coords[0] + 1, coords[1] + 1).tuple_iter():
+				if neighbor != coords:
+					del self.water[neighbor]
+		self.graph = SeaGraph(self.water)
+		coords = sorted(self.water)
+		for i in xrange(50):
+			source, destination = Point(*rng.choice(coords)), Point(*rng.choice(coords))
+			expected = FindPath()(source, destination, self.water, [], True, False)
+			self.assertEqual(expected is None, self.find_path(source, destination) is None)
+
+	def test_update(self):
+		self.assertTrue(self.find_path(Point(2, 2), Point(97, 57)))
+		del self.water[(50, 30)]
+		self.graph.update([(50, 30)])
+		self.assertEqual(self.graph.get_path_nodes(Point(2, 2), Point(97, 57)), None)
+		self.water[(50, 10)] = 1.0
+		self.graph.update([(50, 10)])
+		path = self.find_path(Point(2, 2), Point(97, 57))
+		self.assertTrue((50, 10) in path)
+		self.assertEqual(len(self.graph.region_of), len(self.water))
+
+	def test_destination_on_land(self):
+		self.assertEqual(self.graph.get_path_nodes(Point(2, 2), Point(50, 40)), None)
+		self.assertTrue(self.graph.get_path_nodes(Point(2, 2), Rect.init_from_borders(50, 40, 51, 41)))
@@ -183,3 +183,70 @@ class TestOtherStorages(TestCase):
 
 		self.assertEqual(s.alter(4, 1), 1)
 
+
+
+class TestResourceListeners(TestCase):
+
+	def setUp(self):
+		self.calls = []
+
+	def listener(self):
+		self.calls.append(True)
+
+	def test_threshold(self):
+		s = PositiveSizedSlotStorage(10)
+		s.add_resource_listener(1, self.listener, 3)
+		s.alter(2, 5) # other res
+		s.alter(1, 2)
+		self.assertEqual(len(self.calls), 0)
+		s.alter(1, 1) # reaches threshold
+		self.assertEqual(len(self.calls), 1)
+		s.alter(1, 4)
+		self.assertEqual(len(self.calls), 1)
+		s.alter(1, -6) # drops below
+		self.assertEqual(len(self.calls), 2)
+
+	def test_without_threshold(self):
+		s = PositiveSizedSlotStorage(10)
+		s.add_resource_listener(1, self.listener)
+		s.alter(1, 2)
+		s.alter(1, 2)
+		s.alter(2, 2)
+		s.alter(1, 0)
+		self.assertEqual(len(self.calls), 2)
+		s.reset(1)
+		self.assertEqual(len(self.calls), 3)
+		# the free space changes
+		s.adjust_limit(5)
+		self.assertEqual(len(self.calls), 4)
+
+	def test_total_storage_space(self):
+		s = PositiveTotalStorage(10)
+		s.add_resource_listener(1, self.listener)
+		s.alter(2, 5) # the free space for 1 is shared with 2
+		self.assertEqual(len(self.calls), 1)
+
+	def test_remove(self):
+		s = GenericStorage()
+		s.add_resource_listener(1, self.listener, 1)
+		s.add_resource_listener(1, self.listener, 2) # just updates threshold
+		self.assertTrue(s.has_resource_listener(1, self.listener))
+		s.alter(1, 1)
+		self.assertEqual(len(self.calls), 0)
+		s.alter(1, 1)
+		self.assertEqual(len(self.calls), 1)
+		s.remove_resource_listener(1, self.listener)
+		self.assertFalse(s.has_resource_listener(1, self.listener))
+		s.alter(1, -2)
+		self.assertEqual(len(self.calls), 1)
+		self.assertRaises(ValueError, s.remove_resource_listener, 1, self.listener)
+		s.discard_resource_listener(1, self.listener)
+
+	def test_remove_while_calling(self):
+		s = GenericStorage()
+		def remove_other():
+			s.remove_resource_listener(1, self.listener)
+		s.add_resource_listener(1, remove_other)
+		s.add_resource_listener(1, self.listener)
+		s.alter(1, 1)
+		self.assertEqual(len(self.calls), 0)
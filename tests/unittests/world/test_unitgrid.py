@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2012 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+
+
+
+import random
+from unittest import TestCase
+
+from horizons.util import Point, Circle
+from horizons.world.unitgrid import UnitGrid
+
+
+class Unit(object):
+	def __init__(self, x, y):
+		self.position = Point(x, y)
+
+
+class TestUnitGrid(TestCase):
+
+	def setUp(self):
+		self.grid = UnitGrid()
+		self.units = []
+		for x, y in ((0, 0), (5, 5), (40, 40), (-20, 3), (15, 16), (16, 16)):
+			unit = Unit(x, y)
+			self.grid.add(unit)
+			self.units.append(unit)
+
+	def brute_force(self, position, radius):
+		circle = Circle(position, radius)
+		return [unit for unit in self.units if circle.contains(unit.position)]
+
+	def test_query(self):
+		u = self.units
+		self.assertEqual(self.grid.get_in_radius(Point(0, 0), 10), [u[0], u[1]])
+		self.assertEqual(self.grid.get_in_radius(Point(16, 16), 1), [u[4], u[5]])
+		self.assertEqual(self.grid.get_in_radius(Point(-20, 0), 3), [u[3]])
+		self.assertEqual(self.grid.get_in_radius(Point(100, 100), 20), [])
+
+	def test_update_and_remove(self):
+		u = self.units
+		u[2].position = Point(1, 1)
+		self.grid.update(u[2])
+		self.assertEqual(self.grid.get_in_radius(Point(0, 0), 2), [u[0], u[2]])
+		self.assertEqual(self.grid.get_in_radius(Point(40, 40), 5), [])
+
+		self.grid.remove(u[0])
+		self.assertFalse(u[0] in self.grid)
+		self.assertEqual(len(self.grid), 5)
+		self.assertEqual(self.grid.get_in_radius(Point(0, 0), 2), [u[2]])
+		self.grid.update(u[0]) # removed units are ignored
+
+	def test_random_moves(self):
+		rand = random.Random(7)
+		for i in xrange(50):
+			unit = Unit(rand.randint(-50, 50), rand.randint(-50, 50))
+			self.grid.add(unit)
+			self.units.append(unit)
+		for i in xrange(200):
+			unit = rand.choice(self.units)
+			unit.position = Point(unit.position.x + rand.randint(-1, 1), unit.position.y + rand.randint(-1, 1))
+			self.grid.update(unit)
+			position = Point(rand.randint(-60, 60), rand.randint(-60, 60))
+			radius = rand.choice((0, 1, 5, 15.5, 40))
+			self.assertEqual(self.grid.get_in_radius(position, radius), self.brute_force(position, radius))